@@ -0,0 +1,139 @@
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+from typing import List, Dict
+
+root = Path(__file__).parent.parent
+sys.path.append(str(root))
+
+from src.waymo_api.core.client import WaymoClient
+from src.waymo_api.core.pool import WaymoClientPool, DeviceConfig
+from src.waymo_api.core.models import TripResult
+from src.waymo_api.core.exceptions import WaymoClientError
+from src.waymo_api.testing.fake_appium import FakeAppiumServer, FakeLatency, FakeFailures
+from src.waymo_api.utils.metrics import metrics
+
+def parse_arguments():
+	parser = argparse.ArgumentParser(description='Benchmark WaymoClient throughput against fake Appium servers')
+	parser.add_argument('--trips', type=int, default=30, help='Number of trips per scenario (default: 30)')
+	parser.add_argument('--dropoffs', type=int, default=5, help='Distinct dropoffs among the trips (default: 5)')
+	parser.add_argument('--devices', type=int, default=3, help='Fake devices for the pool scenario (default: 3)')
+	parser.add_argument('--command-latency', type=float, default=0.01)
+	parser.add_argument('--search-latency', type=float, default=0.2)
+	parser.add_argument('--fare-latency', type=float, default=0.3)
+	parser.add_argument('--multiple-points-rate', type=float, default=0.1)
+	parser.add_argument('--no-results-rate', type=float, default=0.0)
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--save', type=str, help='Write results to this JSON file')
+	parser.add_argument('--baseline', type=str, help='Compare against results saved with --save')
+	return parser.parse_args()
+
+def make_trips(count: int, dropoffs: int) -> List[Dict[str, str]]:
+	return [{"pickup": f"Pickup {i}", "dropoff": f"Dropoff {i % dropoffs}"} for i in range(count)]
+
+def run_scenario(name: str, servers: List[FakeAppiumServer], trips: List[Dict[str, str]], run) -> Dict:
+	"""Time one scenario and collect throughput, step latency and peak memory"""
+	metrics.reset()
+	tracemalloc.start()
+	start = time.perf_counter()
+	results = run(servers, trips)
+	elapsed = time.perf_counter() - start
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	successful = sum(1 for r in results if r.success)
+	return {
+		"scenario": name,
+		"trips": len(trips),
+		"successful": successful,
+		"seconds": elapsed,
+		"trips_per_min": successful / elapsed * 60 if elapsed else 0.0,
+		"peak_memory_kb": peak / 1024,
+		"steps": {row["step"]: {"p50": row["p50"], "p95": row["p95"]} for row in _merge_devices(metrics.snapshot())}
+	}
+
+def _merge_devices(rows: List[Dict]) -> List[Dict]:
+	merged = {}
+	for row in rows:
+		if row["step"] not in merged or row["count"] > merged[row["step"]]["count"]:
+			merged[row["step"]] = row
+	return list(merged.values())
+
+def _one_by_one(client, trips):
+	for trip in trips:
+		try:
+			yield TripResult(trip["pickup"], trip["dropoff"], trip_info=client.get_trip_info(trip["pickup"], trip["dropoff"]))
+		except WaymoClientError as e:
+			yield TripResult(trip["pickup"], trip["dropoff"], error=str(e))
+
+def sequential(servers, trips):
+	with WaymoClient(server_url=servers[0].url) as client:
+		return list(_one_by_one(client, trips))
+
+def sequential_element_lookups(servers, trips):
+	with WaymoClient(server_url=servers[0].url, use_page_source=False) as client:
+		return list(_one_by_one(client, trips))
+
+def sequential_send_keys(servers, trips):
+	with WaymoClient(server_url=servers[0].url, input_mode="send_keys") as client:
+		return list(_one_by_one(client, trips))
+
+def grouped_by_dropoff(servers, trips):
+	with WaymoClient(server_url=servers[0].url) as client:
+		return client.get_trip_infos(trips)
+
+def pool(servers, trips):
+	devices = [DeviceConfig(f"fake-{i}", server.url) for i, server in enumerate(servers)]
+	with WaymoClientPool(devices) as client_pool:
+		return client_pool.map(trips)
+
+def print_report(results: List[Dict], baseline: Dict[str, Dict]):
+	print(f"\n{'scenario':<28}{'ok':>6}{'trips/min':>12}{'peak KB':>10}{'vs baseline':>14}")
+	for result in results:
+		base = baseline.get(result["scenario"])
+		change = f"{(result['trips_per_min'] / base['trips_per_min'] - 1) * 100:+.1f}%" if base and base["trips_per_min"] else "-"
+		print(f"{result['scenario']:<28}{result['successful']:>6}{result['trips_per_min']:>12.1f}{result['peak_memory_kb']:>10.0f}{change:>14}")
+
+	for result in results:
+		print(f"\n{result['scenario']} step latency (seconds):")
+		for step, timing in sorted(result["steps"].items()):
+			print(f"  {step:<28} p50={timing['p50']:.3f} p95={timing['p95']:.3f}")
+
+def main():
+	args = parse_arguments()
+	latency = FakeLatency(command=args.command_latency, search_results=args.search_latency, fare=args.fare_latency)
+	failures = FakeFailures(no_results=args.no_results_rate, multiple_points=args.multiple_points_rate)
+	trips = make_trips(args.trips, args.dropoffs)
+
+	scenarios = [
+		("sequential", sequential, 1),
+		("sequential_element_lookups", sequential_element_lookups, 1),
+		("sequential_send_keys", sequential_send_keys, 1),
+		("grouped_by_dropoff", grouped_by_dropoff, 1),
+		(f"pool_{args.devices}_devices", pool, args.devices),
+	]
+	results = []
+	for name, run, device_count in scenarios:
+		servers = [FakeAppiumServer(latency=latency, failures=failures, seed=args.seed + i) for i in range(device_count)]
+		for server in servers:
+			server.start()
+		try:
+			results.append(run_scenario(name, servers, trips, run))
+		finally:
+			for server in servers:
+				server.stop()
+
+	baseline = {}
+	if args.baseline:
+		baseline = {r["scenario"]: r for r in json.loads(Path(args.baseline).read_text())}
+	print_report(results, baseline)
+
+	if args.save:
+		Path(args.save).write_text(json.dumps(results, indent=2))
+		print(f"\nSaved results to {args.save}")
+
+if __name__ == "__main__":
+	main()
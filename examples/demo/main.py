@@ -1,16 +1,19 @@
 import sys
 import json
 import argparse
+from contextlib import nullcontext
 from pathlib import Path
-from typing import List, Dict
-from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Iterator
 
 root = Path(__file__).parent.parent.parent
 sys.path.append(str(root))
 
 from src.waymo_api.core.client import WaymoClient
+from src.waymo_api.core.pool import WaymoClientPool, default_devices
+from src.waymo_api.core.models import TripResult
 from src.waymo_api.core.exceptions import WaymoClientError
 from src.waymo_api.utils.logger import setup_logger
+from src.waymo_api.utils.metrics import metrics, profile
 
 def parse_arguments():
 	parser = argparse.ArgumentParser(description='Get Waymo trip inputs')
@@ -30,7 +33,13 @@ def parse_arguments():
 		'--workers',
 		type=int,
 		default=1,
-		help='Number of parallel workers (default: 1)'
+		help='Number of parallel workers, one emulator and Appium server each (default: 1)'
+	)
+	parser.add_argument(
+		'--profile',
+		type=str,
+		metavar='FILE',
+		help='Run under cProfile and write stats to FILE'
 	)
 	return parser.parse_args()
 
@@ -49,33 +58,29 @@ def load_trips_from_json(file_path):
 	except FileNotFoundError:
 		raise ValueError(f"File not found: {file_path}")
 
-def process_trip(client: WaymoClient, pickup: str, dropoff: str) -> Dict:
-	"""Process a single trip and return results"""
-	try:
-		trip_info = client.get_trip_info(pickup=pickup, dropoff=dropoff)
+def to_result_dict(result: TripResult) -> Dict:
+	"""Convert a TripResult into the result dict printed by this demo"""
+	if result.success:
 		return {
 			"success": True,
-			"results": trip_info
-		}
-	except Exception as e:
-		return {
-			"success": False,
-			"error": str(e)
+			"results": result.trip_info
 		}
-
-def process_trips(trips: List[Dict[str, str]], max_workers: int = 1) -> List[Dict]:
-	"""Process trips sequentially using a single client"""
-	results = []
-	with WaymoClient() as client:
-		for trip in trips:
-			result = process_trip(
-				client=client,
-				pickup=trip["pickup"],
-				dropoff=trip["dropoff"]
-			)
-			results.append(result)
-	return results
-
+	return {
+		"success": False,
+		"error": result.error
+	}
+
+def process_trips(trips: List[Dict[str, str]], max_workers: int = 1) -> Iterator[Dict]:
+	"""Yield trip results as they complete, from a single client (reusing shared dropoffs) or a device pool"""
+	if max_workers <= 1:
+		with WaymoClient() as client:
+			for result in client.iter_trip_info(trips):
+				yield to_result_dict(result)
+		return
+
+	with WaymoClientPool(default_devices(max_workers)) as pool:
+		for result in pool.iter_trip_info(trips):
+			yield to_result_dict(result)
 
 def print_trip_result(result: Dict):
 	"""Print formatted trip result"""
@@ -83,31 +88,42 @@ def print_trip_result(result: Dict):
 	if result['success']:
 		trip_info = result['results']
 
-		print(f"City: {trip_info['city']}")
-		print(f"Price: {trip_info['price']['currency']} {trip_info['price']['value']}")
-		print(f"Trip Duration: {trip_info['duration']}")
+		current = trip_info.current_datetime.value
+		pickup = trip_info.pickup.time.value
+		dropoff = trip_info.dropoff.time.value
+
+		print(f"City: {trip_info.city}")
+		print(f"Price: {trip_info.price.currency} {trip_info.price.value}")
+		print(f"Trip Duration: {trip_info.duration}")
 		print("Current Time:")
-		print(f"  Time: {trip_info['current_datetime']['value']}")
-		print(f"  Date: {trip_info['current_datetime']['date']}")
-		print(f"  Timezone: {trip_info['current_datetime']['time_zone']}")
+		print(f"  Time: {current:%H:%M}")
+		print(f"  Date: {current:%m/%d/%Y}")
+		print(f"  Timezone: {current:%Z}")
 
 		print("Pickup:")
-		print(f"  Address: {trip_info['pickup']['location']['address']}")
-		print(f"  City: {trip_info['pickup']['location']['city']}")
-		print(f"  Time: {trip_info['pickup']['pickup_time']}")
-		print(f"  Wait Time: {trip_info['pickup']['wait_time']} minutes")
-		print(f"  Date: {trip_info['pickup']['date']}")
-		print(f"  Timezone: {trip_info['pickup']['time_zone']}")
+		print(f"  Address: {trip_info.pickup.location.address}")
+		print(f"  City: {trip_info.pickup.location.city}")
+		print(f"  Time: {pickup:%H:%M}")
+		print(f"  Wait Time: {trip_info.pickup.wait_time} minutes")
+		print(f"  Date: {pickup:%m/%d/%Y}")
+		print(f"  Timezone: {pickup:%Z}")
 
 		print("Dropoff:")
-		print(f"  Address: {trip_info['dropoff']['location']['address']}")
-		print(f"  City: {trip_info['dropoff']['location']['city']}")
-		print(f"  Time: {trip_info['dropoff']['dropoff_time']}")
-		print(f"  Date: {trip_info['dropoff']['date']}")
-		print(f"  Timezone: {trip_info['dropoff']['time_zone']}")
+		print(f"  Address: {trip_info.dropoff.location.address}")
+		print(f"  City: {trip_info.dropoff.location.city}")
+		print(f"  Time: {dropoff:%H:%M}")
+		print(f"  Date: {dropoff:%m/%d/%Y}")
+		print(f"  Timezone: {dropoff:%Z}")
 	else:
 			print(f"Error: {result['error']}")
 
+def print_step_timings():
+	"""Print p50/p95 latency of each pipeline step"""
+	print("\nStep timings (seconds):")
+	for row in metrics.snapshot():
+		device = f" [{row['device']}]" if row['device'] else ""
+		print(f"  {row['step']}{device}: n={row['count']} p50={row['p50']:.2f} p95={row['p95']:.2f}")
+
 def main():
 	log_dir = root / "logs"
 	log_file = log_dir / "main.log"
@@ -120,13 +136,15 @@ def main():
 		else:  # Handle trips from JSON file
 			trips = load_trips_from_json(args.trips)
 		
-		results = process_trips(trips, args.workers)
-
 		print("\nResults:")
-		for result in results:
-			print_trip_result(result)
-		successful = sum(1 for r in results if r['success'])
-		print(f"\nSummary: {successful}/{len(results)} trips completed successfully")
+		total = successful = 0
+		with profile(args.profile) if args.profile else nullcontext():
+			for result in process_trips(trips, args.workers):
+				print_trip_result(result)
+				total += 1
+				successful += result['success']
+		print(f"\nSummary: {successful}/{total} trips completed successfully")
+		print_step_timings()
 
 	except WaymoClientError as e:
 		print(f"Waymo Client Error: {str(e)}")
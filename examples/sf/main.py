@@ -1,7 +1,5 @@
 import sys
 import time
-import csv
-import random
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
@@ -10,8 +8,15 @@ root = Path(__file__).parent.parent.parent
 sys.path.append(str(root))
 
 from src.waymo_api.core.client import WaymoClient
+from src.waymo_api.core.jobs import BatchJob
 from src.waymo_api.core.exceptions import WaymoClientError
 from src.waymo_api.utils.logger import setup_logger
+from src.waymo_api.utils.records import flatten_trip_info
+from src.waymo_api.utils.metrics import metrics
+from src.waymo_api.storage.sinks import BackgroundWriter, CSVSink
+from src.waymo_api.storage.price_store import PriceStore
+from src.waymo_api.locations.gazetteer import Gazetteer
+from src.waymo_api.locations.coverage import CoveragePlanner
 
 def load_locations(csv_path):
 	"""Load locations from CSV file"""
@@ -24,101 +29,48 @@ def load_locations(csv_path):
 	}, axis=1).tolist()
 	return locations
 
-def create_random_location_pairs(locations, num_samples):
-	"""Create random pairs of locations"""
-	location_pairs = []
-	for _ in range(num_samples):
-		pickup, dropoff = random.sample(locations, 2)
-		location_pairs.append((pickup, dropoff))
-	return location_pairs
-
-def get_trip_estimates(client, pickup, dropoff):
-	"""Get trip information using Waymo API"""
-	try:
-		trip_info = client.get_trip_info(
-			pickup=pickup['name'],
-			dropoff=dropoff['name']
-		)
-
-		return {
-			# Request metadata
-			'request_timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-			
-			# Pickup location details
-			'pickup_name': pickup['name'],
-			'pickup_neighborhood': pickup['neighborhood'],
-			'pickup_latitude': pickup['latitude'],
-			'pickup_longitude': pickup['longitude'],
-			'pickup_time': trip_info['pickup']['pickup_time'],
-			'pickup_date': trip_info['pickup']['date'],
-			'pickup_wait_time_mins': trip_info['pickup']['wait_time'],
-			
-			# Dropoff location details
-			'dropoff_name': dropoff['name'],
-			'dropoff_neighborhood': dropoff['neighborhood'],
-			'dropoff_latitude': dropoff['latitude'],
-			'dropoff_longitude': dropoff['longitude'],
-			'dropoff_time': trip_info['dropoff']['dropoff_time'],
-			'dropoff_date': trip_info['dropoff']['date'],
-			
-			# Trip details
-			'trip_duration_mins': trip_info['duration'],
-			'price_usd': trip_info['price']['value'],
-			'price_currency': trip_info['price']['currency'],
-			
-			# Additional context
-			'current_time': trip_info['current_datetime']['value'],
-			'current_date': trip_info['current_datetime']['date'],
-			'timezone': trip_info['current_datetime']['time_zone'],
-			'city': trip_info['city']
-		}
-
-	except Exception as e:
-		print(f"Error getting trip data: {str(e)}")
-		return None
-
-def save_to_csv(data, output_file):
-	"""Append trip data to CSV file"""
-	file_exists = Path(output_file).exists()
-
-	if file_exists:
-		with open(output_file, 'r') as f:
-				headers = next(csv.reader(f))
-	else:
-		# Use explicit headers for new file
-		headers = [
-			'request_timestamp',
-			'pickup_name','pickup_neighborhood','pickup_latitude','pickup_longitude',
-			'pickup_time','pickup_date','pickup_wait_time_mins',
-			'dropoff_name','dropoff_neighborhood','dropoff_latitude','dropoff_longitude',
-			'dropoff_time','dropoff_date',
-			'trip_duration_mins','price_usd','price_currency',
-			'current_time','current_date','timezone','city'
-		]
-
-	with open(output_file, 'a', newline='') as f:
-		writer = csv.DictWriter(f, fieldnames=headers)
-		if not file_exists:
-			writer.writeheader()
-		writer.writerow(data)
-
-def save_error_to_csv(error_data, error_file):
-	"""Save error data to a separate CSV file"""
-	file_exists = Path(error_file).exists()
-	
-	headers = [
-		'timestamp',
-		'pickup_name',
-		'pickup_neighborhood',
-		'dropoff_name',
-		'dropoff_neighborhood',
-	]
-	
-	with open(error_file, 'a', newline='') as f:
-		writer = csv.DictWriter(f, fieldnames=headers)
-		if not file_exists:
-			writer.writeheader()
-		writer.writerow(error_data)
+ESTIMATE_FIELDS = [
+	'request_timestamp',
+	'pickup_name','pickup_neighborhood','pickup_latitude','pickup_longitude',
+	'pickup_time','pickup_date','pickup_wait_time_mins',
+	'dropoff_name','dropoff_neighborhood','dropoff_latitude','dropoff_longitude',
+	'dropoff_time','dropoff_date',
+	'trip_duration_mins','price_usd','price_currency',
+	'current_time','current_date','timezone','city'
+]
+
+ERROR_FIELDS = [
+	'timestamp',
+	'pickup_name',
+	'pickup_neighborhood',
+	'dropoff_name',
+	'dropoff_neighborhood',
+]
+
+def get_trip_estimates(pickup, dropoff, trip_info):
+	"""Combine location metadata with the trip info returned by the Waymo API"""
+	return {
+		# Request metadata
+		'request_timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+		**flatten_trip_info(trip_info),
+
+		# Location details
+		'pickup_neighborhood': pickup['neighborhood'],
+		'pickup_latitude': pickup['latitude'],
+		'pickup_longitude': pickup['longitude'],
+		'dropoff_neighborhood': dropoff['neighborhood'],
+		'dropoff_latitude': dropoff['latitude'],
+		'dropoff_longitude': dropoff['longitude'],
+	}
+
+def get_error_data(pickup, dropoff):
+	return {
+		'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+		'pickup_name': pickup['name'],
+		'pickup_neighborhood': pickup['neighborhood'],
+		'dropoff_name': dropoff['name'],
+		'dropoff_neighborhood': dropoff['neighborhood'],
+	}
 
 def main():
 	log_dir = root / "logs"
@@ -130,49 +82,65 @@ def main():
 	outputs_dir.mkdir(exist_ok=True)
 	output_csv = outputs_dir / 'sf_waymo_estimates.csv'
 	error_csv = outputs_dir / 'sf_waymo_errors.csv'
+	metrics_json = outputs_dir / 'sf_waymo_metrics.json'
+	price_db = outputs_dir / 'sf_waymo_prices.sqlite'
+	selections_json = outputs_dir / 'sf_waymo_selections.json'
+	
+	job_journal = outputs_dir / 'sf_waymo_job.sqlite'
 	
 	locations = load_locations(input_csv)
-	location_pairs = create_random_location_pairs(locations, 2000)
-	print(f"Created {len(location_pairs)} location pairs")
+	locations_by_name = {location['name']: location for location in locations}
+	gazetteer = Gazetteer.from_csv(input_csv, city="SF")
+
+	# The job journal remembers planned pairs and their status, so a rerun resumes where the last one stopped
+	job = BatchJob(job_journal, max_attempts=3)
+	if job.is_planned():
+		print(f"Resuming job from {job_journal}: {job.journal.counts()}")
+	else:
+		# Distinct pairs spread over neighborhood pairs and distance bands, grouped by dropoff
+		planner = CoveragePlanner(list(gazetteer.places.values()))
+		location_pairs = planner.plan(2000)
+		coverage = planner.report(location_pairs)
+		print(f"Planned {len(location_pairs)} location pairs covering {coverage.neighborhood_pair_coverage:.1%} of neighborhood pairs")
+		print(f"Pairs per distance band: {coverage.pairs_per_band}")
+		job.plan([pair.as_trip() for pair in location_pairs])
+
+	# Per-step latency snapshot, refreshed every minute
+	stop_metrics = metrics.write_snapshots(metrics_json, interval=60)
+
+	# Results are written in batches from background threads so file I/O never blocks the device
+	estimates_writer = BackgroundWriter(CSVSink(output_csv, ESTIMATE_FIELDS))
+	errors_writer = BackgroundWriter(CSVSink(error_csv, ERROR_FIELDS))
+	store_writer = BackgroundWriter(PriceStore(price_db))
 
 	# Initialize Waymo client
-	with WaymoClient() as client:
-		for pickup, dropoff in location_pairs:
-			try:
-				print(f"\nGetting trip info for: {pickup['name']} → {dropoff['name']}")
-
-				# Get trip estimates
-				trip_estimates = get_trip_estimates(client, pickup, dropoff)
-
-				# Save data if successful
-				if trip_estimates:
-					save_to_csv(trip_estimates, output_csv)
-					print(f"Trip estimates data saved successfully: {pickup['name']} to {dropoff['name']}")
+	try:
+		with WaymoClient(gazetteer=gazetteer) as client:
+			for result in job.run(client):
+				pickup = locations_by_name[result.pickup]
+				dropoff = locations_by_name[result.dropoff]
+
+				if result.success:
+					trip_estimates = get_trip_estimates(pickup, dropoff, result.trip_info)
+					estimates_writer.write(trip_estimates)
+					store_writer.write(trip_estimates)
+					print(f"Trip estimates: {pickup['name']} to {dropoff['name']}")
 					print(f"Price: ${trip_estimates['price_usd']:.2f}, Duration: {trip_estimates['trip_duration_mins']} mins")
 				else:
-					error_data = {
-						'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-						'pickup_name': pickup['name'],
-						'pickup_neighborhood': pickup['neighborhood'],
-						'dropoff_name': dropoff['name'],
-						'dropoff_neighborhood': dropoff['neighborhood'],
-					}
-					save_error_to_csv(error_data, error_csv)
-					print("Failed to get trip estimate data - skipping this pair")
-					
-			except KeyboardInterrupt:
-				print("\nStopping the script...")
-				break
-			except Exception as e:
-				error_data = {
-					'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-					'pickup_name': pickup['name'],
-					'pickup_neighborhood': pickup['neighborhood'],
-					'dropoff_name': dropoff['name'],
-					'dropoff_neighborhood': dropoff['neighborhood'],
-				}
-				save_error_to_csv(error_data, error_csv)
-				print(f"Unexpected error: {str(e)}")
+					errors_writer.write(get_error_data(pickup, dropoff))
+					print(f"Failed to get trip estimate data for {pickup['name']} to {dropoff['name']}: {result.error}")
+
+	except KeyboardInterrupt:
+		print("\nStopping the script...")
+	except WaymoClientError as e:
+		print(f"Waymo Client Error: {str(e)}")
+	finally:
+		estimates_writer.close()
+		errors_writer.close()
+		store_writer.close()
+		gazetteer.save_selections(selections_json)
+		job.journal.close()
+		stop_metrics.set()
 
 if __name__ == "__main__":
 	main()
\ No newline at end of file
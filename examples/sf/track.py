@@ -0,0 +1,67 @@
+import sys
+import argparse
+from pathlib import Path
+
+root = Path(__file__).parent.parent.parent
+sys.path.append(str(root))
+
+from src.waymo_api.core.client import WaymoClient
+from src.waymo_api.core.pool import WaymoClientPool, default_devices
+from src.waymo_api.core.freshness import FreshnessScheduler
+from src.waymo_api.core.exceptions import WaymoClientError
+from src.waymo_api.utils.logger import setup_logger
+from src.waymo_api.storage.sinks import BackgroundWriter
+from src.waymo_api.storage.price_store import PriceStore
+from src.waymo_api.locations.gazetteer import Gazetteer
+from src.waymo_api.locations.coverage import CoveragePlanner
+from main import get_trip_estimates
+
+def parse_arguments():
+	parser = argparse.ArgumentParser(description='Track prices for a fixed set of SF pairs through the day')
+	parser.add_argument('--pairs', type=int, default=100, help='Number of tracked pairs (default: 100)')
+	parser.add_argument('--interval', type=float, default=60, help='Target minutes between observations of a pair (default: 60)')
+	parser.add_argument('--hours', type=float, help='Stop after this many hours (default: run until interrupted)')
+	parser.add_argument('--workers', type=int, default=1, help='Number of emulators, one Appium server each (default: 1)')
+	parser.add_argument('--seed', type=int, default=0, help='Planner seed, keep it fixed to track the same pairs across runs')
+	return parser.parse_args()
+
+def main():
+	args = parse_arguments()
+	setup_logger(log_level="INFO", log_file=str(root / "logs" / "sf_track.log"))
+
+	input_csv = root / "examples/sf/data/sf_locations.csv"
+	outputs_dir = root / "examples/sf/output"
+	outputs_dir.mkdir(exist_ok=True)
+
+	gazetteer = Gazetteer.from_csv(input_csv, city="SF")
+	locations_by_name = {
+		place.name: {'name': place.name, 'neighborhood': place.neighborhood, 'latitude': place.latitude, 'longitude': place.longitude}
+		for place in gazetteer.places.values()
+	}
+	pairs = CoveragePlanner(list(gazetteer.places.values()), seed=args.seed).plan(args.pairs)
+	scheduler = FreshnessScheduler([pair.as_trip() for pair in pairs], default_interval=args.interval * 60, batch_size=5 * args.workers)
+	store_writer = BackgroundWriter(PriceStore(outputs_dir / 'sf_waymo_prices.sqlite'))
+
+	if args.workers > 1:
+		client_context = WaymoClientPool(default_devices(args.workers))
+	else:
+		client_context = WaymoClient(gazetteer=gazetteer)
+	try:
+		with client_context as client:
+			duration = args.hours * 3600 if args.hours else None
+			for result in scheduler.run(client, duration):
+				if result.success:
+					pickup, dropoff = locations_by_name[result.pickup], locations_by_name[result.dropoff]
+					store_writer.write(get_trip_estimates(pickup, dropoff, result.trip_info))
+				else:
+					print(f"Failed {result.pickup} to {result.dropoff}: {result.error}")
+	except KeyboardInterrupt:
+		print("\nStopping the script...")
+	except WaymoClientError as e:
+		print(f"Waymo Client Error: {str(e)}")
+	finally:
+		store_writer.close()
+		print(scheduler.report().describe())
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,234 @@
+"""`waymo-api` command line entry point.
+
+Only the standard library is imported up front: quotes are answered by a
+background daemon holding warm device sessions over a Unix socket, so a one-off
+quote skips both the Appium/Selenium imports and session startup. The daemon is
+started on first use and exits after being idle.
+"""
+import os
+import sys
+import json
+import time
+import fcntl
+import socket
+import argparse
+import subprocess
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any
+
+DEFAULT_SOCKET_PATH = Path.home() / ".cache" / "waymo_api" / "daemon.sock"
+DAEMON_LOG_PATH = DEFAULT_SOCKET_PATH.with_suffix(".log")
+
+class DaemonUnavailable(Exception):
+	pass
+
+def request_daemon(payload: Dict[str, Any], socket_path: Path = DEFAULT_SOCKET_PATH, timeout: Optional[float] = None) -> Dict[str, Any]:
+	"""Send one JSON request to the daemon and return its JSON response"""
+	sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	sock.settimeout(timeout)
+	try:
+		sock.connect(str(socket_path))
+	except (FileNotFoundError, ConnectionRefusedError) as e:
+		sock.close()
+		raise DaemonUnavailable(str(e))
+	with sock, sock.makefile('rwb') as stream:
+		stream.write(json.dumps({**payload, "pid": os.getpid()}).encode() + b"\n")
+		stream.flush()
+		line = stream.readline()
+	if not line:
+		raise DaemonUnavailable("Daemon closed the connection")
+	return json.loads(line)
+
+@contextmanager
+def spawn_lock(socket_path: Path):
+	"""Exclusive lock next to the socket, so concurrent invocations start a single daemon"""
+	socket_path.parent.mkdir(parents=True, exist_ok=True)
+	with open(f"{socket_path}.lock", 'a') as lock:
+		fcntl.flock(lock, fcntl.LOCK_EX)
+		try:
+			yield
+		finally:
+			fcntl.flock(lock, fcntl.LOCK_UN)
+
+def spawn_daemon(args: argparse.Namespace) -> None:
+	"""Start the daemon in its own session and wait until its socket answers.
+
+	Holds the spawn lock throughout, and returns without starting another
+	daemon when one started while this call waited for the lock.
+	"""
+	with spawn_lock(Path(args.socket)):
+		try:
+			request_daemon({"op": "status"}, Path(args.socket), timeout=5)
+			return
+		except (DaemonUnavailable, OSError):
+			pass
+		_start_daemon(args)
+
+def _start_daemon(args: argparse.Namespace) -> None:
+	package = __package__ or 'waymo_api'
+	base = Path(__file__).resolve().parents[package.count('.') + 1]
+	env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(base), os.environ.get("PYTHONPATH")]))}
+	command = [sys.executable, '-m', f"{package}.cli", 'daemon', 'start', '--foreground', *_daemon_options(args)]
+	DAEMON_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+	with open(DAEMON_LOG_PATH, 'ab') as log:
+		subprocess.Popen(command, env=env, stdin=subprocess.DEVNULL, stdout=log, stderr=log, start_new_session=True)
+
+	deadline = time.monotonic() + args.start_timeout
+	while time.monotonic() < deadline:
+		try:
+			request_daemon({"op": "status"}, Path(args.socket), timeout=5)
+			return
+		except (DaemonUnavailable, OSError):
+			time.sleep(0.1)
+	raise DaemonUnavailable(f"Daemon did not start within {args.start_timeout}s, see {DAEMON_LOG_PATH}")
+
+def _daemon_options(args: argparse.Namespace) -> List[str]:
+	options = ['--socket', args.socket, '--devices', str(args.devices), '--idle-timeout', str(args.idle_timeout)]
+	for url in args.server_url or []:
+		options += ['--server-url', url]
+	return options
+
+def ask(args: argparse.Namespace, payload: Dict[str, Any]) -> Dict[str, Any]:
+	"""Send a request, starting the daemon first if it is not running"""
+	try:
+		return request_daemon(payload, Path(args.socket))
+	except DaemonUnavailable:
+		if args.no_autostart:
+			raise
+	spawn_daemon(args)
+	return request_daemon(payload, Path(args.socket))
+
+def format_trip(trip_info: Dict[str, Any]) -> str:
+	return (
+		f"{trip_info['pickup']['location']['address']} -> {trip_info['dropoff']['location']['address']}: "
+		f"${trip_info['price']['value']:.2f}, {trip_info['duration']} mins, "
+		f"pickup in {trip_info['pickup']['wait_time']} mins"
+	)
+
+def cmd_quote(args: argparse.Namespace) -> int:
+	response = ask(args, {"op": "quote", "pickup": args.pickup, "dropoff": args.dropoff, "timeout": args.timeout})
+	if not response["ok"]:
+		print(f"Error: {response['error']}", file=sys.stderr)
+		return 1
+	print(json.dumps(response["trip_info"]) if args.json else format_trip(response["trip_info"]))
+	return 0
+
+def cmd_quotes(args: argparse.Namespace) -> int:
+	"""Quote a JSON array of {"pickup", "dropoff"} trips; prints one JSON result per line"""
+	source = sys.stdin if args.file == '-' else open(args.file, 'r')
+	with source:
+		trips = json.load(source)
+	response = ask(args, {"op": "quotes", "trips": trips, "timeout": args.timeout})
+	if not response["ok"]:
+		print(f"Error: {response['error']}", file=sys.stderr)
+		return 1
+	for result in response["results"]:
+		print(json.dumps(result))
+	return 0 if all(result["error"] is None for result in response["results"]) else 1
+
+def cmd_daemon(args: argparse.Namespace) -> int:
+	if args.action == 'start':
+		if args.foreground:
+			return run_daemon(args)
+		spawn_daemon(args)
+		print(f"Daemon running on {args.socket}")
+		return 0
+	try:
+		response = request_daemon({"op": "status" if args.action == 'status' else "shutdown"}, Path(args.socket), timeout=10)
+	except DaemonUnavailable:
+		print("Daemon is not running")
+		return 1 if args.action == 'status' else 0
+	print(json.dumps(response, indent=2) if args.action == 'status' else "Daemon stopping")
+	return 0
+
+def run_daemon(args: argparse.Namespace) -> int:
+	from .utils.logger import setup_logger
+	from .core.pool import DeviceConfig, default_devices
+	from .service.daemon import QuoteDaemon
+	from .core.exceptions import WaymoClientError
+
+	setup_logger(log_level="INFO")
+	if args.server_url:
+		devices = [DeviceConfig(f"emulator-{5554 + 2 * i}", url, 8200 + i) for i, url in enumerate(args.server_url)]
+	else:
+		devices = default_devices(args.devices)
+	try:
+		QuoteDaemon(devices, args.socket, idle_timeout=args.idle_timeout).serve_forever()
+	except WaymoClientError as e:
+		print(f"Error: {str(e)}", file=sys.stderr)
+		return 1
+	return 0
+
+def cmd_serve(args: argparse.Namespace) -> int:
+	from .service.server import main as serve_main
+	serve_main(args.server_args)
+	return 0
+
+def cmd_coordinator(args: argparse.Namespace) -> int:
+	from .service.coordinator import main as coordinator_main
+	coordinator_main(args.server_args)
+	return 0
+
+def cmd_worker(args: argparse.Namespace) -> int:
+	from .service.worker import main as worker_main
+	worker_main(args.server_args)
+	return 0
+
+def build_parser() -> argparse.ArgumentParser:
+	parser = argparse.ArgumentParser(prog='waymo-api', description='Waymo ride quotes from local devices')
+	subparsers = parser.add_subparsers(dest='command', required=True)
+
+	daemon_options = argparse.ArgumentParser(add_help=False)
+	daemon_options.add_argument('--socket', default=str(DEFAULT_SOCKET_PATH), help='Daemon Unix socket path')
+	daemon_options.add_argument('--devices', type=int, default=1, help='Local emulators the daemon drives (see default_devices)')
+	daemon_options.add_argument('--server-url', action='append', help='Appium server URL, one device each (repeatable)')
+	daemon_options.add_argument('--idle-timeout', type=float, default=1800.0, help='Seconds without requests before the daemon exits')
+	daemon_options.add_argument('--start-timeout', type=float, default=30.0)
+	daemon_options.add_argument('--no-autostart', action='store_true', help='Fail instead of starting the daemon')
+
+	quote = subparsers.add_parser('quote', parents=[daemon_options], help='Quote a single trip')
+	quote.add_argument('pickup')
+	quote.add_argument('dropoff')
+	quote.add_argument('--timeout', type=float, help='Seconds to wait for the quote')
+	quote.add_argument('--json', action='store_true', help='Print the full trip info as JSON')
+	quote.set_defaults(handler=cmd_quote)
+
+	quotes = subparsers.add_parser('quotes', parents=[daemon_options], help='Quote trips from a JSON file (- for stdin)')
+	quotes.add_argument('file')
+	quotes.add_argument('--timeout', type=float)
+	quotes.set_defaults(handler=cmd_quotes)
+
+	daemon = subparsers.add_parser('daemon', parents=[daemon_options], help='Manage the background daemon')
+	daemon.add_argument('action', choices=['start', 'stop', 'status'])
+	daemon.add_argument('--foreground', action='store_true', help='Run the daemon in this process')
+	daemon.set_defaults(handler=cmd_daemon)
+
+	serve = subparsers.add_parser('serve', add_help=False, help='Run the HTTP quote service (options as in service.server)')
+	serve.set_defaults(handler=cmd_serve)
+
+	coordinator = subparsers.add_parser('coordinator', add_help=False, help='Lease a crawl job to remote workers (options as in service.coordinator)')
+	coordinator.set_defaults(handler=cmd_coordinator)
+
+	worker = subparsers.add_parser('worker', add_help=False, help='Run crawl work from a coordinator on local devices (options as in service.worker)')
+	worker.set_defaults(handler=cmd_worker)
+	return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+	parser = build_parser()
+	args, server_args = parser.parse_known_args(argv)
+	if args.command in ('serve', 'coordinator', 'worker'):
+		# Options of these commands are parsed by the module they forward to
+		args.server_args = server_args
+	elif server_args:
+		parser.error(f"unrecognized arguments: {' '.join(server_args)}")
+	try:
+		return args.handler(args)
+	except DaemonUnavailable as e:
+		print(f"Daemon unavailable: {str(e)}", file=sys.stderr)
+		return 1
+	except KeyboardInterrupt:
+		return 130
+
+if __name__ == '__main__':
+	sys.exit(main())
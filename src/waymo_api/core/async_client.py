@@ -0,0 +1,345 @@
+import time
+import asyncio
+from typing import Optional, List, Dict, Tuple, AsyncIterator
+
+from .driver import AppiumDriverManager
+from .pool import DeviceConfig
+from .models import TripInfo, TripResult
+from .exceptions import WaymoClientError, SessionError
+from .provisioning import ProvisioningCache, get_server_version
+from ..interactions.actions import (
+	BACK_BUTTON, SEARCH_BOX, DROPOFF_INPUT, PICKUP_INPUT, FIRST_RESULT,
+	CONFIRM_BUTTON, PICKUP_WAYPOINT, FARE_ESTIMATE
+)
+from ..interactions.extractor import TripInfoExtractor, parse_trip_screen
+from ..interactions.screens import Screen, RecoveryStep, RetryBudget, KEYCODE_BACK, classify_screen, recovery_step
+from ..interactions.waits import Locator
+
+from ..utils.metrics import metrics
+from ..utils.logger import get_logger
+logger = get_logger(__name__)
+
+ELEMENT_KEY = 'element-6066-11e4-a52e-4f735466cecf'
+
+def _require_aiohttp():
+	try:
+		import aiohttp
+		return aiohttp
+	except ImportError:
+		raise WaymoClientError("AsyncWaymoClient requires aiohttp: install with `uv sync --extra async`")
+
+class AsyncAppiumSession:
+	"""One Appium session driven over the W3C WebDriver HTTP protocol with a shared aiohttp session"""
+
+	def __init__(
+		self,
+		http,
+		device: DeviceConfig,
+		timeout: float,
+		poll_interval: float = 0.1,
+		provisioning_cache: Optional[ProvisioningCache] = None
+	):
+		self.http = http
+		self.device = device
+		self.timeout = timeout
+		self.poll_interval = poll_interval
+		self.provisioning_cache = provisioning_cache
+		self.session_id: Optional[str] = None
+		self.app_package: Optional[str] = None
+
+	async def _request(self, method: str, path: str, payload: Optional[Dict] = None):
+		url = f"{self.device.server_url}{path}"
+		async with self.http.request(method, url, json=payload) as response:
+			body = await response.json(content_type=None)
+		value = body.get('value') if isinstance(body, dict) else None
+		if response.status >= 400:
+			error = value.get('error') if isinstance(value, dict) else response.status
+			message = value.get('message') if isinstance(value, dict) else body
+			raise WaymoClientError(f"Appium {error}: {message}")
+		return value
+
+	async def _command(self, method: str, path: str, payload: Optional[Dict] = None):
+		return await self._request(method, f"/session/{self.session_id}{path}", payload)
+
+	async def start(self) -> None:
+		"""Create the session, with the fast capabilities if the provisioning cache knows the device"""
+		with metrics.span("driver_connect", self.device.device_name):
+			manager = AppiumDriverManager(self.device.device_name, self.timeout, self.device.server_url, self.device.system_port)
+			self.app_package = manager.app_package
+			server_version = None
+			fast_start = False
+			if self.provisioning_cache is not None:
+				server_version = await asyncio.to_thread(get_server_version, self.device.server_url)
+				fast_start = self.provisioning_cache.is_known_good(self.device.device_name, self.device.server_url, server_version)
+
+			try:
+				await self._start_session(manager, fast_start)
+			except Exception as e:
+				if not fast_start:
+					raise
+				logger.warning(f"Fast start failed on {self.device.device_name}, falling back to full initialization: {str(e)}")
+				self.provisioning_cache.invalidate(self.device.device_name, self.device.server_url)
+				await self.quit()
+				await self._start_session(manager, fast_start=False)
+
+			if self.provisioning_cache is not None:
+				self.provisioning_cache.record_success(self.device.device_name, self.device.server_url, server_version=server_version)
+
+	async def _start_session(self, manager: AppiumDriverManager, fast_start: bool) -> None:
+		value = await self._request('POST', '/session', manager._setup_driver(fast_start).to_w3c())
+		self.session_id = value['sessionId']
+		if await self.execute('mobile: getCurrentActivity') != manager.app_activity:
+			await self.execute('mobile: activateApp', {'appId': manager.app_package})
+
+	async def quit(self) -> None:
+		if self.session_id:
+			try:
+				await self._request('DELETE', f"/session/{self.session_id}")
+			finally:
+				self.session_id = None
+
+	async def execute(self, script: str, args: Optional[Dict] = None):
+		return await self._command('POST', '/execute/sync', {'script': script, 'args': [args or {}]})
+
+	async def find_all(self, locator: Locator) -> List[str]:
+		by, value = locator
+		elements = await self._command('POST', '/elements', {'using': by, 'value': value})
+		return [element[ELEMENT_KEY] for element in elements]
+
+	async def wait_for_any(self, locators: Dict[str, Locator], timeout: Optional[float] = None) -> Tuple[str, str]:
+		"""Poll until one of the locators matches and return (name, element id)"""
+		deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+		while True:
+			for name, locator in locators.items():
+				elements = await self.find_all(locator)
+				if elements:
+					return name, elements[0]
+			if time.monotonic() >= deadline:
+				raise asyncio.TimeoutError(f"None of {list(locators)} appeared")
+			await asyncio.sleep(self.poll_interval)
+
+	async def wait_for(self, locator: Locator, timeout: Optional[float] = None) -> str:
+		_, element = await self.wait_for_any({"element": locator}, timeout)
+		return element
+
+	async def click(self, element: str) -> None:
+		await self._command('POST', f"/element/{element}/click", {})
+
+	async def clear(self, element: str) -> None:
+		await self._command('POST', f"/element/{element}/clear", {})
+
+	async def send_keys(self, element: str, text: str) -> None:
+		await self._command('POST', f"/element/{element}/value", {'text': text, 'value': list(text)})
+
+	async def set_value(self, element: str, text: str) -> None:
+		"""Replace the field's text in one call instead of typing it key by key"""
+		await self.execute('mobile: replaceElementValue', {'elementId': element, 'text': text})
+
+	async def page_source(self) -> str:
+		return await self._command('GET', '/source')
+
+	async def detect_screen(self) -> Screen:
+		with metrics.span("detect_screen", self.device.device_name):
+			if await self.execute('mobile: getCurrentPackage') != self.app_package:
+				return Screen.OUTSIDE_APP
+			return classify_screen(await self.page_source())
+
+	async def go_home(self, max_steps: int = 4) -> Screen:
+		"""Walk the app back to the home screen like ScreenNavigator.go_home. Returns the screen it was found on"""
+		with metrics.span("recover_home", self.device.device_name):
+			found = screen = await self.detect_screen()
+			for step in range(max_steps):
+				action = recovery_step(screen, step)
+				if action is None:
+					if step:
+						logger.info(f"Recovered to home screen from {found.value} in {step} step(s)")
+					return found
+				if action == RecoveryStep.ACTIVATE_APP:
+					logger.info(f"On {screen.value}, activating the app")
+					await self.execute('mobile: activateApp', {'appId': self.app_package})
+				else:
+					logger.info(f"On {screen.value}, pressing back")
+					await self.execute('mobile: pressKey', {'keycode': KEYCODE_BACK})
+				screen = await self.detect_screen()
+			if screen == Screen.HOME:
+				return found
+			raise WaymoClientError(f"Still on {screen.value} after {max_steps} recovery steps")
+
+class AsyncWaymoClient:
+	"""Asyncio client that drives one or more devices from a single event loop.
+
+	Sessions are created concurrently on enter and handed out from a queue, so
+	`get_trip_info` calls run on whichever device is free. Each trip is bounded by
+	`trip_timeout`. After a failed or cancelled trip the device is recovered as
+	WaymoClient does: screen detection walks it home, and the session is restarted
+	as a last resort within a per-device restart budget. A device whose budget is
+	used up is retired.
+	"""
+
+	def __init__(
+		self,
+		devices: Optional[List[DeviceConfig]] = None,
+		timeout: float = 5,
+		trip_timeout: float = 60,
+		poll_interval: float = 0.1,
+		max_connections: int = 32,
+		warm_start: bool = True,
+		max_recovery_steps: int = 4,
+		max_session_restarts: int = 3,
+		restart_window: float = 600.0
+	):
+		self.devices = devices or [DeviceConfig('emulator-5554')]
+		self.timeout = timeout
+		self.trip_timeout = trip_timeout
+		self.poll_interval = poll_interval
+		self.max_connections = max_connections
+		self.provisioning_cache = ProvisioningCache() if warm_start else None
+		self.max_recovery_steps = max_recovery_steps
+		self.max_session_restarts = max_session_restarts
+		self.restart_window = restart_window
+		self._restart_budgets: Dict[AsyncAppiumSession, RetryBudget] = {}
+		self.trip_info_extractor = TripInfoExtractor(None, None)
+		self._http = None
+		self._sessions: List[AsyncAppiumSession] = []
+		self._available: Optional[asyncio.Queue] = None
+
+	async def __aenter__(self):
+		aiohttp = _require_aiohttp()
+		self._http = aiohttp.ClientSession(
+			connector=aiohttp.TCPConnector(limit=self.max_connections),
+			timeout=aiohttp.ClientTimeout(total=self.trip_timeout)
+		)
+		self._available = asyncio.Queue()
+		sessions = [
+			AsyncAppiumSession(self._http, device, self.timeout, self.poll_interval, self.provisioning_cache)
+			for device in self.devices
+		]
+		started = await asyncio.gather(*(session.start() for session in sessions), return_exceptions=True)
+		for session, outcome in zip(sessions, started):
+			if isinstance(outcome, BaseException):
+				logger.error(f"Device {session.device.device_name} failed to start: {str(outcome)}")
+				continue
+			self._sessions.append(session)
+			self._restart_budgets[session] = RetryBudget(self.max_session_restarts, self.restart_window)
+			self._available.put_nowait(session)
+		if not self._sessions:
+			await self._http.close()
+			raise WaymoClientError("No devices could be started")
+		return self
+
+	async def __aexit__(self, exc_type, exc_val, exc_tb):
+		await asyncio.gather(*(session.quit() for session in self._sessions), return_exceptions=True)
+		self._sessions = []
+		await self._http.close()
+
+	async def get_trip_info(self, pickup: str, dropoff: str) -> TripInfo:
+		session = await self._available.get()
+		if session is None:
+			self._available.put_nowait(None) # wake the next waiter too
+			raise SessionError("No devices left")
+		retired = False
+		try:
+			async with asyncio.timeout(self.trip_timeout):
+				return await self._run_trip(session, pickup, dropoff)
+		except BaseException as e:
+			try:
+				await self._recover(session)
+			except SessionError as recovery_error:
+				retired = True
+				await self._retire(session, recovery_error)
+				if not isinstance(e, (asyncio.CancelledError, KeyboardInterrupt)):
+					raise recovery_error
+			if isinstance(e, (asyncio.CancelledError, KeyboardInterrupt)):
+				raise
+			raise WaymoClientError(f"Failed to get trip info: {str(e)}")
+		finally:
+			if not retired:
+				self._available.put_nowait(session)
+
+	async def iter_trip_info(self, trips: List[Dict[str, str]]) -> AsyncIterator[TripResult]:
+		"""Yield trip results as they complete across all devices"""
+		async def run(trip):
+			try:
+				return TripResult(trip["pickup"], trip["dropoff"], trip_info=await self.get_trip_info(trip["pickup"], trip["dropoff"]))
+			except WaymoClientError as e:
+				return TripResult(trip["pickup"], trip["dropoff"], error=str(e))
+
+		tasks = [asyncio.create_task(run(trip)) for trip in trips]
+		try:
+			for next_done in asyncio.as_completed(tasks):
+				yield await next_done
+		finally:
+			for task in tasks:
+				task.cancel()
+			await asyncio.gather(*tasks, return_exceptions=True)
+
+	async def _run_trip(self, session: AsyncAppiumSession, pickup: str, dropoff: str) -> TripInfo:
+		device = session.device.device_name
+		with metrics.span("get_trip_info", device):
+			with metrics.span("enter_dropoff_location", device):
+				await session.click(await session.wait_for(SEARCH_BOX))
+				await session.set_value(await session.wait_for(DROPOFF_INPUT), dropoff)
+				await session.click(await session.wait_for(FIRST_RESULT))
+				await self._handle_multiple_points(session, PICKUP_WAYPOINT)
+
+			with metrics.span("enter_pickup_location", device):
+				await session.click(await session.wait_for(PICKUP_WAYPOINT))
+				await session.set_value(await session.wait_for(PICKUP_INPUT), pickup)
+				await session.click(await session.wait_for(FIRST_RESULT))
+				await self._handle_multiple_points(session, FARE_ESTIMATE)
+
+			with metrics.span("extract_trip_info", device):
+				current_datetime = self.trip_info_extractor.service_area.now()
+				await session.wait_for(FARE_ESTIMATE)
+				fields = parse_trip_screen(await session.page_source())
+				if not fields:
+					raise WaymoClientError("Trip fields missing from page source")
+				trip_info = self.trip_info_extractor._build_trip_info(pickup, dropoff, fields, current_datetime)
+
+			with metrics.span("return_to_home_screen", device):
+				await session.click(await session.wait_for(BACK_BUTTON))
+			return trip_info
+
+	async def _handle_multiple_points(self, session: AsyncAppiumSession, next_screen: Locator) -> None:
+		try:
+			name, element = await session.wait_for_any({"confirm": CONFIRM_BUTTON, "next": next_screen})
+			if name == "confirm":
+				await session.click(element)
+		except asyncio.TimeoutError:
+			pass
+
+	async def _recover(self, session: AsyncAppiumSession) -> None:
+		"""Bring the device back to the home screen after a failed trip, as WaymoClient._recover does.
+
+		Raises SessionError once the device's restart budget is used up or the
+		restart fails.
+		"""
+		device = session.device.device_name
+		try:
+			async with asyncio.timeout(self.timeout * (self.max_recovery_steps + 1)):
+				await session.go_home(self.max_recovery_steps)
+			return
+		except Exception as e:
+			logger.warning(f"Screen recovery failed on {device}: {str(e)}")
+
+		if not self._restart_budgets[session].try_acquire():
+			raise SessionError(f"Session restart budget exhausted on {device}")
+		logger.warning(f"Restarting Appium session on {device}")
+		try:
+			try:
+				await session.quit()
+			except Exception as e:
+				logger.debug(f"Ignoring error while discarding session: {str(e)}")
+			await session.start()
+		except Exception as e:
+			raise SessionError(f"Session restart failed on {device}: {str(e)}")
+
+	async def _retire(self, session: AsyncAppiumSession, error: SessionError) -> None:
+		logger.error(f"Retiring device {session.device.device_name}: {str(error)}")
+		self._sessions.remove(session)
+		try:
+			await session.quit()
+		except Exception as e:
+			logger.debug(f"Ignoring error while discarding session: {str(e)}")
+		if not self._sessions:
+			self._available.put_nowait(None) # fail callers waiting for a device
@@ -0,0 +1,218 @@
+from datetime import datetime
+from typing import Optional, List, Dict, Iterable, Iterator, Union, Sequence
+
+import pytz
+import numpy as np
+import pandas as pd
+
+from .models import TripInfo, TripResult, TimeInfo, LocationInfo, PriceInfo, WayPoint
+from .exceptions import WaymoClientError
+
+# Column names follow storage.parquet.trip_schema
+CATEGORY_COLUMNS = [
+	'city', 'time_zone', 'currency',
+	'pickup_address', 'pickup_selected_title', 'pickup_city',
+	'dropoff_address', 'dropoff_selected_title', 'dropoff_city',
+]
+TIMESTAMP_COLUMNS = ['current_datetime', 'pickup_datetime', 'dropoff_datetime']
+NUMERIC_COLUMNS = {
+	'price': np.float64, # money: float32 would turn 12.35 into 12.350000381
+	'price_std': np.float32, # NaN for prices read from the app
+	'pickup_wait_time_mins': np.int16,
+	'trip_duration_mins': np.int16,
+}
+COLUMN_ORDER = [
+	'city', 'time_zone', 'current_datetime', 'price', 'price_std', 'currency',
+	'pickup_address', 'pickup_selected_title', 'pickup_city', 'pickup_datetime', 'pickup_wait_time_mins',
+	'dropoff_address', 'dropoff_selected_title', 'dropoff_city', 'dropoff_datetime', 'trip_duration_mins',
+]
+
+def _arrow_array(pa, values: np.ndarray, missing: np.ndarray):
+	"""Arrow array over the buffer of `values`, with nulls where `missing`"""
+	values = np.ascontiguousarray(values)
+	if not missing.any():
+		return pa.array(values)
+	validity = pa.py_buffer(np.packbits(~missing, bitorder='little'))
+	return pa.Array.from_buffers(
+		pa.from_numpy_dtype(values.dtype), len(values), [validity, pa.py_buffer(values)], null_count=int(missing.sum())
+	)
+
+def _code_dtype(categories: int):
+	"""Smallest signed code type for `categories` values, the one pandas picks for Categorical codes"""
+	for dtype in (np.int8, np.int16, np.int32):
+		if categories < np.iinfo(dtype).max:
+			return dtype
+	return np.int64
+
+class TripBatch:
+	"""Many trips stored column-wise in NumPy arrays.
+
+	Strings are dictionary-encoded: each category column is an array of codes
+	into its `dictionaries` entry, with -1 for missing values. Times are UTC
+	`datetime64[s]`. Prices are float64 and minutes int16. A trip costs about
+	50 bytes instead of the ~700 its TripInfo objects take.
+	`to_pandas()` and `to_arrow()` share the arrays' memory. Arrow only allocates
+	validity bitmaps, an eighth of a byte per row, for columns with missing values.
+	"""
+
+	def __init__(self, columns: Dict[str, np.ndarray], dictionaries: Dict[str, List[str]]):
+		lengths = {len(values) for values in columns.values()}
+		if len(lengths) > 1:
+			raise WaymoClientError(f"TripBatch columns have different lengths: {sorted(lengths)}")
+		missing = set(COLUMN_ORDER) - set(columns)
+		if missing:
+			raise WaymoClientError(f"TripBatch is missing columns {sorted(missing)}")
+		self.columns = columns
+		self.dictionaries = dictionaries
+
+	@classmethod
+	def from_trip_infos(cls, trip_infos: Iterable[TripInfo]) -> "TripBatch":
+		rows: Dict[str, list] = {name: [] for name in COLUMN_ORDER}
+		for trip_info in trip_infos:
+			rows['city'].append(trip_info.city)
+			rows['time_zone'].append(trip_info.current_datetime.time_zone)
+			rows['currency'].append(trip_info.price.currency)
+			rows['current_datetime'].append(int(trip_info.current_datetime.value.timestamp()))
+			rows['price'].append(trip_info.price.value)
+			rows['price_std'].append(np.nan if trip_info.price.std is None else trip_info.price.std)
+			for prefix, waypoint in (('pickup', trip_info.pickup), ('dropoff', trip_info.dropoff)):
+				rows[f'{prefix}_address'].append(waypoint.location.address)
+				rows[f'{prefix}_selected_title'].append(waypoint.location.selected_title)
+				rows[f'{prefix}_city'].append(waypoint.location.city)
+				rows[f'{prefix}_datetime'].append(int(waypoint.time.value.timestamp()))
+			rows['pickup_wait_time_mins'].append(trip_info.pickup.wait_time)
+			rows['trip_duration_mins'].append(trip_info.duration)
+
+		columns: Dict[str, np.ndarray] = {}
+		dictionaries: Dict[str, List[str]] = {}
+		for name in CATEGORY_COLUMNS:
+			index: Dict[str, int] = {}
+			codes = [-1 if value is None else index.setdefault(value, len(index)) for value in rows[name]]
+			columns[name] = np.array(codes, dtype=_code_dtype(len(index)))
+			dictionaries[name] = list(index)
+		for name in TIMESTAMP_COLUMNS:
+			columns[name] = np.array(rows[name], dtype=np.int64).view('datetime64[s]')
+		for name, dtype in NUMERIC_COLUMNS.items():
+			columns[name] = np.array(rows[name], dtype=dtype)
+		return cls(columns, dictionaries)
+
+	@classmethod
+	def from_results(cls, results: Iterable[TripResult]) -> "TripBatch":
+		"""Batch the successful results, skipping failures"""
+		return cls.from_trip_infos(result.trip_info for result in results if result.success)
+
+	@classmethod
+	def concat(cls, batches: Sequence["TripBatch"]) -> "TripBatch":
+		"""Join batches, re-encoding their category columns against merged dictionaries"""
+		columns: Dict[str, np.ndarray] = {}
+		dictionaries: Dict[str, List[str]] = {}
+		for name in CATEGORY_COLUMNS:
+			index: Dict[str, int] = {}
+			parts = []
+			for batch in batches:
+				remap = np.array([index.setdefault(value, len(index)) for value in batch.dictionaries[name]] + [-1], dtype=np.int64)
+				parts.append(remap[batch.columns[name]]) # code -1 picks the trailing -1
+			dictionaries[name] = list(index)
+			columns[name] = np.concatenate(parts).astype(_code_dtype(len(index))) if parts else np.array([], dtype=np.int8)
+		for name in TIMESTAMP_COLUMNS:
+			columns[name] = np.concatenate([batch.columns[name] for batch in batches]) if batches else np.array([], dtype='datetime64[s]')
+		for name, dtype in NUMERIC_COLUMNS.items():
+			columns[name] = np.concatenate([batch.columns[name] for batch in batches]) if batches else np.array([], dtype=dtype)
+		return cls(columns, dictionaries)
+
+	def __len__(self) -> int:
+		return len(self.columns['price'])
+
+	def __getitem__(self, key: Union[int, slice, np.ndarray]) -> Union[TripInfo, "TripBatch"]:
+		"""A TripInfo for an integer index, otherwise a TripBatch of the selected rows"""
+		if isinstance(key, (int, np.integer)):
+			return self._trip_info(int(key))
+		return TripBatch({name: values[key] for name, values in self.columns.items()}, self.dictionaries)
+
+	def __iter__(self) -> Iterator[TripInfo]:
+		for i in range(len(self)):
+			yield self._trip_info(i)
+
+	@property
+	def nbytes(self) -> int:
+		return sum(values.nbytes for values in self.columns.values())
+
+	def column(self, name: str) -> np.ndarray:
+		"""A column's values, with category codes decoded to strings (None where missing)"""
+		values = self.columns[name]
+		if name not in self.dictionaries:
+			return values
+		lookup = np.array(self.dictionaries[name] + [None], dtype=object)
+		return lookup[values]
+
+	def to_pandas(self) -> pd.DataFrame:
+		"""DataFrame sharing the batch's arrays; categories become pandas Categoricals.
+
+		Timestamps stay naive UTC, since localizing them in pandas copies the
+		column. Use `.dt.tz_localize('UTC')` where aware values are needed.
+		"""
+		data = {}
+		for name in COLUMN_ORDER:
+			values = self.columns[name]
+			if name in self.dictionaries:
+				data[name] = pd.Categorical.from_codes(values, self.dictionaries[name])
+			else:
+				data[name] = values
+		return pd.DataFrame(data, copy=False)
+
+	def to_arrow(self):
+		"""Arrow table sharing the batch's arrays, with aware UTC timestamps and dictionary columns.
+
+		Missing category codes (-1) and NaN standard deviations become nulls.
+		"""
+		from ..storage.parquet import _require_pyarrow
+		pa = _require_pyarrow()
+		arrays = []
+		for name in COLUMN_ORDER:
+			values = self.columns[name]
+			if name in self.dictionaries:
+				indices = _arrow_array(pa, values, values < 0)
+				arrays.append(pa.DictionaryArray.from_arrays(indices, pa.array(self.dictionaries[name], pa.string())))
+			elif name in TIMESTAMP_COLUMNS:
+				arrays.append(pa.array(values).view(pa.timestamp('s', tz='UTC')))
+			elif name == 'price_std':
+				arrays.append(_arrow_array(pa, values, np.isnan(values)))
+			else:
+				arrays.append(pa.array(values))
+		return pa.Table.from_arrays(arrays, names=COLUMN_ORDER)
+
+	def _trip_info(self, i: int) -> TripInfo:
+		if not -len(self) <= i < len(self):
+			raise IndexError(f"Trip {i} out of range for a batch of {len(self)}")
+		def value(name: str) -> Optional[str]:
+			code = self.columns[name][i]
+			return None if code < 0 else self.dictionaries[name][code]
+
+		time_zone = value('time_zone')
+		tz = pytz.timezone(time_zone)
+
+		def time_info(name: str) -> TimeInfo:
+			return TimeInfo(datetime.fromtimestamp(int(self.columns[name][i].astype(np.int64)), tz), time_zone)
+
+		price_std = float(self.columns['price_std'][i])
+		return TripInfo(
+			current_datetime=time_info('current_datetime'),
+			price=PriceInfo(
+				float(self.columns['price'][i]),
+				value('currency'),
+				estimated=not np.isnan(price_std),
+				std=None if np.isnan(price_std) else round(price_std, 2)
+			),
+			pickup=WayPoint(
+				LocationInfo(value('pickup_address'), value('pickup_city'), value('pickup_selected_title')),
+				time_info('pickup_datetime'),
+				int(self.columns['pickup_wait_time_mins'][i])
+			),
+			dropoff=WayPoint(
+				LocationInfo(value('dropoff_address'), value('dropoff_city'), value('dropoff_selected_title')),
+				time_info('dropoff_datetime'),
+				0
+			),
+			city=value('city'),
+			duration=int(self.columns['trip_duration_mins'][i])
+		)
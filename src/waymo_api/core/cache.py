@@ -0,0 +1,144 @@
+import copy
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from concurrent.futures import Future
+from typing import Optional, Dict, Tuple, Callable
+
+from .models import TripInfo
+from ..locations.gazetteer import Gazetteer
+
+from ..utils.logger import get_logger
+logger = get_logger(__name__)
+
+CacheKey = Tuple[str, str, str, int]
+
+def normalize_location(location: str) -> str:
+	"""Lowercase and collapse whitespace so trivially different spellings share a key"""
+	return " ".join(location.lower().split())
+
+@dataclass
+class CacheStats:
+	hits: int = 0
+	misses: int = 0
+	coalesced: int = 0 # requests that waited on an identical in-flight query
+	evictions: int = 0
+
+	@property
+	def hit_rate(self) -> float:
+		total = self.hits + self.misses + self.coalesced
+		return (self.hits + self.coalesced) / total if total else 0.0
+
+class CachedWaymoClient:
+	"""Caches trip info from any client exposing `get_trip_info(pickup, dropoff)`.
+
+	Keys are the normalized pickup, dropoff and city plus a time bucket, so a price
+	is only reused within the same `bucket_seconds` window and for at most `ttl`
+	seconds. The city is that of the wrapped client's current service area, or
+	`city` for clients without one. With a gazetteer, a location that exactly matches a known place (after
+	normalization) is keyed by its place ID, so spelling variants of one place
+	share an entry. Fuzzy matches are never used, so two different places can
+	never share a price. Concurrent requests for the same key share a single
+	emulator query. Every caller gets its own copy of the trip info.
+	"""
+
+	def __init__(
+		self,
+		client,
+		city: str = "SF",
+		ttl: float = 300,
+		max_size: int = 10_000,
+		bucket_seconds: int = 900,
+		clock: Callable[[], float] = time.time,
+		gazetteer: Optional[Gazetteer] = None
+	):
+		self.client = client
+		self.city = city
+		self.ttl = ttl
+		self.max_size = max_size
+		self.bucket_seconds = bucket_seconds
+		self.clock = clock
+		self.gazetteer = gazetteer
+		self.stats = CacheStats()
+		self._entries: "OrderedDict[CacheKey, Tuple[float, TripInfo]]" = OrderedDict()
+		self._in_flight: Dict[CacheKey, Future] = {}
+		self._lock = threading.Lock()
+
+	def make_key(self, pickup: str, dropoff: str, now: Optional[float] = None) -> CacheKey:
+		now = self.clock() if now is None else now
+		bucket = int(now // self.bucket_seconds) if self.bucket_seconds else 0
+		return (self._location_key(pickup), self._location_key(dropoff), self.area_code, bucket)
+
+	@property
+	def area_code(self) -> str:
+		"""City code trips are currently quoted in; follows the client when it changes service area"""
+		area = getattr(self.client, 'service_area', None)
+		return area.code if area is not None else self.city
+
+	def get_trip_info(self, pickup: str, dropoff: str) -> TripInfo:
+		now = self.clock()
+		key = self.make_key(pickup, dropoff, now)
+
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is not None:
+				stored_at, trip_info = entry
+				if now - stored_at <= self.ttl:
+					self._entries.move_to_end(key)
+					self.stats.hits += 1
+					return copy.deepcopy(trip_info)
+				del self._entries[key]
+
+			future = self._in_flight.get(key)
+			if future is not None:
+				self.stats.coalesced += 1
+				owner = False
+			else:
+				future = Future()
+				self._in_flight[key] = future
+				self.stats.misses += 1
+				owner = True
+
+		if not owner:
+			return copy.deepcopy(future.result())
+
+		try:
+			trip_info = self.client.get_trip_info(pickup, dropoff)
+		except BaseException as e:
+			with self._lock:
+				del self._in_flight[key]
+			future.set_exception(e)
+			raise
+
+		with self._lock:
+			del self._in_flight[key]
+			self._store(key, copy.deepcopy(trip_info), self.clock())
+		future.set_result(copy.deepcopy(trip_info))
+		return trip_info
+
+	def invalidate(self, pickup: Optional[str] = None, dropoff: Optional[str] = None) -> None:
+		"""Drop cached entries matching the given pickup and/or dropoff, or everything if neither is given"""
+		pickup_key = self._location_key(pickup) if pickup is not None else None
+		dropoff_key = self._location_key(dropoff) if dropoff is not None else None
+		with self._lock:
+			for key in [
+				k for k in self._entries
+				if (pickup_key is None or k[0] == pickup_key) and (dropoff_key is None or k[1] == dropoff_key)
+			]:
+				del self._entries[key]
+
+	def __len__(self) -> int:
+		with self._lock:
+			return len(self._entries)
+
+	def _location_key(self, location: str) -> str:
+		place = self.gazetteer.lookup(location) if self.gazetteer else None
+		return place.place_id if place else normalize_location(location)
+
+	def _store(self, key: CacheKey, trip_info: TripInfo, now: float) -> None:
+		self._entries[key] = (now, trip_info)
+		self._entries.move_to_end(key)
+		while len(self._entries) > self.max_size:
+			self._entries.popitem(last=False)
+			self.stats.evictions += 1
@@ -1,45 +1,257 @@
-from typing import Optional
+from typing import Optional, List, Dict, Iterator, Iterable
+import time
 import logging
 from .driver import AppiumDriverManager
+from .provisioning import ProvisioningCache
 from ..interactions.actions import WaymoActions
 from ..interactions.extractor import TripInfoExtractor
-from .models import TripInfo
-from .exceptions import WaymoClientError
+from ..interactions.screens import ScreenNavigator, RetryBudget
+from ..interactions.locators import LocatorRegistry
+from .models import TripInfo, TripResult
+from .planner import plan_trip_batches
+from ..locations.gazetteer import Gazetteer
+from ..locations.service_areas import ServiceArea
+from .exceptions import WaymoClientError, SessionError
+from .health import SessionWatchdog, HealthAction
 
+from ..utils.metrics import metrics, timed
 from ..utils.logger import get_logger
 logger = get_logger(__name__)
 
 class WaymoClient:
-	def __init__(self, device_name: str = 'emulator-5554', timeout: int = 5):
-		self.driver_manager = AppiumDriverManager(device_name, timeout)
+	def __init__(
+		self,
+		device_name: str = 'emulator-5554',
+		timeout: int = 5,
+		server_url: str = 'http://localhost:4723',
+		system_port: Optional[int] = None,
+		use_page_source: bool = True,
+		warm_start: bool = True,
+		gazetteer: Optional[Gazetteer] = None,
+		max_recovery_steps: int = 4,
+		max_session_restarts: int = 3,
+		restart_window: float = 600.0,
+		input_mode: str = "set_value",
+		service_area: Optional[ServiceArea] = None,
+		location_settle_time: float = 3.0,
+		watchdog: Optional[SessionWatchdog] = None
+	):
+		self.device_name = device_name
+		self.use_page_source = use_page_source
+		self.gazetteer = gazetteer
+		self.driver_manager = AppiumDriverManager(
+			device_name,
+			timeout,
+			server_url,
+			system_port,
+			provisioning_cache=ProvisioningCache() if warm_start else None
+		)
+		self.max_recovery_steps = max_recovery_steps
+		self.restart_budget = RetryBudget(max_session_restarts, restart_window)
+		# Kept across session restarts so locator calibration is done once per client
+		self.locators = LocatorRegistry()
+		self.input_mode = input_mode
+		# None leaves the device where it is and labels trips with the default area
+		self.service_area = service_area
+		self.location_settle_time = location_settle_time
+		self.watchdog = watchdog or SessionWatchdog()
+		self.watchdog.device_name = self.watchdog.device_name or device_name
 		self.waymo_actions = None
 		self.trip_info_extractor = None
+		self.screen_navigator = None
 
 	def __enter__(self):
 		self.driver_manager.connect()
-		self.waymo_actions = WaymoActions(self.driver_manager.driver, self.driver_manager.wait)
-		self.trip_info_extractor = TripInfoExtractor(self.driver_manager.driver, self.driver_manager.wait)
+		self._bind_session()
+		if self.service_area is not None:
+			self.set_service_area(self.service_area)
 		return self
 
 	def __exit__(self, exc_type, exc_val, exc_tb):
 		self.driver_manager.quit()
 
+	@timed("get_trip_info")
 	def get_trip_info(self, pickup: str, dropoff: str) -> TripInfo:
+		self._check_health()
 		try:
 			# Enter dropoff location in the app homepage
-			self.waymo_actions.enter_dropoff_location(dropoff)
+			dropoff_title = self.waymo_actions.enter_dropoff_location(dropoff)
 
 			# Then enter pickup location
-			self.waymo_actions.enter_pickup_location(pickup)
+			started = time.monotonic()
+			pickup_title = self.waymo_actions.enter_pickup_location(pickup)
 
 			# Extract trip info
 			trip_info = self.trip_info_extractor._extract_trip_info(pickup, dropoff)
+			self._record_selected_titles(trip_info, pickup_title, dropoff_title)
 
-			# Return to homepage
-			self.waymo_actions.return_to_home_screen()
-			
-			return trip_info
+		except Exception as e:
+			self.watchdog.record(None, False)
+			self._recover()
+			raise WaymoClientError(f"Failed to get trip info: {str(e)}")
+
+		self.watchdog.record(time.monotonic() - started, True)
+		# Return to homepage
+		self._try_return_to_home_screen()
+		return trip_info
+
+	def iter_trip_infos_for_dropoff(self, dropoff: str, pickups: Iterable[str]) -> Iterator[TripResult]:
+		"""Price several pickups against one dropoff, entering the dropoff only once.
+
+		After each fare is read the app stays on the trip screen and only the pickup
+		is re-entered. A failed pickup sends the app home and the dropoff is entered
+		again for the next one. Results are yielded as soon as each fare is read.
+		`pickups` is consumed lazily, one pickup per trip.
+		"""
+		on_trip_screen = False
+		dropoff_title = None
+		try:
+			for pickup in pickups:
+				if self._check_health():
+					on_trip_screen = False # the app restarted on its home screen
+				try:
+					if not on_trip_screen:
+						dropoff_title = self.waymo_actions.enter_dropoff_location(dropoff)
+						on_trip_screen = True
+					started = time.monotonic()
+					pickup_title = self.waymo_actions.enter_pickup_location(pickup)
+					trip_info = self.trip_info_extractor._extract_trip_info(pickup, dropoff)
+					self._record_selected_titles(trip_info, pickup_title, dropoff_title)
+					result = TripResult(pickup, dropoff, trip_info=trip_info)
+					self.watchdog.record(time.monotonic() - started, True)
+				except Exception as e:
+					logger.error(f"Failed to get trip info for {pickup} -> {dropoff}: {str(e)}")
+					result = TripResult(pickup, dropoff, error=f"Failed to get trip info: {str(e)}")
+					on_trip_screen = False
+					self.watchdog.record(None, False)
+					self._recover()
+				yield result
+		finally:
+			if on_trip_screen:
+				self._try_return_to_home_screen()
+
+	def get_trip_infos_for_dropoff(self, dropoff: str, pickups: List[str]) -> List[TripResult]:
+		return list(self.iter_trip_infos_for_dropoff(dropoff, pickups))
+
+	def iter_trip_info(self, trips: List[Dict[str, str]]) -> Iterator[TripResult]:
+		"""Yield trip results as they complete, grouped by dropoff to reuse the entered dropoff"""
+		for group in plan_trip_batches(trips):
+			yield from self.iter_trip_infos_for_dropoff(group.dropoff, [pickup for _, pickup in group.pickups])
+
+	def get_trip_infos(self, trips: List[Dict[str, str]]) -> List[TripResult]:
+		"""Price a list of trips and return results in input order"""
+		indices = [index for group in plan_trip_batches(trips) for index, _ in group.pickups]
+		results: List[Optional[TripResult]] = [None] * len(trips)
+		for index, result in zip(indices, self.iter_trip_info(trips)):
+			results[index] = result
+		return results
+
+	def _record_selected_titles(self, trip_info: TripInfo, pickup_title: Optional[str], dropoff_title: Optional[str]) -> None:
+		"""Keep the autocomplete titles the app actually selected alongside the queried names"""
+		trip_info.pickup.location.selected_title = pickup_title
+		trip_info.dropoff.location.selected_title = dropoff_title
+		if self.gazetteer is not None:
+			self.gazetteer.record_selection(trip_info.pickup.location.address, pickup_title)
+			self.gazetteer.record_selection(trip_info.dropoff.location.address, dropoff_title)
+
+	@timed("set_service_area")
+	def set_service_area(self, area: ServiceArea) -> None:
+		"""Move the device into a service area and label the following trips with it.
+
+		Sets the device geolocation, gives the app `location_settle_time` seconds to
+		pick it up and makes sure it is back on the home screen.
+		"""
+		logger.info(f"Moving {self.device_name} to {area.name}")
+		self.driver_manager.driver.execute_script('mobile: setGeolocation', {
+			'latitude': area.latitude,
+			'longitude': area.longitude,
+			'altitude': 0
+		})
+		self.service_area = area
+		self.trip_info_extractor.service_area = area
+		if self.location_settle_time:
+			time.sleep(self.location_settle_time)
+		self._recover()
+
+	def _bind_session(self) -> None:
+		"""(Re)create the helpers that hold the current driver"""
+		driver = self.driver_manager.driver
+		self.waymo_actions = WaymoActions(
+			driver,
+			self.driver_manager.wait,
+			self.driver_manager.waiter,
+			self.device_name,
+			self.locators,
+			self.input_mode
+		)
+		self.trip_info_extractor = TripInfoExtractor(
+			driver,
+			self.driver_manager.wait,
+			self.use_page_source,
+			self.device_name,
+			self.service_area
+		)
+		self.screen_navigator = ScreenNavigator(
+			driver,
+			self.driver_manager.app_package,
+			self.max_recovery_steps,
+			self.device_name
+		)
 
+	def _check_health(self) -> bool:
+		"""Between trips, restart the app or the session if the watchdog sees drift. Returns whether it acted.
+
+		Trip latency is measured from pickup entry to fare, the part every trip
+		shares whether or not its dropoff was already entered.
+		"""
+		action = self.watchdog.check()
+		if action is None:
+			return False
+		logger.warning(f"Session health on {self.device_name}: {action.value}")
+		try:
+			with metrics.span(action.value, self.device_name):
+				if action == HealthAction.RESTART_APP:
+					driver = self.driver_manager.driver
+					driver.terminate_app(self.driver_manager.app_package)
+					driver.activate_app(self.driver_manager.app_package)
+				else:
+					self.driver_manager.quit()
+					self.driver_manager.connect()
+					self._bind_session()
+				self.waymo_actions.wait_for_home_screen()
 		except Exception as e:
+			logger.error(f"{action.value} failed on {self.device_name}: {str(e)}")
+			self._recover()
+		self.watchdog.acted(action)
+		return True
+
+	def _try_return_to_home_screen(self) -> None:
+		try:
 			self.waymo_actions.return_to_home_screen()
-			raise WaymoClientError(f"Failed to get trip info: {str(e)}")
\ No newline at end of file
+		except Exception as e:
+			logger.error(f"Could not return to home screen: {str(e)}")
+			self._recover()
+
+	def _recover(self) -> None:
+		"""Bring the app back to the home screen after a failure.
+
+		Tries the screen navigator first and restarts the session as a last resort.
+		Raises SessionError once the restart budget is used up or the restart
+		fails, so a device stuck in a bad state fails fast instead of timing out
+		on every trip.
+		"""
+		try:
+			self.screen_navigator.go_home()
+			return
+		except Exception as e:
+			logger.warning(f"Screen recovery failed on {self.device_name}: {str(e)}")
+
+		if not self.restart_budget.try_acquire():
+			raise SessionError(f"Session restart budget exhausted on {self.device_name}")
+		logger.warning(f"Restarting Appium session on {self.device_name}")
+		try:
+			self.driver_manager._discard_driver()
+			self.driver_manager.connect()
+			self._bind_session()
+		except Exception as e:
+			raise SessionError(f"Session restart failed on {self.device_name}: {str(e)}")
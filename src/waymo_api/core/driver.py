@@ -5,54 +5,114 @@ from appium import webdriver
 from appium.options.android import UiAutomator2Options
 from selenium.webdriver.support.ui import WebDriverWait
 from .exceptions import WaymoClientError
+from .provisioning import ProvisioningCache, get_server_version
+from ..interactions.waits import AdaptiveWait, LatencyTracker
 
+from ..utils.metrics import timed
 from ..utils.logger import get_logger
 logger = get_logger(__name__)
 
 class AppiumDriverManager:
-	def __init__(self, device_name: str, timeout: int):
+	def __init__(
+		self,
+		device_name: str,
+		timeout: int,
+		server_url: str = 'http://localhost:4723',
+		system_port: Optional[int] = None,
+		poll_interval: float = 0.1,
+		provisioning_cache: Optional[ProvisioningCache] = None
+	):
 		self.platform_name = 'Android'
 		self.device_name = device_name
 		self.timeout = timeout
+		self.server_url = server_url
+		self.system_port = system_port # must be unique per device when running several sessions
+		self.poll_interval = poll_interval
+		self.provisioning_cache = provisioning_cache
+		self.latency_tracker = LatencyTracker() # kept across reconnects so learned timeouts survive
 		self.driver = None
 		self.wait = None
+		self.waiter = None
 		self.app_package = 'com.waymo.carapp'
 		self.app_activity = 'com.google.android.apps.car.carapp.LaunchActivity'
 
-	def _setup_driver(self) -> UiAutomator2Options:
+	def _setup_driver(self, fast_start: bool = False) -> UiAutomator2Options:
 		try:
 			"""Configure and return Appium driver options"""
 			options = UiAutomator2Options()
 			options.platform_name = self.platform_name
 			options.device_name = self.device_name
+			options.udid = self.device_name
 			options.app_package = self.app_package
 			options.app_activity = self.app_activity
 			options.no_reset = True
-			options.set_capability('skipServerInstallation', False) # set to True once device is initialized for speedup
-			options.set_capability('skipDeviceInitialization', False) # set to True once device is initialized for speedup
+			# Only skipped once the provisioning cache knows the device is initialized
+			options.set_capability('skipServerInstallation', fast_start)
+			options.set_capability('skipDeviceInitialization', fast_start)
 			options.set_capability('autoGrantPermissions', True)
 			options.set_capability('disableWindowAnimation', True)
 			options.set_capability('disableAndroidWatchers', True) 
+			if self.system_port is not None:
+				options.set_capability('systemPort', self.system_port)
 			return options
 
 		except Exception as e:
 			logger.error(f"Failed to setup driver options: {str(e)}")
 			raise WaymoClientError(f"Driver setup failed: {str(e)}")
 
+	@timed("driver_connect")
 	def connect(self) -> None:
-		"""Establish connection to Appium server and initialize driver"""
+		"""Establish connection to Appium server and initialize driver.
+
+		With a provisioning cache, devices known to be initialized start with the
+		fast capabilities, falling back to a full initialization if that fails.
+		"""
+		server_version = None
+		fast_start = False
+		if self.provisioning_cache is not None:
+			server_version = get_server_version(self.server_url)
+			fast_start = self.provisioning_cache.is_known_good(self.device_name, self.server_url, server_version)
+
 		try:
-			logger.info("Connecting to Appium...")
-			options = self._setup_driver()
-			self.driver = webdriver.Remote('http://localhost:4723', options=options)
-			self.wait = WebDriverWait(self.driver, self.timeout)
-			logger.info("Connected successfully to Appium")
-			self._handle_app_state()
+			try:
+				self._start_session(fast_start)
+			except Exception as e:
+				if not fast_start:
+					raise
+				logger.warning(f"Fast start failed on {self.device_name}, falling back to full initialization: {str(e)}")
+				self.provisioning_cache.invalidate(self.device_name, self.server_url)
+				self._discard_driver()
+				self._start_session(fast_start=False)
+
+			if self.provisioning_cache is not None:
+				self.provisioning_cache.record_success(
+					self.device_name,
+					self.server_url,
+					server_version=server_version,
+					platform_version=self.driver.capabilities.get('platformVersion')
+				)
 		except Exception as e:
 			logger.error(f"Failed to connect to Appium: {str(e)}")
 			self.quit()
 			raise WaymoClientError(f"Appium connection failed: {str(e)}")
 
+	def _start_session(self, fast_start: bool) -> None:
+		logger.info(f"Connecting to Appium at {self.server_url} ({self.device_name}, {'fast' if fast_start else 'full'} start)...")
+		options = self._setup_driver(fast_start)
+		self.driver = webdriver.Remote(self.server_url, options=options)
+		self.wait = WebDriverWait(self.driver, self.timeout, poll_frequency=self.poll_interval)
+		self.waiter = AdaptiveWait(self.driver, self.timeout, self.poll_interval, self.latency_tracker)
+		logger.info("Connected successfully to Appium")
+		self._handle_app_state()
+
+	def _discard_driver(self) -> None:
+		try:
+			if self.driver:
+				self.driver.quit()
+		except Exception as e:
+			logger.debug(f"Ignoring error while discarding driver: {str(e)}")
+		self.driver = None
+
 	def _handle_app_state(self) -> None:
 		"""Handle the Waymo app state and ensure it's in the correct state"""
 		try:
@@ -77,6 +137,7 @@ class AppiumDriverManager:
 			if self.driver:
 				logger.info("Closing Appium driver...")
 				self.driver.quit()
+				self.driver = None
 				logger.info("Successfully closed Appium driver")
 		except Exception as e:
 			logger.error(f"Error while closing driver: {str(e)}")
@@ -1,3 +1,15 @@
 class WaymoClientError(Exception):
 	"""Base exception for WaymoClient errors"""
-	pass
\ No newline at end of file
+	pass
+
+class SessionError(WaymoClientError):
+	"""Raised when a device session is broken and could not be recovered"""
+	pass
+
+class QueueFullError(WaymoClientError):
+	"""Raised when a quote queue has no room for more requests"""
+	pass
+
+class DeadlineExceededError(WaymoClientError):
+	"""Raised when a request's deadline passes before it could be served"""
+	pass
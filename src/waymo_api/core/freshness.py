@@ -0,0 +1,262 @@
+import math
+import time
+import heapq
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Iterator, Callable, Tuple
+
+from .models import TripResult
+from .exceptions import WaymoClientError
+
+from ..utils.logger import get_logger
+logger = get_logger(__name__)
+
+@dataclass
+class TrackedPair:
+	pickup: str
+	dropoff: str
+	interval: float # target seconds between observations
+	weight: float = 1.0 # when devices fall behind, intervals stretch by interval_factor / weight
+	last_observed: Optional[float] = None
+	observations: int = 0
+	failures: int = 0
+	retry_at: Optional[float] = None
+	version: int = 0 # bumped whenever the pair's heap entry is replaced
+
+	def staleness(self, now: float) -> float:
+		"""Age of the last observation in target intervals (inf if never observed)"""
+		if self.last_observed is None:
+			return math.inf
+		return (now - self.last_observed) / self.interval
+
+@dataclass
+class FreshnessReport:
+	pairs: int
+	observations: int
+	failures: int
+	throughput_per_min: float # trips completed per minute, recently
+	required_per_min: float # trips per minute needed to meet every target interval
+	interval_factor: float # >1 when intervals are stretched to what the devices achieve
+	fresh_fraction: float # pairs observed within their target interval
+	staleness_p50: float # age / target interval across pairs
+	staleness_p95: float
+
+	def describe(self) -> str:
+		return (
+			f"{self.fresh_fraction:.0%} of {self.pairs} pairs within target interval, "
+			f"p95 age {self.staleness_p95:.2f}x target; "
+			f"{self.throughput_per_min:.1f} of {self.required_per_min:.1f} trips/min needed "
+			f"(intervals x{self.interval_factor:.2f})"
+		)
+
+class FreshnessScheduler:
+	"""Keeps a fixed set of OD pairs re-sampled as close to their target intervals as devices allow.
+
+	Pairs sit in a priority queue keyed by when they fall due, and each round
+	takes the most overdue ones. When the measured throughput cannot cover every
+	target interval, intervals are stretched just enough to fit it: each pair by
+	`interval_factor / weight`, never below its target. Valuable pairs keep
+	their resolution longest and no pair starves. Failed pairs are retried after
+	`retry_delay` seconds.
+	"""
+
+	def __init__(
+		self,
+		trips: List[Dict],
+		default_interval: float = 3600.0,
+		batch_size: int = 10,
+		retry_delay: float = 300.0,
+		throughput_window: int = 20,
+		report_interval: float = 300.0,
+		clock: Callable[[], float] = time.time
+	):
+		self.pairs: List[TrackedPair] = []
+		self._index: Dict[Tuple[str, str], int] = {}
+		for trip in trips:
+			key = (trip["pickup"], trip["dropoff"])
+			if key in self._index:
+				raise WaymoClientError(f"Pair {key[0]} -> {key[1]} is tracked twice")
+			self._index[key] = len(self.pairs)
+			self.pairs.append(TrackedPair(
+				trip["pickup"],
+				trip["dropoff"],
+				float(trip.get("interval", default_interval)),
+				float(trip.get("weight", 1.0))
+			))
+		if not self.pairs:
+			raise WaymoClientError("FreshnessScheduler needs at least one pair")
+		self.batch_size = batch_size
+		self.retry_delay = retry_delay
+		self.report_interval = report_interval
+		self.clock = clock
+		self.required_rate = sum(1 / pair.interval for pair in self.pairs) # trips per second
+		self.interval_factor = 1.0
+		self.failures = 0
+		self._batches = deque(maxlen=throughput_window) # (trips, busy seconds) of recent batches
+		self._heap: List[Tuple[float, int, int]] = []
+		self._in_flight = set()
+		self._stop = threading.Event()
+		self._rebuild_heap()
+
+	def due_at(self, pair: TrackedPair) -> float:
+		if pair.retry_at is not None:
+			return pair.retry_at
+		if pair.last_observed is None:
+			return -pair.weight # never observed: before everything else, most valuable first
+		return pair.last_observed + pair.interval * self._stretch(pair, self.interval_factor)
+
+	def throughput(self) -> Optional[float]:
+		"""Trips per busy second over recent batches, or None before the first batch.
+
+		Time spent waiting for pairs to fall due is not counted, so spare capacity
+		never looks like slow devices.
+		"""
+		seconds = sum(elapsed for _, elapsed in self._batches)
+		return sum(trips for trips, _ in self._batches) / seconds if seconds > 0 else None
+
+	def next_batch(self) -> List[TrackedPair]:
+		"""Take up to `batch_size` pairs that are due now, most overdue first"""
+		now = self.clock()
+		batch = []
+		while self._heap and len(batch) < self.batch_size:
+			due, version, index = self._heap[0]
+			pair = self.pairs[index]
+			if version != pair.version:
+				heapq.heappop(self._heap)
+				continue
+			if due > now:
+				break
+			heapq.heappop(self._heap)
+			pair.version += 1
+			self._in_flight.add(index)
+			batch.append(pair)
+		return batch
+
+	def seconds_until_due(self) -> float:
+		while self._heap and self._heap[0][1] != self.pairs[self._heap[0][2]].version:
+			heapq.heappop(self._heap)
+		if not self._heap:
+			return self.retry_delay
+		return max(self._heap[0][0] - self.clock(), 0.0)
+
+	def record(self, result: TripResult) -> None:
+		"""Update the pair's schedule from a result and adapt intervals to the measured throughput"""
+		index = self._index[(result.pickup, result.dropoff)]
+		pair = self.pairs[index]
+		now = self.clock()
+		if result.success:
+			pair.last_observed = now
+			pair.observations += 1
+			pair.retry_at = None
+		else:
+			pair.failures += 1
+			self.failures += 1
+			pair.retry_at = now + self.retry_delay
+		self._in_flight.discard(index)
+		self._push(pair)
+
+	def run(self, client, duration: Optional[float] = None) -> Iterator[TripResult]:
+		"""Re-sample pairs until `duration` seconds pass or `stop()` is called, yielding every result.
+
+		`client` needs `iter_trip_info(trips)`, like WaymoClient or WaymoClientPool.
+		"""
+		end = None if duration is None else self.clock() + duration
+		next_report = self.clock() + self.report_interval
+		while not self._stop.is_set() and (end is None or self.clock() < end):
+			batch = self.next_batch()
+			if not batch:
+				wait = self.seconds_until_due()
+				if end is not None:
+					wait = min(wait, max(end - self.clock(), 0.0))
+				self._stop.wait(wait)
+				continue
+
+			trips = [{"pickup": pair.pickup, "dropoff": pair.dropoff} for pair in batch]
+			started = self.clock()
+			answered = 0
+			try:
+				for result in client.iter_trip_info(trips):
+					self.record(result)
+					answered += 1
+					yield result
+			finally:
+				# Requeue pairs the client never answered (it raised, or the caller stopped iterating)
+				for pair in batch:
+					index = self._index[(pair.pickup, pair.dropoff)]
+					if index in self._in_flight:
+						self._in_flight.discard(index)
+						self._push(pair)
+				if answered:
+					self._batches.append((answered, self.clock() - started))
+					self._adapt()
+			if self.clock() >= next_report:
+				logger.info(f"Freshness: {self.report().describe()}")
+				next_report = self.clock() + self.report_interval
+
+	def stop(self) -> None:
+		self._stop.set()
+
+	def report(self) -> FreshnessReport:
+		now = self.clock()
+		staleness = sorted(pair.staleness(now) for pair in self.pairs)
+		rate = self.throughput()
+		return FreshnessReport(
+			pairs=len(self.pairs),
+			observations=sum(pair.observations for pair in self.pairs),
+			failures=self.failures,
+			throughput_per_min=(rate or 0.0) * 60,
+			required_per_min=self.required_rate * 60,
+			interval_factor=self.interval_factor,
+			fresh_fraction=sum(1 for s in staleness if s <= 1.0) / len(staleness),
+			staleness_p50=_nearest_rank(staleness, 50),
+			staleness_p95=_nearest_rank(staleness, 95),
+		)
+
+	def _adapt(self) -> None:
+		"""Stretch intervals to the throughput the devices achieve; rebuild the queue on a big change"""
+		rate = self.throughput()
+		if rate is None:
+			return
+		factor = self._factor_for(rate)
+		if abs(factor - self.interval_factor) > 0.1 * self.interval_factor:
+			logger.info(f"Throughput {rate * 60:.1f} trips/min, scaling target intervals by {factor:.2f}")
+			self.interval_factor = factor
+			self._rebuild_heap()
+
+	@staticmethod
+	def _stretch(pair: TrackedPair, factor: float) -> float:
+		return max(1.0, factor / pair.weight) if factor > 1.0 else 1.0
+
+	def _factor_for(self, rate: float) -> float:
+		"""Smallest interval factor whose re-sampling demand fits `rate` trips per second"""
+		def demand(factor: float) -> float:
+			return sum(1 / (pair.interval * self._stretch(pair, factor)) for pair in self.pairs)
+
+		if self.required_rate <= rate:
+			return 1.0
+		low, high = 1.0, 2.0
+		while demand(high) > rate:
+			low, high = high, high * 2
+		for _ in range(30):
+			middle = (low + high) / 2
+			if demand(middle) > rate:
+				low = middle
+			else:
+				high = middle
+		return high
+
+	def _push(self, pair: TrackedPair) -> None:
+		pair.version += 1
+		heapq.heappush(self._heap, (self.due_at(pair), pair.version, self._index[(pair.pickup, pair.dropoff)]))
+
+	def _rebuild_heap(self) -> None:
+		self._heap = []
+		for i, pair in enumerate(self.pairs):
+			if i not in self._in_flight:
+				pair.version += 1
+				self._heap.append((self.due_at(pair), pair.version, i))
+		heapq.heapify(self._heap)
+
+def _nearest_rank(values: List[float], q: float) -> float:
+	return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
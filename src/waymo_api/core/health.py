@@ -0,0 +1,120 @@
+import statistics
+from enum import Enum
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, List
+
+from ..utils.logger import get_logger
+logger = get_logger(__name__)
+
+class HealthAction(Enum):
+	RESTART_APP = "restart_app"
+	RECYCLE_SESSION = "recycle_session"
+
+@dataclass
+class HealthStats:
+	trips: int = 0
+	app_restarts: int = 0
+	session_recycles: int = 0
+	baseline: Optional[float] = None # median trip seconds while the session was fast
+	recent: Optional[float] = None # median trip seconds over the rolling window
+	error_rate: float = 0.0 # over the rolling window
+
+class SessionWatchdog:
+	"""Notices a device session drifting out of its fast regime and says how to recover it.
+
+	The baseline is the median latency of the first `baseline_trips` successful
+	trips. Once the rolling median exceeds the baseline by `max_slowdown`, or the
+	rolling error rate exceeds `max_error_rate`, the watchdog first asks for an
+	app restart. If the drift comes back within `window` trips of that, it asks
+	for a new Appium session. When a fresh session does not help either, the
+	slowdown is taken to be outside the device (network, server load) and the
+	baseline is reset to the current latency.
+	"""
+
+	def __init__(
+		self,
+		window: int = 20,
+		baseline_trips: int = 10,
+		max_slowdown: float = 1.5,
+		max_error_rate: float = 0.3,
+		max_session_trips: Optional[int] = None,
+		device_name: Optional[str] = None
+	):
+		self.window = window
+		self.baseline_trips = baseline_trips
+		self.max_slowdown = max_slowdown
+		self.max_error_rate = max_error_rate
+		self.max_session_trips = max_session_trips # recycle after this many trips regardless of health
+		self.device_name = device_name
+		self.stats = HealthStats()
+		self._warmup: List[float] = []
+		self._latencies = deque(maxlen=window)
+		self._outcomes = deque(maxlen=window)
+		self._session_trips = 0
+		self._trips_since_action: Optional[int] = None
+		self._last_action: Optional[HealthAction] = None
+
+	def record(self, seconds: Optional[float], success: bool) -> None:
+		"""Record one finished trip; `seconds` is its latency (ignored for failures)"""
+		self.stats.trips += 1
+		self._session_trips += 1
+		if self._trips_since_action is not None:
+			self._trips_since_action += 1
+		self._outcomes.append(success)
+		if success and seconds is not None:
+			self._latencies.append(seconds)
+			if self.stats.baseline is None:
+				self._warmup.append(seconds)
+				if len(self._warmup) >= self.baseline_trips:
+					self.stats.baseline = statistics.median(self._warmup)
+					logger.info(f"Trip latency baseline on {self.device_name}: {self.stats.baseline:.2f}s")
+		self.stats.recent = statistics.median(self._latencies) if self._latencies else None
+		self.stats.error_rate = self._outcomes.count(False) / len(self._outcomes)
+
+	def check(self) -> Optional[HealthAction]:
+		"""The action to take before the next trip, if any"""
+		if self.max_session_trips and self._session_trips >= self.max_session_trips:
+			return HealthAction.RECYCLE_SESSION
+		if len(self._outcomes) < self.window // 2 or not self._drifting():
+			return None
+
+		recent = self._trips_since_action is not None and self._trips_since_action <= self.window
+		if recent and self._last_action == HealthAction.RECYCLE_SESSION:
+			if self.stats.error_rate > self.max_error_rate or self.stats.recent is None:
+				logger.warning(f"{self.device_name} still failing after a new session")
+			else:
+				logger.warning(f"{self.device_name} still slow after a new session, re-baselining at {self.stats.recent:.2f}s")
+				self.stats.baseline = self.stats.recent
+			self._clear()
+			self._last_action = None
+			return None
+		if recent and self._last_action == HealthAction.RESTART_APP:
+			return HealthAction.RECYCLE_SESSION
+		return HealthAction.RESTART_APP
+
+	def acted(self, action: HealthAction) -> None:
+		"""Note that `action` was taken; the window restarts so only post-action trips count"""
+		if action == HealthAction.RESTART_APP:
+			self.stats.app_restarts += 1
+		else:
+			self.stats.session_recycles += 1
+			self._session_trips = 0
+		self._last_action = action
+		self._trips_since_action = 0
+		self._clear()
+
+	def _drifting(self) -> bool:
+		if self.stats.error_rate > self.max_error_rate:
+			logger.warning(f"{self.device_name} error rate {self.stats.error_rate:.0%} over the last {len(self._outcomes)} trips")
+			return True
+		if self.stats.baseline is not None and self.stats.recent is not None and self.stats.recent > self.max_slowdown * self.stats.baseline:
+			logger.warning(f"{self.device_name} trips take {self.stats.recent:.2f}s, baseline {self.stats.baseline:.2f}s")
+			return True
+		return False
+
+	def _clear(self) -> None:
+		self._latencies.clear()
+		self._outcomes.clear()
+		self.stats.recent = None
+		self.stats.error_rate = 0.0
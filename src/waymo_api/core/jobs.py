@@ -0,0 +1,131 @@
+import time
+import sqlite3
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Optional, List, Dict, Iterator, Tuple
+
+from .models import TripResult
+from .exceptions import WaymoClientError
+
+from ..utils.logger import get_logger
+logger = get_logger(__name__)
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+class JobJournal:
+	"""Durable record of a batch job's planned pairs and their status, stored in SQLite"""
+
+	def __init__(self, path: str):
+		self.path = Path(path)
+		# Callers sharing a journal across threads serialize access themselves
+		self._conn = sqlite3.connect(self.path, check_same_thread=False)
+		self._conn.execute('PRAGMA journal_mode=WAL')
+		self._conn.execute('''
+			CREATE TABLE IF NOT EXISTS pairs (
+				id INTEGER PRIMARY KEY,
+				pickup TEXT NOT NULL,
+				dropoff TEXT NOT NULL,
+				status TEXT NOT NULL DEFAULT 'pending',
+				attempts INTEGER NOT NULL DEFAULT 0,
+				last_error TEXT,
+				updated_at REAL
+			)
+		''')
+		self._conn.execute('CREATE INDEX IF NOT EXISTS pairs_status ON pairs (status, attempts)')
+		self._conn.commit()
+
+	def is_planned(self) -> bool:
+		return self._conn.execute('SELECT 1 FROM pairs LIMIT 1').fetchone() is not None
+
+	def plan(self, trips: List[Dict[str, str]]) -> None:
+		"""Store the planned pairs. A journal can only be planned once"""
+		if self.is_planned():
+			raise WaymoClientError(f"Job journal {self.path} already has planned pairs")
+		with self._conn:
+			self._conn.executemany(
+				'INSERT INTO pairs (pickup, dropoff, updated_at) VALUES (?, ?, ?)',
+				[(trip["pickup"], trip["dropoff"], time.time()) for trip in trips]
+			)
+
+	def runnable(self, max_attempts: int) -> List[Tuple[int, str, str]]:
+		"""Pending pairs plus failed pairs that still have attempts left, in planned order"""
+		return self._conn.execute(
+			'SELECT id, pickup, dropoff FROM pairs WHERE status = ? OR (status = ? AND attempts < ?) ORDER BY id',
+			(PENDING, FAILED, max_attempts)
+		).fetchall()
+
+	def get(self, pair_id: int) -> Optional[Tuple[str, str, str, int]]:
+		"""(pickup, dropoff, status, attempts) of a pair, or None if it is not in the journal"""
+		return self._conn.execute('SELECT pickup, dropoff, status, attempts FROM pairs WHERE id = ?', (pair_id,)).fetchone()
+
+	def mark_done(self, pair_id: int) -> None:
+		with self._conn:
+			self._conn.execute(
+				'UPDATE pairs SET status = ?, attempts = attempts + 1, last_error = NULL, updated_at = ? WHERE id = ?',
+				(DONE, time.time(), pair_id)
+			)
+
+	def mark_failed(self, pair_id: int, error: str) -> None:
+		with self._conn:
+			self._conn.execute(
+				'UPDATE pairs SET status = ?, attempts = attempts + 1, last_error = ?, updated_at = ? WHERE id = ?',
+				(FAILED, error, time.time(), pair_id)
+			)
+
+	def counts(self) -> Dict[str, int]:
+		counts = {PENDING: 0, DONE: 0, FAILED: 0}
+		for status, count in self._conn.execute('SELECT status, COUNT(*) FROM pairs GROUP BY status'):
+			counts[status] = count
+		return counts
+
+	def close(self) -> None:
+		self._conn.close()
+
+class BatchJob:
+	"""Runs the pairs in a JobJournal through a client, resuming wherever the last run stopped.
+
+	Failed pairs are retried in later rounds until they succeed or reach
+	`max_attempts`. Every result is journaled before it is yielded, so an
+	interrupted run loses at most the trip in progress.
+	"""
+
+	def __init__(self, journal_path: str, max_attempts: int = 3):
+		self.journal = JobJournal(journal_path)
+		self.max_attempts = max_attempts
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.journal.close()
+
+	def plan(self, trips: List[Dict[str, str]]) -> None:
+		self.journal.plan(trips)
+
+	def is_planned(self) -> bool:
+		return self.journal.is_planned()
+
+	def run(self, client) -> Iterator[TripResult]:
+		"""Yield results for every runnable pair. `client` needs `iter_trip_info(trips)`"""
+		while True:
+			pairs = self.journal.runnable(self.max_attempts)
+			if not pairs:
+				break
+			logger.info(f"Running {len(pairs)} pairs ({self.journal.counts()})")
+
+			ids_by_pair = defaultdict(deque)
+			for pair_id, pickup, dropoff in pairs:
+				ids_by_pair[(pickup, dropoff)].append(pair_id)
+			trips = [{"pickup": pickup, "dropoff": dropoff} for _, pickup, dropoff in pairs]
+
+			for result in client.iter_trip_info(trips):
+				pair_id = ids_by_pair[(result.pickup, result.dropoff)].popleft()
+				if result.success:
+					self.journal.mark_done(pair_id)
+				else:
+					self.journal.mark_failed(pair_id, result.error)
+				yield result
+
+		logger.info(f"Job finished: {self.journal.counts()}")
@@ -1,32 +1,94 @@
 from datetime import datetime
-from dataclasses import dataclass
+from typing import Optional, Dict, Any
+from dataclasses import dataclass, asdict
 
-@dataclass
+import pytz
+
+@dataclass(slots=True)
 class TimeInfo:
-	value: datetime
-	time_zone: str
+	value: datetime # aware, in the service area's time zone
+	time_zone: str # IANA name, e.g. 'America/Los_Angeles'
 
-@dataclass
+	def to_dict(self) -> Dict[str, Any]:
+		return {"value": self.value.isoformat(), "time_zone": self.time_zone}
+
+	@classmethod
+	def from_dict(cls, data: Dict[str, Any]) -> "TimeInfo":
+		value = datetime.fromisoformat(data["value"]).astimezone(pytz.timezone(data["time_zone"]))
+		return cls(value, data["time_zone"])
+
+@dataclass(slots=True)
 class LocationInfo:
 	address: str
 	city: str
+	selected_title: Optional[str] = None # search result the client tapped for this address
 
-@dataclass
+@dataclass(slots=True)
 class PriceInfo:
 	value: float
 	currency: str
+	estimated: bool = False # predicted by the estimation model rather than read from the app
+	std: Optional[float] = None # predictive standard deviation of estimated prices
 
-@dataclass
+@dataclass(slots=True)
 class WayPoint:
 	location: LocationInfo
 	time: TimeInfo
 	wait_time: int # minutes (0 for dropoff)
 
+	def to_dict(self) -> Dict[str, Any]:
+		return {"location": asdict(self.location), "time": self.time.to_dict(), "wait_time": self.wait_time}
 
+	@classmethod
+	def from_dict(cls, data: Dict[str, Any]) -> "WayPoint":
+		return cls(LocationInfo(**data["location"]), TimeInfo.from_dict(data["time"]), data["wait_time"])
 
-@dataclass
+@dataclass(slots=True)
 class TripInfo:
 	current_datetime: TimeInfo
 	price: PriceInfo
 	pickup: WayPoint
-	dropoff: WayPoint
\ No newline at end of file
+	dropoff: WayPoint
+	city: str
+	duration: int # minutes
+
+	def to_dict(self) -> Dict[str, Any]:
+		"""JSON-ready form, with datetimes as ISO 8601 strings"""
+		return {
+			"city": self.city,
+			"current_datetime": self.current_datetime.to_dict(),
+			"price": asdict(self.price),
+			"pickup": self.pickup.to_dict(),
+			"dropoff": self.dropoff.to_dict(),
+			"duration": self.duration,
+		}
+
+	@classmethod
+	def from_dict(cls, data: Dict[str, Any]) -> "TripInfo":
+		return cls(
+			current_datetime=TimeInfo.from_dict(data["current_datetime"]),
+			price=PriceInfo(**data["price"]),
+			pickup=WayPoint.from_dict(data["pickup"]),
+			dropoff=WayPoint.from_dict(data["dropoff"]),
+			city=data["city"],
+			duration=data["duration"],
+		)
+
+@dataclass
+class TripResult:
+	pickup: str
+	dropoff: str
+	trip_info: Optional[TripInfo] = None
+	error: Optional[str] = None
+
+	@property
+	def success(self) -> bool:
+		return self.error is None
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {
+			"pickup": self.pickup,
+			"dropoff": self.dropoff,
+			"trip_info": self.trip_info.to_dict() if self.trip_info is not None else None,
+			"error": self.error,
+		}
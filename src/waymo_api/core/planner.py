@@ -0,0 +1,21 @@
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple
+
+@dataclass
+class DropoffGroup:
+	dropoff: str
+	pickups: List[Tuple[int, str]] = field(default_factory=list) # (input index, pickup)
+
+def plan_trip_batches(trips: List[Dict[str, str]]) -> List[DropoffGroup]:
+	"""Group trips by dropoff so each dropoff is entered once per group.
+
+	Groups keep the order in which their dropoff first appears, and each pickup
+	keeps its index into `trips` so results can be put back in input order.
+	"""
+	groups: Dict[str, DropoffGroup] = {}
+	for index, trip in enumerate(trips):
+		dropoff = trip["dropoff"]
+		if dropoff not in groups:
+			groups[dropoff] = DropoffGroup(dropoff)
+		groups[dropoff].pickups.append((index, trip["pickup"]))
+	return list(groups.values())
@@ -0,0 +1,275 @@
+import time
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Iterator, Deque, Set, Tuple, Callable
+from concurrent.futures import Future, as_completed
+
+from .client import WaymoClient
+from .models import TripInfo, TripResult
+from .exceptions import WaymoClientError, SessionError, DeadlineExceededError
+
+from ..utils.logger import get_logger
+logger = get_logger(__name__)
+
+@dataclass
+class DeviceConfig:
+	device_name: str
+	server_url: str = 'http://localhost:4723'
+	system_port: Optional[int] = None
+
+def default_devices(count: int) -> List[DeviceConfig]:
+	"""Device configs for `count` local emulators, each with its own Appium server"""
+	return [
+		DeviceConfig(
+			device_name=f"emulator-{5554 + 2 * i}",
+			server_url=f"http://localhost:{4723 + i}",
+			system_port=8200 + i
+		)
+		for i in range(count)
+	]
+
+@dataclass
+class PoolTask:
+	future: Future
+	pickup: str
+	dropoff: str
+	tried: Set[str] = field(default_factory=set) # devices that already failed this trip
+	error: Optional[Exception] = None # last failure, reported once no other device can retry the trip
+	deadline: Optional[Callable[[], float]] = None # monotonic time after which the trip is no longer wanted
+
+class WaymoClientPool:
+	"""Runs trips across several devices, handing each trip to whichever device is free.
+
+	A failed trip is retried once on another device. Only session errors, from a
+	device the client could not recover, count toward retiring a device, so trips
+	that fail because of their place names never take a healthy device out. Trips
+	whose deadline has passed fail instead of being run or retried.
+	"""
+
+	def __init__(self, devices: List[DeviceConfig], timeout: int = 5, max_consecutive_failures: int = 3):
+		if not devices:
+			raise WaymoClientError("WaymoClientPool needs at least one device")
+		self.devices = devices
+		self.timeout = timeout
+		self.max_consecutive_failures = max_consecutive_failures # session failures in a row before a device is retired
+		self._pending: Deque[PoolTask] = deque()
+		self._condition = threading.Condition()
+		self._threads: List[threading.Thread] = []
+		self._active: Set[str] = set()
+		self._closed = False
+
+	def __enter__(self):
+		self.start()
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.close()
+
+	@property
+	def active_devices(self) -> int:
+		with self._condition:
+			return len(self._active)
+
+	def start(self) -> None:
+		"""Start one worker thread per device; each worker connects its own session"""
+		with self._condition:
+			self._active = {device.device_name for device in self.devices}
+		for device in self.devices:
+			thread = threading.Thread(
+				target=self._run_device,
+				args=(device,),
+				name=f"waymo-{device.device_name}",
+				daemon=True
+			)
+			thread.start()
+			self._threads.append(thread)
+
+	def submit(self, pickup: str, dropoff: str, deadline: Optional[Callable[[], float]] = None) -> Future:
+		"""Queue a trip and return a future resolving to its trip info.
+
+		`deadline` returns the monotonic time after which the trip is no longer
+		wanted. It is read again before each attempt, so callers may extend it.
+		"""
+		return self._submit(PoolTask(Future(), pickup, dropoff, deadline=deadline))
+
+	def get_trip_info(self, pickup: str, dropoff: str) -> TripInfo:
+		return self.submit(pickup, dropoff).result()
+
+	def map(self, trips: List[Dict[str, str]]) -> List[TripResult]:
+		"""Run trips across all devices and return results in input order"""
+		futures = [self._submit_trip(trip) for trip in trips]
+		results = []
+		for trip, future in zip(trips, futures):
+			try:
+				results.append(TripResult(trip["pickup"], trip["dropoff"], trip_info=future.result()))
+			except Exception as e:
+				results.append(TripResult(trip["pickup"], trip["dropoff"], error=str(e)))
+		return results
+
+	def iter_trip_info(self, trips: List[Dict[str, str]]) -> Iterator[TripResult]:
+		"""Run trips across all devices and yield results as they complete"""
+		futures = {self._submit_trip(trip): trip for trip in trips}
+		for future in as_completed(futures):
+			trip = futures[future]
+			try:
+				yield TripResult(trip["pickup"], trip["dropoff"], trip_info=future.result())
+			except Exception as e:
+				yield TripResult(trip["pickup"], trip["dropoff"], error=str(e))
+
+	def close(self) -> None:
+		"""Stop accepting trips, let workers finish queued ones and close all sessions"""
+		with self._condition:
+			if self._closed:
+				return
+			self._closed = True
+			self._condition.notify_all()
+		for thread in self._threads:
+			thread.join()
+
+	def _submit_trip(self, trip: Dict[str, str]) -> Future:
+		return self.submit(trip["pickup"], trip["dropoff"])
+
+	def _submit(self, task: PoolTask) -> Future:
+		with self._condition:
+			if self._closed:
+				raise WaymoClientError(f"{type(self).__name__} is closed")
+			if not self._active:
+				task.future.set_exception(WaymoClientError("No devices available in pool"))
+				return task.future
+			self._queue(task)
+		return task.future
+
+	def _queue(self, task: PoolTask) -> None:
+		"""Add a task to the queue; called with the condition held"""
+		if task.tried:
+			self._pending.appendleft(task) # retries go first
+		else:
+			self._pending.append(task)
+		self._condition.notify_all()
+
+	def _select(self, device_name: str) -> List[PoolTask]:
+		"""Pop the next tasks for a device, skipping trips it already failed; called with the condition held"""
+		for i, task in enumerate(self._pending):
+			if device_name not in task.tried:
+				del self._pending[i]
+				return [task]
+		return []
+
+	def _drain_orphans(self) -> List[PoolTask]:
+		"""Remove queued tasks no active device can still run; called with the condition held"""
+		orphans = [task for task in self._pending if not self._active - task.tried]
+		for task in orphans:
+			self._pending.remove(task)
+		return orphans
+
+	def _take(self, device_name: str) -> Optional[List[PoolTask]]:
+		"""Block until there is work for the device; None once closed and drained"""
+		with self._condition:
+			while True:
+				tasks = self._select(device_name)
+				if tasks:
+					return tasks
+				if self._closed:
+					return None
+				self._condition.wait()
+
+	def _create_client(self, device: DeviceConfig) -> WaymoClient:
+		return WaymoClient(
+			device_name=device.device_name,
+			timeout=self.timeout,
+			server_url=device.server_url,
+			system_port=device.system_port
+		)
+
+	def _run_tasks(self, client: WaymoClient, device: DeviceConfig, tasks: List[PoolTask]) -> Iterator[Tuple[PoolTask, TripResult]]:
+		"""Run a device's tasks, yielding each result. Raising means the session itself failed"""
+		for task in tasks:
+			if self._expire(task):
+				continue
+			try:
+				yield task, TripResult(task.pickup, task.dropoff, trip_info=client.get_trip_info(task.pickup, task.dropoff))
+			except SessionError:
+				raise
+			except WaymoClientError as e:
+				yield task, TripResult(task.pickup, task.dropoff, error=str(e))
+
+	def _run_device(self, device: DeviceConfig) -> None:
+		client = self._create_client(device)
+		try:
+			client.__enter__()
+		except Exception as e:
+			logger.error(f"Device {device.device_name} failed to start: {str(e)}")
+			self._retire_device(device)
+			return
+
+		session_failures = 0
+		try:
+			while session_failures < self.max_consecutive_failures:
+				tasks = self._take(device.device_name)
+				if tasks is None:
+					break
+				# Retried tasks are already running
+				tasks = [task for task in tasks if task.tried or task.future.set_running_or_notify_cancel()]
+				if not tasks:
+					continue
+				try:
+					for task, result in self._run_tasks(client, device, tasks):
+						if result.success:
+							task.future.set_result(result.trip_info)
+							session_failures = 0
+						else:
+							self._retry_or_fail(task, device, WaymoClientError(result.error))
+				except Exception as e:
+					session_failures += 1
+					logger.error(f"Session failure {session_failures} on {device.device_name}: {str(e)}")
+					error = e if isinstance(e, WaymoClientError) else WaymoClientError(str(e))
+					for task in tasks:
+						if not task.future.done():
+							self._retry_or_fail(task, device, error)
+			if session_failures >= self.max_consecutive_failures:
+				logger.error(f"Device {device.device_name} failed {session_failures} sessions in a row, removing it from pool")
+		finally:
+			try:
+				client.__exit__(None, None, None)
+			except Exception as e:
+				logger.error(f"Error closing device {device.device_name}: {str(e)}")
+			self._retire_device(device)
+
+	def _retry_or_fail(self, task: PoolTask, device: DeviceConfig, error: WaymoClientError) -> None:
+		"""Requeue a failed trip for a device that has not tried it yet, or fail it"""
+		if self._expire(task):
+			return
+		with self._condition:
+			task.tried.add(device.device_name)
+			task.error = error
+			retry = bool(self._active - task.tried)
+			if retry:
+				logger.info(f"Retrying {task.pickup} -> {task.dropoff} on another device after: {str(error)}")
+				self._queue(task)
+		if not retry:
+			task.future.set_exception(error)
+
+	def _expire(self, task: PoolTask) -> bool:
+		"""Fail a running task whose deadline has passed. Returns whether it did"""
+		if task.deadline is None:
+			return False
+		late = time.monotonic() - task.deadline()
+		if late < 0:
+			return False
+		task.future.set_exception(DeadlineExceededError(f"Deadline passed {late:.1f}s before the trip could run"))
+		return True
+
+	def _retire_device(self, device: DeviceConfig) -> None:
+		with self._condition:
+			self._active.discard(device.device_name)
+			remaining = len(self._active)
+			closed = self._closed
+			orphans = self._drain_orphans()
+			self._condition.notify_all()
+		for task in orphans:
+			# Untried tasks are still pending; tried ones are already running
+			if task.tried or task.future.set_running_or_notify_cancel():
+				task.future.set_exception(task.error or WaymoClientError("All devices in pool have failed"))
+		if not closed:
+			logger.warning(f"Device {device.device_name} retired, {remaining} device(s) left")
@@ -0,0 +1,79 @@
+import os
+import json
+import time
+import threading
+import urllib.request
+from pathlib import Path
+from typing import Optional, Dict
+
+from ..utils.logger import get_logger
+logger = get_logger(__name__)
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "waymo_api" / "devices.json"
+
+_file_lock = threading.Lock()
+
+def get_server_version(server_url: str, timeout: float = 2.0) -> Optional[str]:
+	"""Appium server build version from its /status endpoint, or None if unreachable"""
+	try:
+		with urllib.request.urlopen(f"{server_url}/status", timeout=timeout) as response:
+			return json.load(response)["value"]["build"]["version"]
+	except Exception as e:
+		logger.debug(f"Could not read Appium status from {server_url}: {str(e)}")
+		return None
+
+class ProvisioningCache:
+	"""Per-device provisioning state stored in a local JSON file.
+
+	A device is known-good once a full initialization has succeeded against the
+	same Appium server version; known-good devices can skip reinstalling the
+	UiAutomator2 server and device initialization on the next session.
+	"""
+
+	def __init__(self, path: Optional[str] = None):
+		self.path = Path(path) if path else DEFAULT_CACHE_PATH
+
+	def _key(self, device_name: str, server_url: str) -> str:
+		return f"{server_url}|{device_name}"
+
+	def _load(self) -> Dict[str, Dict]:
+		try:
+			return json.loads(self.path.read_text())
+		except FileNotFoundError:
+			return {}
+		except (OSError, ValueError) as e:
+			logger.warning(f"Ignoring unreadable provisioning cache {self.path}: {str(e)}")
+			return {}
+
+	def _save(self, devices: Dict[str, Dict]) -> None:
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+		tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+		tmp_path.write_text(json.dumps(devices, indent=2))
+		tmp_path.replace(self.path)
+
+	def get(self, device_name: str, server_url: str) -> Optional[Dict]:
+		with _file_lock:
+			return self._load().get(self._key(device_name, server_url))
+
+	def is_known_good(self, device_name: str, server_url: str, server_version: Optional[str]) -> bool:
+		state = self.get(device_name, server_url)
+		if not state or not state.get("initialized"):
+			return False
+		return server_version is not None and state.get("server_version") == server_version
+
+	def record_success(self, device_name: str, server_url: str, **info) -> None:
+		with _file_lock:
+			devices = self._load()
+			devices[self._key(device_name, server_url)] = {
+				**devices.get(self._key(device_name, server_url), {}),
+				**info,
+				"initialized": True,
+				"last_success": time.time(),
+			}
+			self._save(devices)
+
+	def invalidate(self, device_name: str, server_url: str) -> None:
+		with _file_lock:
+			devices = self._load()
+			if devices.pop(self._key(device_name, server_url), None) is not None:
+				self._save(devices)
@@ -0,0 +1,167 @@
+from collections import deque, Counter
+from dataclasses import dataclass, field
+from concurrent.futures import Future
+from typing import Optional, List, Dict, Deque, Iterator, Tuple, Callable
+
+from .client import WaymoClient
+from .pool import WaymoClientPool, DeviceConfig, PoolTask
+from .models import TripInfo, TripResult
+from ..locations.gazetteer import Gazetteer
+from ..locations.service_areas import ServiceArea, SERVICE_AREAS, get_service_area
+
+from ..utils.logger import get_logger
+logger = get_logger(__name__)
+
+@dataclass
+class RegionTask(PoolTask):
+	area: Optional[ServiceArea] = None
+
+@dataclass
+class RegionStats:
+	switches: int = 0 # device location changes
+	trips: Dict[str, int] = field(default_factory=Counter) # completed trips per area code
+
+class RegionScheduler(WaymoClientPool):
+	"""Runs trips from several service areas on a device pool, moving devices as rarely as possible.
+
+	Trips are queued per service area. A device keeps taking work from the area it
+	is already in and only moves when that queue is empty, to the area with the
+	most pending trips per device already serving it. Each hand-off is a batch of
+	trips sharing a dropoff, so the dropoff is entered once per batch. Retries and
+	device retirement work as in WaymoClientPool.
+	"""
+
+	def __init__(
+		self,
+		devices: List[DeviceConfig],
+		timeout: int = 5,
+		gazetteer: Optional[Gazetteer] = None,
+		default_area: str = "SF",
+		max_batch: int = 8,
+		location_settle_time: float = 3.0,
+		max_consecutive_failures: int = 3
+	):
+		super().__init__(devices, timeout, max_consecutive_failures)
+		self.gazetteer = gazetteer
+		self.default_area = get_service_area(default_area)
+		self.max_batch = max_batch
+		self.location_settle_time = location_settle_time
+		self.stats = RegionStats()
+		self._pending: Dict[str, Deque[RegionTask]] = {code: deque() for code in SERVICE_AREAS}
+		self._device_areas: Dict[str, Optional[str]] = {}
+
+	def area_for(self, trip: Dict[str, str]) -> ServiceArea:
+		"""The trip's "region" if given, else the gazetteer city of its pickup, else the default area"""
+		if trip.get("region"):
+			return get_service_area(trip["region"])
+		if self.gazetteer is not None:
+			match = self.gazetteer.resolve(trip["pickup"])
+			if match and match.place.city.upper() in SERVICE_AREAS:
+				return SERVICE_AREAS[match.place.city.upper()]
+		return self.default_area
+
+	def submit(
+		self,
+		pickup: str,
+		dropoff: str,
+		region: Optional[str] = None,
+		deadline: Optional[Callable[[], float]] = None
+	) -> Future:
+		"""Queue a trip and return a future resolving to its trip info (see WaymoClientPool.submit)"""
+		area = self.area_for({"pickup": pickup, "dropoff": dropoff, "region": region})
+		return self._submit(RegionTask(Future(), pickup, dropoff, deadline=deadline, area=area))
+
+	def get_trip_info(self, pickup: str, dropoff: str, region: Optional[str] = None) -> TripInfo:
+		return self.submit(pickup, dropoff, region).result()
+
+	def pending(self) -> Dict[str, int]:
+		with self._condition:
+			return {code: len(tasks) for code, tasks in self._pending.items() if tasks}
+
+	def _submit_trip(self, trip: Dict[str, str]) -> Future:
+		return self.submit(trip["pickup"], trip["dropoff"], trip.get("region"))
+
+	def _queue(self, task: RegionTask) -> None:
+		tasks = self._pending[task.area.code]
+		if task.tried:
+			tasks.appendleft(task) # retries go first
+		else:
+			tasks.append(task)
+		self._condition.notify_all()
+
+	def _choose_area(self, device_name: str) -> Optional[str]:
+		waiting = Counter(
+			code for code, tasks in self._pending.items() for task in tasks if device_name not in task.tried
+		)
+		if not waiting:
+			return None
+		current = self._device_areas.get(device_name)
+		if current in waiting:
+			return current
+		serving = Counter(code for name, code in self._device_areas.items() if code and name != device_name)
+		return max(waiting, key=lambda code: waiting[code] / (serving[code] + 1))
+
+	def _select(self, device_name: str) -> List[RegionTask]:
+		"""Pop a batch of trips sharing a dropoff from the device's area, skipping trips it already failed"""
+		code = self._choose_area(device_name)
+		self._device_areas[device_name] = code
+		if code is None:
+			return []
+		batch: List[RegionTask] = []
+		rest: Deque[RegionTask] = deque()
+		for task in self._pending[code]:
+			if device_name not in task.tried and len(batch) < self.max_batch and (not batch or task.dropoff == batch[0].dropoff):
+				batch.append(task)
+			else:
+				rest.append(task)
+		self._pending[code] = rest
+		return batch
+
+	def _drain_orphans(self) -> List[RegionTask]:
+		orphans = []
+		for code, tasks in self._pending.items():
+			runnable = deque(task for task in tasks if self._active - task.tried)
+			orphans.extend(task for task in tasks if not self._active - task.tried)
+			self._pending[code] = runnable
+		return orphans
+
+	def _create_client(self, device: DeviceConfig) -> WaymoClient:
+		return WaymoClient(
+			device_name=device.device_name,
+			timeout=self.timeout,
+			server_url=device.server_url,
+			system_port=device.system_port,
+			location_settle_time=self.location_settle_time
+		)
+
+	def _run_tasks(self, client: WaymoClient, device: DeviceConfig, tasks: List[RegionTask]) -> Iterator[Tuple[RegionTask, TripResult]]:
+		area = tasks[0].area
+		# The device's location is unknown until this client has set it
+		if client.service_area != area:
+			client.set_service_area(area)
+			with self._condition:
+				self.stats.switches += 1
+		started: Deque[RegionTask] = deque()
+
+		def pickups() -> Iterator[str]:
+			# Read by the client just before each trip, so expired trips are skipped mid-batch
+			for task in tasks:
+				if not self._expire(task):
+					started.append(task)
+					yield task.pickup
+
+		results = client.iter_trip_infos_for_dropoff(tasks[0].dropoff, pickups())
+		try:
+			for result in results:
+				task = started.popleft()
+				if result.success:
+					with self._condition:
+						self.stats.trips[area.code] += 1
+				yield task, result
+		finally:
+			results.close() # sends the app home from the trip screen
+
+	def _retire_device(self, device: DeviceConfig) -> None:
+		with self._condition:
+			self._device_areas.pop(device.device_name, None)
+		super()._retire_device(device)
@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Callable
+
+from .model import PriceModel
+from ..core.models import TripInfo, TripResult, TimeInfo, LocationInfo, PriceInfo, WayPoint
+from ..core.exceptions import WaymoClientError
+from ..locations.gazetteer import Gazetteer, Place
+from ..locations.service_areas import ServiceArea, DEFAULT_SERVICE_AREA
+
+from ..utils.logger import get_logger
+logger = get_logger(__name__)
+
+@dataclass
+class EstimationStats:
+	estimated: int = 0
+	live: int = 0 # pairs that were too uncertain and went to the live client
+	unresolved: int = 0 # live queries for names the gazetteer could not place
+
+class EstimatingClient:
+	"""Answers trip info from a PriceModel, querying the live client only when needed.
+
+	A pair is estimated when both names match gazetteer places with a score of at
+	least `min_match_score` (1.0, an exact normalized match, by default) and the
+	predicted price standard deviation is at most `max_price_std`. Otherwise it
+	goes to the wrapped client (anything exposing `get_trip_info(pickup, dropoff)`,
+	and batched through its `get_trip_infos(trips)` when it has one), so a
+	near-miss name is never priced as a different place. Estimated trip info
+	is labelled with `service_area` and has `price.estimated` set and the standard
+	deviation in `price.std`.
+	"""
+
+	def __init__(
+		self,
+		client,
+		model: PriceModel,
+		gazetteer: Gazetteer,
+		max_price_std: float = 1.5,
+		service_area: Optional[ServiceArea] = None,
+		min_match_score: float = 1.0,
+		clock: Optional[Callable[[], datetime]] = None
+	):
+		self.client = client
+		self.model = model
+		self.gazetteer = gazetteer
+		self.max_price_std = max_price_std
+		self.service_area = service_area or DEFAULT_SERVICE_AREA
+		self.min_match_score = min_match_score
+		self.clock = clock or self.service_area.now # naive service area time
+		self.stats = EstimationStats()
+
+	def get_trip_info(self, pickup: str, dropoff: str) -> TripInfo:
+		result = self.get_trip_infos([{"pickup": pickup, "dropoff": dropoff}])[0]
+		if not result.success:
+			raise WaymoClientError(result.error)
+		return result.trip_info
+
+	def get_trip_infos(self, trips: List[Dict[str, str]]) -> List[TripResult]:
+		"""Estimate every trip in one batch and query the uncertain ones live, in input order"""
+		now = self.clock()
+		results: List[Optional[TripResult]] = [None] * len(trips)
+
+		resolved = []
+		for index, trip in enumerate(trips):
+			pickup = self._place(trip["pickup"])
+			dropoff = self._place(trip["dropoff"])
+			if pickup and dropoff:
+				resolved.append((index, pickup, dropoff))
+			else:
+				self.stats.unresolved += 1
+
+		if resolved and self.model.is_fitted:
+			estimates = self.model.predict_places([r[1] for r in resolved], [r[2] for r in resolved], now.hour)
+			for k, (index, _, _) in enumerate(resolved):
+				if estimates.price_std[k] > self.max_price_std:
+					continue
+				trip = trips[index]
+				trip_info = self._estimated_trip_info(
+					trip["pickup"], trip["dropoff"], now,
+					float(estimates.price[k]), float(estimates.price_std[k]),
+					float(estimates.wait_time_mins[k]), float(estimates.duration_mins[k])
+				)
+				results[index] = TripResult(trip["pickup"], trip["dropoff"], trip_info=trip_info)
+				self.stats.estimated += 1
+
+		live = [index for index, result in enumerate(results) if result is None]
+		self.stats.live += len(live)
+		for index, result in zip(live, self._query_live([trips[index] for index in live])):
+			results[index] = result
+		return results
+
+	def _query_live(self, trips: List[Dict[str, str]]) -> List[TripResult]:
+		if not trips:
+			return []
+		if hasattr(self.client, "get_trip_infos"):
+			# One batch, so the wrapped client can share entered dropoffs between trips
+			return self.client.get_trip_infos(trips)
+		results = []
+		for trip in trips:
+			try:
+				trip_info = self.client.get_trip_info(trip["pickup"], trip["dropoff"])
+				results.append(TripResult(trip["pickup"], trip["dropoff"], trip_info=trip_info))
+			except WaymoClientError as e:
+				results.append(TripResult(trip["pickup"], trip["dropoff"], error=str(e)))
+		return results
+
+	def _place(self, text: str) -> Optional[Place]:
+		if self.min_match_score >= 1.0:
+			return self.gazetteer.lookup(text)
+		match = self.gazetteer.resolve(text, self.min_match_score)
+		# resolve() returns unique prefixes at 0.95 whatever min_score is
+		return match.place if match and match.score >= self.min_match_score else None
+
+	def _estimated_trip_info(self, pickup: str, dropoff: str, now: datetime, price: float, price_std: float, wait_mins: float, duration_mins: float) -> TripInfo:
+		"""Trip info straight from the model output, `now` being naive service area time"""
+		city = self.service_area.code
+		tz = self.service_area.tz
+		time_zone = self.service_area.time_zone
+		current_datetime = tz.localize(now)
+		pickup_datetime = tz.normalize(current_datetime + timedelta(minutes=wait_mins))
+		dropoff_datetime = tz.normalize(pickup_datetime + timedelta(minutes=duration_mins))
+		return TripInfo(
+			current_datetime=TimeInfo(current_datetime, time_zone),
+			price=PriceInfo(max(price, 0.0), "USD", estimated=True, std=price_std),
+			pickup=WayPoint(LocationInfo(pickup, city), TimeInfo(pickup_datetime, time_zone), round(wait_mins)),
+			dropoff=WayPoint(LocationInfo(dropoff, city), TimeInfo(dropoff_datetime, time_zone), 0),
+			city=city,
+			duration=round(duration_mins)
+		)
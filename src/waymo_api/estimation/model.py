@@ -0,0 +1,158 @@
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Sequence
+
+import numpy as np
+
+from ..locations.gazetteer import Place
+from ..locations.coverage import haversine_km
+from ..core.exceptions import WaymoClientError
+
+from ..utils.logger import get_logger
+logger = get_logger(__name__)
+
+TARGETS = ('price', 'duration_mins', 'wait_time_mins')
+
+@dataclass
+class PriceEstimates:
+	"""Batched predictions; every field is an array with one entry per requested pair"""
+	price: np.ndarray
+	price_std: np.ndarray # predictive standard deviation of the price
+	duration_mins: np.ndarray
+	wait_time_mins: np.ndarray
+	distance_km: np.ndarray
+
+	def __len__(self) -> int:
+		return len(self.price)
+
+class PriceModel:
+	"""Ridge regression of price, trip duration and pickup wait on pair features.
+
+	Features are the haversine distance (and its square), hour of day, and pickup
+	and dropoff neighborhoods, all one-hot encoded except distance. The three
+	targets share one solve. Uncertainty is the ridge predictive standard
+	deviation, sigma * sqrt(1 + x' A^-1 x), so it grows for pairs unlike the
+	training data; an unseen neighborhood contributes no effect.
+	"""
+
+	def __init__(self, alpha: float = 1.0):
+		self.alpha = alpha
+		self.pickup_neighborhoods: Dict[str, int] = {}
+		self.dropoff_neighborhoods: Dict[str, int] = {}
+		self.weights: Optional[np.ndarray] = None # (features, targets)
+		self.covariance: Optional[np.ndarray] = None # A^-1
+		self.sigma: Optional[np.ndarray] = None # residual standard deviation per target
+		self.samples = 0
+
+	@property
+	def is_fitted(self) -> bool:
+		return self.weights is not None
+
+	def _design(self, distance_km: np.ndarray, hours: np.ndarray, pickup_neighborhoods: Sequence[str], dropoff_neighborhoods: Sequence[str]) -> np.ndarray:
+		n = len(distance_km)
+		pickup_offset = 3 + 24
+		dropoff_offset = pickup_offset + len(self.pickup_neighborhoods)
+		X = np.zeros((n, dropoff_offset + len(self.dropoff_neighborhoods)))
+		rows = np.arange(n)
+		X[:, 0] = 1.0
+		X[:, 1] = distance_km
+		X[:, 2] = distance_km ** 2 / 10
+		X[rows, 3 + np.asarray(hours, dtype=np.int64) % 24] = 1.0
+
+		for offset, vocabulary, names in (
+			(pickup_offset, self.pickup_neighborhoods, pickup_neighborhoods),
+			(dropoff_offset, self.dropoff_neighborhoods, dropoff_neighborhoods),
+		):
+			columns = np.fromiter((vocabulary.get(name, -1) for name in names), dtype=np.int64, count=n)
+			known = columns >= 0
+			X[rows[known], offset + columns[known]] = 1.0
+		return X
+
+	def fit(self, observations: List[Dict[str, Any]]) -> 'PriceModel':
+		"""Fit on price store rows (see PriceStore.observations)"""
+		if not observations:
+			raise WaymoClientError("Cannot fit a price model without observations")
+		self.pickup_neighborhoods = {name: i for i, name in enumerate(sorted({o['pickup_neighborhood'] or '' for o in observations}))}
+		self.dropoff_neighborhoods = {name: i for i, name in enumerate(sorted({o['dropoff_neighborhood'] or '' for o in observations}))}
+
+		distance = haversine_km(
+			[o['pickup_latitude'] for o in observations], [o['pickup_longitude'] for o in observations],
+			[o['dropoff_latitude'] for o in observations], [o['dropoff_longitude'] for o in observations]
+		)
+		hours = [o['local_hour'] for o in observations] # hour of day in the service area
+		X = self._design(
+			distance, hours,
+			[o['pickup_neighborhood'] or '' for o in observations],
+			[o['dropoff_neighborhood'] or '' for o in observations]
+		)
+		Y = np.array([[o[target] or 0 for target in TARGETS] for o in observations], dtype=np.float64)
+
+		penalty = np.full(X.shape[1], self.alpha)
+		penalty[0] = 0.0 # the intercept is not shrunk
+		A = X.T @ X + np.diag(penalty)
+		self.covariance = np.linalg.pinv(A)
+		self.weights = self.covariance @ (X.T @ Y)
+
+		residuals = Y - X @ self.weights
+		dof = max(len(X) - float(np.trace(self.covariance @ (X.T @ X))), 1.0)
+		self.sigma = np.sqrt((residuals ** 2).sum(axis=0) / dof)
+		self.samples = len(X)
+		logger.info(f"Fitted price model on {self.samples} observations (price sigma ${self.sigma[0]:.2f})")
+		return self
+
+	def predict(
+		self,
+		pickup_latitudes, pickup_longitudes,
+		dropoff_latitudes, dropoff_longitudes,
+		pickup_neighborhoods: Sequence[str],
+		dropoff_neighborhoods: Sequence[str],
+		hours
+	) -> PriceEstimates:
+		if not self.is_fitted:
+			raise WaymoClientError("Price model is not fitted")
+		distance = haversine_km(pickup_latitudes, pickup_longitudes, dropoff_latitudes, dropoff_longitudes)
+		hours = np.broadcast_to(np.asarray(hours, dtype=np.int64), distance.shape)
+		X = self._design(distance, hours, pickup_neighborhoods, dropoff_neighborhoods)
+		predicted = X @ self.weights
+		leverage = np.einsum('ij,ij->i', X @ self.covariance, X)
+		return PriceEstimates(
+			price=predicted[:, 0],
+			price_std=self.sigma[0] * np.sqrt(1.0 + leverage),
+			duration_mins=np.maximum(predicted[:, 1], 0.0),
+			wait_time_mins=np.maximum(predicted[:, 2], 0.0),
+			distance_km=distance
+		)
+
+	def predict_places(self, pickups: Sequence[Place], dropoffs: Sequence[Place], hours) -> PriceEstimates:
+		"""Predict for parallel sequences of places, with one hour or one hour per pair"""
+		return self.predict(
+			[p.latitude for p in pickups], [p.longitude for p in pickups],
+			[p.latitude for p in dropoffs], [p.longitude for p in dropoffs],
+			[p.neighborhood for p in pickups], [p.neighborhood for p in dropoffs],
+			hours
+		)
+
+	def save(self, path: str) -> None:
+		if not self.is_fitted:
+			raise WaymoClientError("Price model is not fitted")
+		np.savez(
+			path,
+			alpha=self.alpha,
+			weights=self.weights,
+			covariance=self.covariance,
+			sigma=self.sigma,
+			samples=self.samples,
+			pickup_neighborhoods=np.array(sorted(self.pickup_neighborhoods, key=self.pickup_neighborhoods.get), dtype=str),
+			dropoff_neighborhoods=np.array(sorted(self.dropoff_neighborhoods, key=self.dropoff_neighborhoods.get), dtype=str)
+		)
+
+	@classmethod
+	def load(cls, path: str) -> 'PriceModel':
+		with np.load(path) as data:
+			model = cls(alpha=float(data['alpha']))
+			model.weights = data['weights']
+			model.covariance = data['covariance']
+			model.sigma = data['sigma']
+			model.samples = int(data['samples'])
+			model.pickup_neighborhoods = {str(name): i for i, name in enumerate(data['pickup_neighborhoods'])}
+			model.dropoff_neighborhoods = {str(name): i for i, name in enumerate(data['dropoff_neighborhoods'])}
+		return model
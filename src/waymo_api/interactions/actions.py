@@ -1,96 +1,187 @@
+import base64
+from typing import Optional, Callable
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
-from appium.webdriver.common.appiumby import AppiumBy
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from .waits import AdaptiveWait, Locator
+from .locators import LocatorRegistry, TARGETS
 from ..core.exceptions import WaymoClientError
 
+from ..utils.metrics import timed
 from ..utils.logger import get_logger
 logger = get_logger(__name__)
 
+# Preferred strategy per target; WaymoActions re-ranks them through a LocatorRegistry
+BACK_BUTTON = TARGETS["back_button"][0]
+SEARCH_BOX = TARGETS["search_box"][0]
+DROPOFF_INPUT = TARGETS["dropoff_input"][0]
+PICKUP_INPUT = TARGETS["pickup_input"][0]
+RESULT_TITLE = TARGETS["result_title"][0]
+FIRST_RESULT = TARGETS["first_result"][0]
+CONFIRM_BUTTON = TARGETS["confirm_button"][0]
+PICKUP_WAYPOINT = TARGETS["pickup_waypoint"][0]
+FARE_ESTIMATE = TARGETS["fare_estimate"][0]
+DEFAULT_TIMEOUT = 5
+
+KEYCODE_PASTE = 279
+# "set_value" replaces the field text in one call, "clipboard" pastes it,
+# "send_keys" types character by character like a user
+INPUT_MODES = ("set_value", "clipboard", "send_keys")
+
 class WaymoActions:
-	def __init__(self, driver, wait):
+	def __init__(
+		self,
+		driver,
+		wait,
+		waiter: Optional[AdaptiveWait] = None,
+		device_name: Optional[str] = None,
+		locators: Optional[LocatorRegistry] = None,
+		input_mode: str = "set_value"
+	):
+		if input_mode not in INPUT_MODES:
+			raise ValueError(f"input_mode must be one of {', '.join(INPUT_MODES)}")
 		self.driver = driver
 		self.wait = wait
+		self.device_name = device_name
+		self.waiter = waiter or AdaptiveWait(driver, DEFAULT_TIMEOUT)
+		self.locators = locators or LocatorRegistry()
+		self.input_mode = input_mode
+
+	def _find(self, step: str, target: str, condition: Callable[[Locator], Callable] = EC.presence_of_element_located):
+		"""Wait for a target with its best ranked strategy, falling back to the others.
+
+		The first sighting of a target calibrates its strategies, so later lookups
+		use the fastest one that works on this app version.
+		"""
+		ranked = self.locators.ranked(target)
+		try:
+			element = self.waiter.until(step, condition(ranked[0]))
+		except TimeoutException:
+			for locator in ranked[1:]:
+				try:
+					elements = self.driver.find_elements(*locator)
+				except WebDriverException:
+					continue
+				if elements:
+					logger.warning(f"{target} not found by {ranked[0][0]}, found by {locator[0]}")
+					self.locators.demote(target, ranked[0])
+					return elements[0]
+			raise
+		if not self.locators.is_calibrated(target):
+			self.locators.calibrate(self.driver, target)
+		return element
+
+	def _type(self, element, text: str) -> None:
+		"""Replace a search field's text using the configured input mode"""
+		if self.input_mode != "send_keys":
+			try:
+				if self.input_mode == "set_value":
+					self.driver.execute_script('mobile: replaceElementValue', {'elementId': element.id, 'text': text})
+				else:
+					content = base64.b64encode(text.encode('utf-8')).decode('ascii')
+					self.driver.execute_script('mobile: setClipboard', {'content': content, 'contentType': 'plaintext'})
+					element.clear()
+					self.driver.execute_script('mobile: pressKey', {'keycode': KEYCODE_PASTE})
+				return
+			except WebDriverException as e:
+				logger.warning(f"{self.input_mode} input failed, falling back to send_keys: {str(e)}")
+		element.clear()
+		element.send_keys(text)
 
+	@timed("return_to_home_screen")
 	def return_to_home_screen(self):
 		try:
 			logger.info("Returning to home screen...")
-			back_button = self.wait.until(EC.element_to_be_clickable(
-				(AppiumBy.ACCESSIBILITY_ID, "Back")
-			))
+			back_button = self._find("back_button", "back_button", EC.element_to_be_clickable)
 			back_button.click()
 			logger.info("Successfully returned to home screen")
 		except TimeoutException as e:
 			logger.error(f"Failed to return to home screen: {str(e)}")
 			raise WaymoClientError("Could not return to home screen")
 	
-	def _handle_multiple_points(self) -> None:
-		"""Handle multiple pickup/dropoff points screen"""
+	def wait_for_home_screen(self):
+		"""Wait until the home screen's search box shows, e.g. after the app was restarted"""
+		return self._find("home_screen", "search_box")
+
+	@timed("handle_multiple_points")
+	def _handle_multiple_points(self, step: str, next_target: str) -> None:
+		"""Handle multiple pickup/dropoff points screen.
+
+		Races the confirm button against the element of the screen that normally
+		follows, so the common no-confirm case returns as soon as that screen shows.
+		The confirm button only wins once it is clickable, not while it animates in.
+		"""
 		try:
-			quick_wait = WebDriverWait(self.driver, 2)
-			confirm_button = quick_wait.until(EC.element_to_be_clickable((AppiumBy.ID, "com.waymo.carapp:id/confirm_button")))
-			confirm_button.click()
-			logger.info("Multiple points screen handled")
+			name, element = self.waiter.until_any(
+				f"{step}_next_screen",
+				{"confirm": self.locators.best("confirm_button"), "next": self.locators.best(next_target)},
+				conditions={"confirm": EC.element_to_be_clickable}
+			)
+			if name == "confirm":
+				element.click()
+				logger.info("Multiple points screen handled")
 		except TimeoutException:
 			pass
 			
-	def enter_pickup_location(self, pickup: str):
-		"""Enter and select pickup location"""
+	def _result_title(self, result) -> Optional[str]:
+		"""Title of an autocomplete result, so callers can record what was actually selected.
+
+		`result` is either the whole row or, with the id strategy, the title itself.
+		"""
+		try:
+			titles = result.find_elements(*self.locators.best("result_title"))
+			return (titles[0] if titles else result).text
+		except Exception as e:
+			logger.warning(f"Could not read selected result title: {str(e)}")
+			return None
+
+	@timed("enter_pickup_location")
+	def enter_pickup_location(self, pickup: str) -> Optional[str]:
+		"""Enter and select pickup location, returning the selected result's title"""
 		try:
 			logger.info("Looking for pickup entry...")
-			pickup_waypoint = self.wait.until(EC.presence_of_element_located(
-				(AppiumBy.XPATH, "//android.widget.FrameLayout[@content-desc[contains(., 'pickup')]]")
-			))
+			pickup_waypoint = self._find("pickup_waypoint", "pickup_waypoint")
 			pickup_waypoint.click()
 			logger.info("Clicked pickup entry")
 
 			logger.info(f"Typing pickup location: {pickup}")
-			pickup_input = self.wait.until(EC.presence_of_element_located(
-				(AppiumBy.ID, "com.waymo.carapp:id/input_text_pickup")
-			))
-			pickup_input.clear()
-			pickup_input.send_keys(pickup)
+			pickup_input = self._find("pickup_input", "pickup_input")
+			self._type(pickup_input, pickup)
 
 			logger.info(f"Selecting {pickup} from results...")
-			result = self.wait.until(EC.presence_of_element_located((
-				AppiumBy.XPATH, "//android.widget.LinearLayout[@clickable='true'][.//android.widget.TextView[@resource-id='com.waymo.carapp:id/location_title']][1]"
-			)))
+			result = self._find("pickup_results", "first_result")
+			title = self._result_title(result)
 			result.click()
-			logger.info(f"Selected pickup: {pickup}")
+			logger.info(f"Selected pickup: {title or pickup}")
 
-			self._handle_multiple_points()
+			self._handle_multiple_points("pickup", "fare_estimate")
+			return title
 
 		except Exception as e:
 			logger.error(f"Error during pickup selection: {str(e)}")
-			self.return_to_home_screen
 			raise WaymoClientError(f"Pickup location entry failed: {str(e)}")
 
 
-	def enter_dropoff_location(self, dropoff: str):
-		"""Enter and select dropoff location"""
+	@timed("enter_dropoff_location")
+	def enter_dropoff_location(self, dropoff: str) -> Optional[str]:
+		"""Enter and select dropoff location, returning the selected result's title"""
 		try:
 			logger.info("Clicking search box...")
-			search_box = self.wait.until(EC.presence_of_element_located(
-				(AppiumBy.XPATH, "//android.widget.TextView[contains(@text, 'Where to')]")
-			))
+			search_box = self._find("search_box", "search_box")
 			search_box.click()
 
 			logger.info(f"Typing dropoff destination: {dropoff}")
-			search_input = self.wait.until(EC.presence_of_element_located(
-				(AppiumBy.ID, "com.waymo.carapp:id/input_text_dropoff")
-			))
-			search_input.send_keys(dropoff)
+			search_input = self._find("dropoff_input", "dropoff_input")
+			self._type(search_input, dropoff)
 
 			logger.info("Selecting dropoff location...")
-			result = self.wait.until(EC.presence_of_element_located((
-				AppiumBy.XPATH, "//android.widget.LinearLayout[@clickable='true'][.//android.widget.TextView[@resource-id='com.waymo.carapp:id/location_title']][1]"
-			)))
+			result = self._find("dropoff_results", "first_result")
+			title = self._result_title(result)
 			result.click()
-			logger.info(f"Selected dropoff: {dropoff}")
+			logger.info(f"Selected dropoff: {title or dropoff}")
 
-			self._handle_multiple_points()
+			self._handle_multiple_points("dropoff", "pickup_waypoint")
+			return title
 
 		except Exception as e:
-			logger.error(f"Timeout during dropoff selection: {str(e)}")
-			self.return_to_home_screen
-			raise WaymoClientError(f"Dropoff location entry failed: {str(e)}")
\ No newline at end of file
+			logger.error(f"Error during dropoff selection: {str(e)}")
+			raise WaymoClientError(f"Dropoff location entry failed: {str(e)}")
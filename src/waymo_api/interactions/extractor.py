@@ -1,21 +1,76 @@
 import pytz
 import logging
 from dateutil import parser
+from typing import Optional, Dict
 from datetime import datetime, timedelta
+from xml.etree import ElementTree
 
 from selenium.webdriver.support import expected_conditions as EC
 from appium.webdriver.common.appiumby import AppiumBy
 from selenium.common.exceptions import TimeoutException
-from ..core.models import TripInfo
+from ..core.models import TripInfo, TimeInfo, LocationInfo, PriceInfo, WayPoint
 from ..core.exceptions import WaymoClientError
+from ..locations.service_areas import ServiceArea, DEFAULT_SERVICE_AREA
 
+from ..utils.metrics import metrics, timed
 from ..utils.logger import get_logger
 logger = get_logger(__name__)
 
+FARE_ID = "com.waymo.carapp:id/fare_estimate_text"
+ETA_TEXT_ID = "com.waymo.carapp:id/eta_text"
+ETA_SUFFIX_ID = "com.waymo.carapp:id/eta_suffix"
+
+def parse_trip_screen(page_source: str) -> Optional[Dict[str, str]]:
+	"""Parse the trip screen fields out of a UiAutomator2 page source dump.
+
+	Mirrors the element XPaths used by TripInfoExtractor: the pickup ETA lives in a
+	ViewSwitcher after the 'PICKUP' label, the dropoff time and AM/PM suffix are
+	siblings after the 'DROPOFF' label. Returns None if any field is missing.
+	"""
+	root = ElementTree.fromstring(page_source.encode('utf-8'))
+	fields = {}
+
+	for node in root.iter():
+		if "price" not in fields and node.get('resource-id') == FARE_ID:
+			fields["price"] = node.get('text', '')
+
+		children = list(node)
+		for i, child in enumerate(children):
+			label = child.get('text')
+			if label == 'PICKUP' and "pickup_wait" not in fields:
+				for sibling in children[i + 1:]:
+					if sibling.tag != 'android.widget.ViewSwitcher':
+						continue
+					eta = next((n for n in sibling.iter() if n.get('resource-id') == ETA_TEXT_ID), None)
+					if eta is not None:
+						fields["pickup_wait"] = eta.get('text', '')
+						break
+			elif label == 'DROPOFF' and "dropoff_time" not in fields:
+				for sibling in children[i + 1:]:
+					resource_id = sibling.get('resource-id')
+					if resource_id == ETA_TEXT_ID and "dropoff_time" not in fields:
+						fields["dropoff_time"] = sibling.get('text', '')
+					elif resource_id == ETA_SUFFIX_ID and "period" not in fields:
+						fields["period"] = sibling.get('text', '')
+
+	if len(fields) < 4:
+		return None
+	return fields
+
 class TripInfoExtractor:
-	def __init__(self, driver, wait):
+	def __init__(
+		self,
+		driver,
+		wait,
+		use_page_source: bool = True,
+		device_name: Optional[str] = None,
+		service_area: Optional[ServiceArea] = None
+	):
 		self.driver = driver
 		self.wait = wait
+		self.device_name = device_name
+		self.use_page_source = use_page_source # read all fields from one page source dump, element lookups as fallback
+		self.service_area = service_area or DEFAULT_SERVICE_AREA # city and time zone written to trip info
 
 	def _normalize_datetime(self, time_str: str, period: str, base_datetime: datetime, tz: pytz.timezone) -> datetime:
 		# Parse the time with AM/PM
@@ -35,83 +90,94 @@ class TripInfoExtractor:
 	def _calculate_trip_duration(self, pickup: datetime, dropoff: datetime) -> int:
 		return round((dropoff - pickup).total_seconds() / 60)
 
+	def _find_text(self, step: str, locator) -> str:
+		with metrics.span(step, self.device_name):
+			return self.wait.until(EC.presence_of_element_located(locator)).text
+
+	def _read_fields_from_elements(self) -> Dict[str, str]:
+		"""Read the trip screen fields one element lookup at a time"""
+		# Get pickup wait time
+		pickup_wait = self._find_text("extract_pickup_wait",
+			(AppiumBy.XPATH, "//android.widget.TextView[@text='PICKUP']/following-sibling::android.widget.ViewSwitcher//android.widget.TextView[@resource-id='com.waymo.carapp:id/eta_text']")
+		)
+
+		# Get dropoff time
+		dropoff_time = self._find_text("extract_dropoff_time",
+			(AppiumBy.XPATH, "//android.widget.TextView[@text='DROPOFF']/following-sibling::android.widget.TextView[@resource-id='com.waymo.carapp:id/eta_text']")
+		)
+		period = self._find_text("extract_dropoff_period",
+			(AppiumBy.XPATH, "//android.widget.TextView[@text='DROPOFF']/following-sibling::android.widget.TextView[@resource-id='com.waymo.carapp:id/eta_suffix']")
+		)
+
+		# Get price
+		price = self._find_text("extract_price", (AppiumBy.ID, FARE_ID))
+
+		return {"pickup_wait": pickup_wait, "dropoff_time": dropoff_time, "period": period, "price": price}
+
+	def _read_fields_from_page_source(self) -> Optional[Dict[str, str]]:
+		"""Wait for the fare once, then read every field from a single page source dump"""
+		with metrics.span("extract_wait_for_fare", self.device_name):
+			self.wait.until(EC.presence_of_element_located((AppiumBy.ID, FARE_ID)))
+		with metrics.span("extract_page_source", self.device_name):
+			page_source = self.driver.page_source
+		with metrics.span("extract_parse_page_source", self.device_name):
+			return parse_trip_screen(page_source)
+
+	def _read_fields(self) -> Dict[str, str]:
+		if self.use_page_source:
+			try:
+				fields = self._read_fields_from_page_source()
+				if fields:
+					return fields
+				logger.warning("Trip fields missing from page source, falling back to element lookups")
+			except TimeoutException:
+				raise
+			except Exception as e:
+				logger.warning(f"Page source extraction failed, falling back to element lookups: {str(e)}")
+		return self._read_fields_from_elements()
+
+	@timed("extract_trip_info")
 	def _extract_trip_info(self, pickup: str, dropoff: str) -> TripInfo:
 		"""Extract trip information from the app"""
 		try:
-			city = "SF" # temporary
-			tz = pytz.timezone('America/Los_Angeles')
-			current_datetime = tz.localize(datetime.now())
-
-			# Get pickup wait time
-			pickup_wait = self.wait.until(EC.presence_of_element_located(
-				(AppiumBy.XPATH, "//android.widget.TextView[@text='PICKUP']/following-sibling::android.widget.ViewSwitcher//android.widget.TextView[@resource-id='com.waymo.carapp:id/eta_text']")
-			)).text
-			wait_minutes = int(''.join(filter(str.isdigit, pickup_wait)))
-
-			# Get dropoff time
-			dropoff_time = self.wait.until(EC.presence_of_element_located(
-				(AppiumBy.XPATH, "//android.widget.TextView[@text='DROPOFF']/following-sibling::android.widget.TextView[@resource-id='com.waymo.carapp:id/eta_text']")
-			)).text
-			period = self.wait.until(EC.presence_of_element_located(
-				(AppiumBy.XPATH, "//android.widget.TextView[@text='DROPOFF']/following-sibling::android.widget.TextView[@resource-id='com.waymo.carapp:id/eta_suffix']")
-			)).text
-			dropoff_time = f"{dropoff_time}"
-
-			# Get price
-			price_str = self.wait.until(EC.presence_of_element_located(
-				(AppiumBy.ID, "com.waymo.carapp:id/fare_estimate_text")
-			)).text
-			price_value = float(price_str.replace('$', ''))
+			current_datetime = self.service_area.now()
+			fields = self._read_fields()
+			return self._build_trip_info(pickup, dropoff, fields, current_datetime)
+
+		except WaymoClientError:
+			raise
+		except Exception as e:
+			logger.error(f"Error while extracting trip information: {str(e)}")
+			raise WaymoClientError(f"Failed to extract trip information: {str(e)}")
+
+	def _build_trip_info(self, pickup: str, dropoff: str, fields: Dict[str, str], current_datetime: datetime) -> TripInfo:
+		"""Build trip info from the raw screen fields read at `current_datetime` (naive service area time)"""
+		try:
+			city = self.service_area.code
+			tz = self.service_area.tz
+			time_zone = self.service_area.time_zone
+			current_datetime = tz.localize(current_datetime)
+
+			wait_minutes = int(''.join(filter(str.isdigit, fields["pickup_wait"])))
+			dropoff_time = fields["dropoff_time"]
+			period = fields["period"]
+			price_value = float(fields["price"].replace('$', ''))
 
 			# Calculate pickup time (current time + wait time)
-			pickup_datetime = current_datetime + timedelta(minutes=wait_minutes)
+			pickup_datetime = tz.normalize(current_datetime + timedelta(minutes=wait_minutes))
 			# Process dropoff time
 			dropoff_datetime = self._normalize_datetime(dropoff_time, period, pickup_datetime, tz)
 			# Calculate trip duration
 			trip_duration = self._calculate_trip_duration(pickup_datetime, dropoff_datetime)
 
-			# Format times for output
-			current_time_24hr = current_datetime.strftime('%H:%M')
-			pickup_time_24hr = pickup_datetime.strftime('%H:%M')
-			dropoff_time_24hr = dropoff_datetime.strftime('%H:%M')
-
-			# Get dates
-			current_date_str = current_datetime.strftime('%m/%d/%Y')
-			pickup_date_str = pickup_datetime.strftime('%m/%d/%Y')
-			dropoff_date_str = dropoff_datetime.strftime('%m/%d/%Y')
-
-			trip_info = {
-				"city": city,
-				"current_datetime": {
-					"value": current_time_24hr,
-					"time_zone": "PST",
-					"date": current_date_str
-				},
-				"price": {
-					"value": price_value,
-					"currency": "USD"
-				},
-				"pickup": {
-					"location": {
-						"address": pickup,
-						"city": city
-					},
-					"pickup_time": pickup_time_24hr,
-					"wait_time": wait_minutes,
-					"time_zone": "PST",
-					"date": pickup_date_str
-				},
-				"dropoff": {
-					"location": {
-						"address": dropoff,
-						"city": city
-					},
-					"dropoff_time": dropoff_time_24hr,
-					"time_zone": "PST",
-					"date": dropoff_date_str
-				},
-				"duration": trip_duration
-			}
+			trip_info = TripInfo(
+				current_datetime=TimeInfo(current_datetime, time_zone),
+				price=PriceInfo(price_value, "USD"),
+				pickup=WayPoint(LocationInfo(pickup, city), TimeInfo(pickup_datetime, time_zone), wait_minutes),
+				dropoff=WayPoint(LocationInfo(dropoff, city), TimeInfo(dropoff_datetime, time_zone), 0),
+				city=city,
+				duration=trip_duration
+			)
 
 			logger.info(f"Successfully extracted trip info: {trip_info}")
 			return trip_info
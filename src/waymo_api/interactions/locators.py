@@ -0,0 +1,119 @@
+import time
+import threading
+from typing import Dict, List, Optional
+
+from appium.webdriver.common.appiumby import AppiumBy
+from .waits import Locator
+
+from ..utils.logger import get_logger
+logger = get_logger(__name__)
+
+# Each UI target with its locator strategies, cheapest first. XPath needs a full
+# hierarchy dump on the device, so it is only the last resort.
+TARGETS: Dict[str, List[Locator]] = {
+	"back_button": [
+		(AppiumBy.ACCESSIBILITY_ID, "Back"),
+	],
+	"search_box": [
+		(AppiumBy.ANDROID_UIAUTOMATOR, 'new UiSelector().textContains("Where to")'),
+		(AppiumBy.XPATH, "//android.widget.TextView[contains(@text, 'Where to')]"),
+	],
+	"dropoff_input": [
+		(AppiumBy.ID, "com.waymo.carapp:id/input_text_dropoff"),
+	],
+	"pickup_input": [
+		(AppiumBy.ID, "com.waymo.carapp:id/input_text_pickup"),
+	],
+	"result_title": [
+		(AppiumBy.ID, "com.waymo.carapp:id/location_title"),
+	],
+	# The first title is enough to click the first row: the tap lands on the row
+	"first_result": [
+		(AppiumBy.ID, "com.waymo.carapp:id/location_title"),
+		(AppiumBy.XPATH, "//android.widget.LinearLayout[@clickable='true'][.//android.widget.TextView[@resource-id='com.waymo.carapp:id/location_title']][1]"),
+	],
+	"confirm_button": [
+		(AppiumBy.ID, "com.waymo.carapp:id/confirm_button"),
+	],
+	"pickup_waypoint": [
+		(AppiumBy.ANDROID_UIAUTOMATOR, 'new UiSelector().className("android.widget.FrameLayout").descriptionContains("pickup")'),
+		(AppiumBy.XPATH, "//android.widget.FrameLayout[@content-desc[contains(., 'pickup')]]"),
+	],
+	"fare_estimate": [
+		(AppiumBy.ID, "com.waymo.carapp:id/fare_estimate_text"),
+	],
+}
+
+class LocatorRegistry:
+	"""Ranked locator strategies per UI target, re-ranked by measured lookup time.
+
+	The first time a target is found on screen, `calibrate` times every strategy
+	against it and promotes the fastest one that matches. A strategy that stops
+	matching while a lower ranked one still works is demoted.
+	"""
+
+	def __init__(self, targets: Optional[Dict[str, List[Locator]]] = None, repeats: int = 2):
+		self.repeats = repeats
+		self._ranked: Dict[str, List[Locator]] = {name: list(locators) for name, locators in (targets or TARGETS).items()}
+		self._timings: Dict[str, Dict[Locator, Optional[float]]] = {}
+		self._lock = threading.Lock()
+
+	def best(self, target: str) -> Locator:
+		with self._lock:
+			return self._ranked[target][0]
+
+	def ranked(self, target: str) -> List[Locator]:
+		with self._lock:
+			return list(self._ranked[target])
+
+	def is_calibrated(self, target: str) -> bool:
+		with self._lock:
+			return target in self._timings or len(self._ranked[target]) == 1
+
+	def calibrate(self, driver, target: str) -> Locator:
+		"""Time each strategy while the target is on screen and rank matching ones by speed"""
+		if self.is_calibrated(target):
+			return self.best(target)
+		timings: Dict[Locator, Optional[float]] = {}
+		for locator in self.ranked(target):
+			best_time = None
+			for _ in range(self.repeats):
+				start = time.perf_counter()
+				try:
+					found = bool(driver.find_elements(*locator))
+				except Exception:
+					found = False
+				elapsed = time.perf_counter() - start
+				if not found:
+					best_time = None
+					break
+				best_time = elapsed if best_time is None else min(best_time, elapsed)
+			timings[locator] = best_time
+
+		working = sorted((t, i, locator) for i, (locator, t) in enumerate(timings.items()) if t is not None)
+		if not working:
+			logger.warning(f"No locator strategy matched {target} during calibration")
+			return self.best(target)
+		with self._lock:
+			self._timings[target] = timings
+			failing = [locator for locator, t in timings.items() if t is None]
+			self._ranked[target] = [locator for _, _, locator in working] + failing
+			chosen = self._ranked[target][0]
+		logger.info(f"Locator for {target}: {chosen[0]} ({working[0][0] * 1000:.0f} ms)")
+		return chosen
+
+	def demote(self, target: str, locator: Locator) -> None:
+		"""Move a strategy that failed to the end of its target's ranking"""
+		with self._lock:
+			ranked = self._ranked[target]
+			if locator in ranked and len(ranked) > 1:
+				ranked.remove(locator)
+				ranked.append(locator)
+
+	def report(self) -> Dict[str, Dict[str, Optional[float]]]:
+		"""Measured lookup seconds per target and strategy (None if it did not match)"""
+		with self._lock:
+			return {
+				target: {f"{by}={value}": seconds for (by, value), seconds in timings.items()}
+				for target, timings in self._timings.items()
+			}
@@ -0,0 +1,129 @@
+import time
+from enum import Enum
+from collections import deque
+from typing import Optional
+from xml.etree import ElementTree
+
+from ..core.exceptions import WaymoClientError
+
+from ..utils.metrics import metrics
+from ..utils.logger import get_logger
+logger = get_logger(__name__)
+
+KEYCODE_BACK = 4
+
+DROPOFF_INPUT_ID = "com.waymo.carapp:id/input_text_dropoff"
+PICKUP_INPUT_ID = "com.waymo.carapp:id/input_text_pickup"
+CONFIRM_ID = "com.waymo.carapp:id/confirm_button"
+FARE_ID = "com.waymo.carapp:id/fare_estimate_text"
+
+class Screen(Enum):
+	HOME = "home"
+	DROPOFF_SEARCH = "dropoff_search"
+	PICKUP_SEARCH = "pickup_search"
+	CONFIRM = "confirm"
+	TRIP = "trip"
+	OUTSIDE_APP = "outside_app" # another app or the launcher is in front
+	UNKNOWN = "unknown" # in the app, but on a screen we do not recognize
+
+def classify_screen(page_source: str) -> Screen:
+	"""Which app screen a UiAutomator2 page source dump shows"""
+	try:
+		root = ElementTree.fromstring(page_source.encode('utf-8'))
+	except ElementTree.ParseError:
+		return Screen.UNKNOWN
+	found = set()
+	for node in root.iter():
+		resource_id = node.get('resource-id')
+		if resource_id:
+			found.add(resource_id)
+		if 'Where to' in (node.get('text') or ''):
+			found.add('where_to')
+		if 'pickup' in (node.get('content-desc') or ''):
+			found.add('pickup_waypoint')
+
+	# Most specific first: search and confirm screens overlay the trip screen
+	if DROPOFF_INPUT_ID in found:
+		return Screen.DROPOFF_SEARCH
+	if PICKUP_INPUT_ID in found:
+		return Screen.PICKUP_SEARCH
+	if CONFIRM_ID in found:
+		return Screen.CONFIRM
+	if FARE_ID in found or 'pickup_waypoint' in found:
+		return Screen.TRIP
+	if 'where_to' in found:
+		return Screen.HOME
+	return Screen.UNKNOWN
+
+class RecoveryStep(Enum):
+	BACK = "back"
+	ACTIVATE_APP = "activate_app"
+
+def recovery_step(screen: Screen, step: int) -> Optional[RecoveryStep]:
+	"""What to do on `screen` at recovery step `step` to get home, None once home"""
+	if screen == Screen.HOME:
+		return None
+	# An unknown screen that survived one Back press is treated like another app
+	if screen == Screen.OUTSIDE_APP or (screen == Screen.UNKNOWN and step > 0):
+		return RecoveryStep.ACTIVATE_APP
+	return RecoveryStep.BACK
+
+class RetryBudget:
+	"""Allows at most `max_attempts` uses within any `window` seconds"""
+
+	def __init__(self, max_attempts: int, window: float):
+		self.max_attempts = max_attempts
+		self.window = window
+		self._attempts = deque()
+
+	def try_acquire(self) -> bool:
+		now = time.monotonic()
+		while self._attempts and now - self._attempts[0] > self.window:
+			self._attempts.popleft()
+		if len(self._attempts) >= self.max_attempts:
+			return False
+		self._attempts.append(now)
+		return True
+
+class ScreenNavigator:
+	"""Detects the current screen and walks the app back to the home screen.
+
+	Detection costs one `current_package` call plus one page source dump. Each
+	recovery step is chosen for the detected screen: Back keyevents inside the
+	app, `activate_app` when another app is in front. Gives up with a
+	WaymoClientError after `max_steps`, leaving a session restart to the caller.
+	"""
+
+	def __init__(self, driver, app_package: str, max_steps: int = 4, device_name: Optional[str] = None):
+		self.driver = driver
+		self.app_package = app_package
+		self.max_steps = max_steps
+		self.device_name = device_name
+
+	def detect(self) -> Screen:
+		with metrics.span("detect_screen", self.device_name):
+			# The app shows some screens in other activities, so only the package tells
+			if self.driver.current_package != self.app_package:
+				return Screen.OUTSIDE_APP
+			return classify_screen(self.driver.page_source)
+
+	def go_home(self) -> Screen:
+		"""Return to the home screen. Returns the screen the app was found on"""
+		with metrics.span("recover_home", self.device_name):
+			found = screen = self.detect()
+			for step in range(self.max_steps):
+				action = recovery_step(screen, step)
+				if action is None:
+					if step:
+						logger.info(f"Recovered to home screen from {found.value} in {step} step(s)")
+					return found
+				if action == RecoveryStep.ACTIVATE_APP:
+					logger.info(f"On {screen.value}, activating the app")
+					self.driver.activate_app(self.app_package)
+				else:
+					logger.info(f"On {screen.value}, pressing back")
+					self.driver.execute_script('mobile: pressKey', {'keycode': KEYCODE_BACK})
+				screen = self.detect()
+			if screen == Screen.HOME:
+				return found
+			raise WaymoClientError(f"Still on {screen.value} after {self.max_steps} recovery steps")
@@ -0,0 +1,125 @@
+import time
+import math
+import threading
+from collections import defaultdict, deque
+from typing import Dict, Tuple, Callable, Optional, Any
+
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import WebDriverException, TimeoutException
+
+from ..utils.logger import get_logger
+logger = get_logger(__name__)
+
+Locator = Tuple[str, str]
+
+class LatencyTracker:
+	"""Rolling per-step latency samples used to size wait timeouts"""
+
+	def __init__(self, window: int = 200, min_samples: int = 10):
+		self.min_samples = min_samples
+		self._samples: Dict[str, deque] = defaultdict(lambda: deque(maxlen=window))
+		self._lock = threading.Lock()
+
+	def record(self, step: str, seconds: float) -> None:
+		with self._lock:
+			self._samples[step].append(seconds)
+
+	def reset(self, step: str) -> None:
+		"""Forget a step's samples, so its timeout goes back to the default until relearned"""
+		with self._lock:
+			self._samples.pop(step, None)
+
+	def percentile(self, step: str, q: float) -> Optional[float]:
+		"""Nearest-rank percentile (q in 0-100), or None until enough samples are seen"""
+		with self._lock:
+			samples = sorted(self._samples.get(step, ()))
+		if len(samples) < self.min_samples:
+			return None
+		rank = max(0, math.ceil(q / 100 * len(samples)) - 1)
+		return samples[rank]
+
+class AdaptiveWait:
+	"""Waits whose timeouts are learned from observed step latency.
+
+	Until a step has enough samples its timeout is the configured default. After
+	that it is `margin` times the step's p95, clamped to [min_timeout, default].
+	A timeout is recorded as a sample at the timeout, so slower steps widen the
+	learned timeout. After `max_timeouts` timeouts in a row the step's samples
+	are dropped and it waits the full default again.
+	"""
+
+	def __init__(
+		self,
+		driver,
+		timeout: float,
+		poll_interval: float = 0.1,
+		tracker: Optional[LatencyTracker] = None,
+		min_timeout: float = 1.0,
+		margin: float = 3.0,
+		max_timeouts: int = 3
+	):
+		self.driver = driver
+		self.timeout = timeout
+		self.poll_interval = poll_interval
+		self.tracker = tracker or LatencyTracker()
+		self.min_timeout = min_timeout
+		self.margin = margin
+		self.max_timeouts = max_timeouts
+		self._timeouts: Dict[str, int] = defaultdict(int) # consecutive timeouts per step
+
+	def timeout_for(self, step: str, default: Optional[float] = None) -> float:
+		default = self.timeout if default is None else default
+		p95 = self.tracker.percentile(step, 95)
+		if p95 is None:
+			return default
+		return min(default, max(self.min_timeout, p95 * self.margin))
+
+	def until(self, step: str, condition: Callable[[Any], Any], timeout: Optional[float] = None) -> Any:
+		"""Wait for an expected condition, recording how long it took under `step`"""
+		start = time.monotonic()
+		limit = self.timeout_for(step, timeout)
+		wait = WebDriverWait(self.driver, limit, poll_frequency=self.poll_interval)
+		try:
+			result = wait.until(condition)
+		except TimeoutException:
+			self.tracker.record(step, limit)
+			self._timeouts[step] += 1
+			if self._timeouts[step] >= self.max_timeouts:
+				logger.warning(f"{step} timed out {self._timeouts[step]} times in a row after {limit:.1f}s, resetting its learned timeout")
+				self.tracker.reset(step)
+				self._timeouts[step] = 0
+			raise
+		self._timeouts[step] = 0
+		self.tracker.record(step, time.monotonic() - start)
+		return result
+
+	def until_any(
+		self,
+		step: str,
+		locators: Dict[str, Locator],
+		timeout: Optional[float] = None,
+		conditions: Optional[Dict[str, Callable[[Locator], Callable]]] = None
+	) -> Tuple[str, Any]:
+		"""Race several screens and return (name, element) for whichever appears first.
+
+		`conditions` maps a name to an expected condition factory such as
+		EC.element_to_be_clickable; other locators only need to be present.
+		Raises TimeoutException if none of the locators match within the timeout.
+		"""
+		checks = {
+			name: (conditions or {}).get(name, EC.presence_of_element_located)(locator)
+			for name, locator in locators.items()
+		}
+
+		def first_match(driver):
+			for name, check in checks.items():
+				try:
+					element = check(driver)
+				except WebDriverException:
+					continue
+				if element:
+					return name, element
+			return False
+
+		return self.until(step, first_match, timeout)
@@ -0,0 +1,233 @@
+import random
+from collections import defaultdict, Counter
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple, Optional, Sequence
+
+import numpy as np
+
+from .gazetteer import Place
+
+from ..utils.logger import get_logger
+logger = get_logger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Upper edges of the distance bands in km; the last band is open ended
+DEFAULT_BANDS_KM = (1.5, 3.0, 5.0, 8.0, 12.0)
+
+Stratum = Tuple[str, str, int] # (pickup neighborhood, dropoff neighborhood, distance band)
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+	"""Great-circle distance in km, elementwise over broadcastable arrays of degrees"""
+	lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+	a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+	return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def haversine_matrix(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+	"""Great-circle distance in km between every pair of points"""
+	lat = np.asarray(latitudes, dtype=np.float64)
+	lon = np.asarray(longitudes, dtype=np.float64)
+	return haversine_km(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+
+class LocationIndex:
+	"""Places with a precomputed distance matrix and a uniform grid for radius queries"""
+
+	def __init__(self, places: Sequence[Place], cell_km: float = 0.5):
+		self.places = list(places)
+		self.latitudes = np.array([p.latitude for p in self.places], dtype=np.float64)
+		self.longitudes = np.array([p.longitude for p in self.places], dtype=np.float64)
+		self.distances = haversine_matrix(self.latitudes, self.longitudes)
+		self.cell_km = cell_km
+
+		# Degrees per cell; longitude cells are widened by the mean latitude
+		mean_lat = float(self.latitudes.mean()) if self.places else 0.0
+		self._cell_lat = cell_km / 111.32
+		self._cell_lon = cell_km / (111.32 * max(np.cos(np.radians(mean_lat)), 0.01))
+		self._grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+		for i in range(len(self.places)):
+			self._grid[self._cell(self.latitudes[i], self.longitudes[i])].append(i)
+
+	def __len__(self) -> int:
+		return len(self.places)
+
+	def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+		return int(np.floor(latitude / self._cell_lat)), int(np.floor(longitude / self._cell_lon))
+
+	def within(self, i: int, radius_km: float) -> List[int]:
+		"""Indexes of places within `radius_km` of place `i`, including `i` itself"""
+		row, col = self._cell(self.latitudes[i], self.longitudes[i])
+		reach = int(np.ceil(radius_km / self.cell_km))
+		nearby = []
+		for r in range(row - reach, row + reach + 1):
+			for c in range(col - reach, col + reach + 1):
+				for j in self._grid.get((r, c), ()):
+					if self.distances[i, j] <= radius_km:
+						nearby.append(j)
+		return nearby
+
+@dataclass(frozen=True)
+class PlannedPair:
+	pickup: Place
+	dropoff: Place
+	distance_km: float
+	band: int
+
+	def as_trip(self) -> Dict[str, str]:
+		return {"pickup": self.pickup.name, "dropoff": self.dropoff.name}
+
+@dataclass
+class CoverageReport:
+	budget: int
+	pairs: int
+	strata_covered: int
+	strata_total: int
+	neighborhood_pairs_covered: int
+	neighborhood_pairs_total: int
+	pickups_used: int
+	dropoffs_used: int # also the number of dropoff entries when run grouped by dropoff
+	pairs_per_band: Dict[str, int] = field(default_factory=dict)
+
+	@property
+	def strata_coverage(self) -> float:
+		return self.strata_covered / self.strata_total if self.strata_total else 0.0
+
+	@property
+	def neighborhood_pair_coverage(self) -> float:
+		return self.neighborhood_pairs_covered / self.neighborhood_pairs_total if self.neighborhood_pairs_total else 0.0
+
+class CoveragePlanner:
+	"""Plans a query budget of distinct OD pairs spread over neighborhood pairs and distance bands.
+
+	Every ordered pair of places falls in one stratum (pickup neighborhood,
+	dropoff neighborhood, distance band). Pairs are drawn one stratum at a time,
+	cycling through distance bands so each band gets an even share of the budget,
+	and a stratum is only revisited once every stratum in its band has a pair.
+	Pairs whose endpoints both lie within `near_duplicate_km` of an already
+	planned pair are skipped. Within a stratum, pairs whose dropoff is already
+	planned are preferred, and the output is grouped by dropoff so the client
+	enters each dropoff once.
+	"""
+
+	def __init__(
+		self,
+		places: Sequence[Place],
+		bands_km: Sequence[float] = DEFAULT_BANDS_KM,
+		min_distance_km: float = 0.5,
+		near_duplicate_km: float = 0.15,
+		seed: Optional[int] = None
+	):
+		self.index = LocationIndex(places)
+		self.bands_km = tuple(bands_km)
+		self.min_distance_km = min_distance_km
+		self.near_duplicate_km = near_duplicate_km
+		self.seed = seed
+		self._strata = self._build_strata()
+
+	def band_label(self, band: int) -> str:
+		edges = (0.0,) + self.bands_km
+		if band < len(self.bands_km):
+			return f"{edges[band]:g}-{edges[band + 1]:g}km"
+		return f"{edges[-1]:g}km+"
+
+	def _build_strata(self) -> Dict[Stratum, List[Tuple[int, int]]]:
+		distances = self.index.distances
+		pickups, dropoffs = np.nonzero(distances >= self.min_distance_km)
+		bands = np.digitize(distances[pickups, dropoffs], self.bands_km)
+		strata: Dict[Stratum, List[Tuple[int, int]]] = defaultdict(list)
+		places = self.index.places
+		for i, j, band in zip(pickups.tolist(), dropoffs.tolist(), bands.tolist()):
+			strata[(places[i].neighborhood, places[j].neighborhood, band)].append((i, j))
+		return strata
+
+	def plan(self, budget: int) -> List[PlannedPair]:
+		rng = random.Random(self.seed)
+		by_band: Dict[int, List[Stratum]] = defaultdict(list)
+		candidates: Dict[Stratum, List[Tuple[int, int]]] = {}
+		for stratum, pairs in self._strata.items():
+			pairs = list(pairs)
+			rng.shuffle(pairs)
+			candidates[stratum] = pairs
+			by_band[stratum[2]].append(stratum)
+		for strata in by_band.values():
+			rng.shuffle(strata)
+
+		chosen: List[Tuple[int, int]] = []
+		chosen_set = set()
+		dropoff_counts: Counter = Counter()
+		cursors = {band: 0 for band in by_band}
+		while len(chosen) < budget and by_band:
+			for band in sorted(by_band):
+				if len(chosen) >= budget:
+					break
+				strata = by_band[band]
+				pair = None
+				while strata and pair is None:
+					position = cursors[band] % len(strata)
+					stratum = strata[position]
+					pair = self._take(candidates[stratum], chosen_set, dropoff_counts)
+					if pair is None:
+						strata.pop(position)
+					else:
+						cursors[band] = position + 1
+				if pair is None:
+					del by_band[band]
+					continue
+				chosen.append(pair)
+				chosen_set.add(pair)
+				dropoff_counts[pair[1]] += 1
+
+		if len(chosen) < budget:
+			logger.warning(f"Only {len(chosen)} distinct pairs available for a budget of {budget}")
+		return self._order_for_reuse(chosen)
+
+	def _take(self, pairs: List[Tuple[int, int]], chosen: set, dropoff_counts: Counter) -> Optional[Tuple[int, int]]:
+		"""Pop the next pair of a stratum, preferring an already planned dropoff"""
+		pairs[:] = [pair for pair in pairs if not self._is_near_duplicate(pair, chosen)]
+		if not pairs:
+			return None
+		for position, pair in enumerate(pairs):
+			if dropoff_counts[pair[1]]:
+				return pairs.pop(position)
+		return pairs.pop(0)
+
+	def _is_near_duplicate(self, pair: Tuple[int, int], chosen: set) -> bool:
+		if pair in chosen:
+			return True
+		if not self.near_duplicate_km:
+			return False
+		pickups = self.index.within(pair[0], self.near_duplicate_km)
+		dropoffs = self.index.within(pair[1], self.near_duplicate_km)
+		return any((i, j) in chosen for i in pickups for j in dropoffs)
+
+	def _order_for_reuse(self, chosen: List[Tuple[int, int]]) -> List[PlannedPair]:
+		"""Group by dropoff, largest groups first, so each dropoff is entered once"""
+		groups: Dict[int, List[int]] = defaultdict(list)
+		for i, j in chosen:
+			groups[j].append(i)
+		places, distances = self.index.places, self.index.distances
+		planned = []
+		for j, pickups in sorted(groups.items(), key=lambda item: -len(item[1])):
+			for i in pickups:
+				distance = float(distances[i, j])
+				planned.append(PlannedPair(places[i], places[j], distance, int(np.digitize(distance, self.bands_km))))
+		return planned
+
+	def report(self, pairs: List[PlannedPair], budget: Optional[int] = None) -> CoverageReport:
+		strata = {(p.pickup.neighborhood, p.dropoff.neighborhood, p.band) for p in pairs}
+		neighborhood_pairs = {(p.pickup.neighborhood, p.dropoff.neighborhood) for p in pairs}
+		per_band = Counter(p.band for p in pairs)
+		return CoverageReport(
+			budget=len(pairs) if budget is None else budget,
+			pairs=len(pairs),
+			strata_covered=len(strata),
+			strata_total=len(self._strata),
+			neighborhood_pairs_covered=len(neighborhood_pairs),
+			neighborhood_pairs_total=len({(pickup, dropoff) for pickup, dropoff, _ in self._strata}),
+			pickups_used=len({p.pickup.place_id for p in pairs}),
+			dropoffs_used=len({p.dropoff.place_id for p in pairs}),
+			pairs_per_band={self.band_label(band): per_band[band] for band in range(len(self.bands_km) + 1)}
+		)
+
+	def coverage(self, budget: int) -> CoverageReport:
+		"""Coverage reached by a plan of `budget` queries"""
+		return self.report(self.plan(budget), budget)
@@ -0,0 +1,145 @@
+import re
+import csv
+import json
+import bisect
+from pathlib import Path
+from collections import defaultdict, Counter
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Set
+
+from ..utils.logger import get_logger
+logger = get_logger(__name__)
+
+# Trailing tokens that only restate the city and never distinguish two places
+CITY_SUFFIXES = ("san francisco", "sf", "ca", "california", "usa")
+
+@dataclass(frozen=True)
+class Place:
+	place_id: str
+	name: str
+	neighborhood: str
+	latitude: float
+	longitude: float
+	city: str
+
+@dataclass(frozen=True)
+class PlaceMatch:
+	place: Place
+	score: float # 1.0 for an exact normalized match
+
+def normalize_name(text: str) -> str:
+	"""Lowercase, drop punctuation and trailing city suffixes, collapse whitespace"""
+	text = re.sub(r"[^\w\s]", " ", text.lower().replace("&", " and "))
+	text = " ".join(text.split())
+	stripped = True
+	while stripped:
+		stripped = False
+		for suffix in CITY_SUFFIXES:
+			if text.endswith(" " + suffix):
+				text = text[:-len(suffix) - 1].rstrip()
+				stripped = True
+	return text
+
+def _trigrams(text: str) -> Set[str]:
+	padded = f"  {text} "
+	return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _slug(text: str) -> str:
+	return normalize_name(text).replace(" ", "-")
+
+class Gazetteer:
+	"""Known places with canonical IDs and fast fuzzy lookup of free-text names.
+
+	`resolve` tries an exact normalized match, then a unique prefix, then trigram
+	similarity (Dice coefficient) over a trigram inverted index. Fuzzy matches
+	are for display and suggestions only. Identity (`lookup`, `canonical_id`)
+	needs an exact normalized match, since "Pier 3" must not become Pier 39.
+	"""
+
+	def __init__(self, places: List[Place]):
+		self.places: Dict[str, Place] = {}
+		self._by_name: Dict[str, Place] = {}
+		self._trigram_index: Dict[str, List[Place]] = defaultdict(list)
+		self._trigram_sets: Dict[str, Set[str]] = {}
+		self._sorted_names: List[str] = []
+		self.selections: Dict[str, Counter] = defaultdict(Counter)
+		for place in places:
+			self.add(place)
+
+	@classmethod
+	def from_csv(cls, csv_path: str, city: str = "SF") -> 'Gazetteer':
+		"""Build from a CSV with name, neighborhood, latitude and longitude columns"""
+		with open(csv_path, 'r', newline='') as f:
+			places = [
+				Place(
+					place_id=f"{city.lower()}:{_slug(row['name'])}",
+					name=row['name'],
+					neighborhood=row['neighborhood'],
+					latitude=float(row['latitude']),
+					longitude=float(row['longitude']),
+					city=city
+				)
+				for row in csv.DictReader(f)
+			]
+		return cls(places)
+
+	def add(self, place: Place) -> None:
+		key = normalize_name(place.name)
+		if key in self._by_name:
+			logger.warning(f"Duplicate place name '{place.name}', keeping {self._by_name[key].place_id}")
+			return
+		self.places[place.place_id] = place
+		self._by_name[key] = place
+		self._trigram_sets[place.place_id] = _trigrams(key)
+		for trigram in self._trigram_sets[place.place_id]:
+			self._trigram_index[trigram].append(place)
+		bisect.insort(self._sorted_names, key)
+
+	def lookup(self, text: str) -> Optional[Place]:
+		"""The place whose normalized name is exactly the normalized text, if any"""
+		return self._by_name.get(normalize_name(text))
+
+	def resolve(self, text: str, min_score: float = 0.6) -> Optional[PlaceMatch]:
+		"""Best matching place for free text, or None if nothing scores at least `min_score`"""
+		key = normalize_name(text)
+		if not key:
+			return None
+		place = self._by_name.get(key)
+		if place:
+			return PlaceMatch(place, 1.0)
+
+		# A query that is the start of exactly one known name
+		start = bisect.bisect_left(self._sorted_names, key)
+		prefixed = []
+		for name in self._sorted_names[start:start + 2]:
+			if name.startswith(key):
+				prefixed.append(name)
+		if len(prefixed) == 1 and len(key) >= 4:
+			return PlaceMatch(self._by_name[prefixed[0]], 0.95)
+
+		query = _trigrams(key)
+		shared = Counter()
+		for trigram in query:
+			for candidate in self._trigram_index.get(trigram, ()):
+				shared[candidate.place_id] += 1
+		best = None
+		for place_id, count in shared.items():
+			score = 2 * count / (len(query) + len(self._trigram_sets[place_id]))
+			if best is None or score > best.score:
+				best = PlaceMatch(self.places[place_id], score)
+		if best and best.score >= min_score:
+			return best
+		return None
+
+	def canonical_id(self, text: str) -> str:
+		"""Place ID for an exact normalized match, falling back to the normalized text"""
+		place = self.lookup(text)
+		return place.place_id if place else normalize_name(text)
+
+	def record_selection(self, text: str, selected_title: Optional[str]) -> None:
+		"""Remember which autocomplete title the app selected for a query"""
+		if selected_title:
+			self.selections[self.canonical_id(text)][selected_title] += 1
+
+	def save_selections(self, path: str) -> None:
+		Path(path).write_text(json.dumps({key: dict(titles) for key, titles in self.selections.items()}, indent=2))
@@ -0,0 +1,38 @@
+import pytz
+from datetime import datetime
+from dataclasses import dataclass
+from typing import Dict
+
+from ..core.exceptions import WaymoClientError
+
+@dataclass(frozen=True)
+class ServiceArea:
+	code: str # city code written to trip info, e.g. "SF"
+	name: str
+	time_zone: str # IANA name
+	latitude: float # where the device is placed to quote trips in this area
+	longitude: float
+
+	@property
+	def tz(self):
+		return pytz.timezone(self.time_zone)
+
+	def now(self) -> datetime:
+		"""Current naive local time in this area"""
+		return datetime.now(self.tz).replace(tzinfo=None)
+
+SERVICE_AREAS: Dict[str, ServiceArea] = {
+	area.code: area for area in (
+		ServiceArea("SF", "San Francisco", "America/Los_Angeles", 37.773972, -122.431297),
+		ServiceArea("LA", "Los Angeles", "America/Los_Angeles", 34.052235, -118.243683),
+		ServiceArea("PHX", "Phoenix", "America/Phoenix", 33.448376, -112.074036),
+		ServiceArea("ATX", "Austin", "America/Chicago", 30.266666, -97.733330),
+	)
+}
+DEFAULT_SERVICE_AREA = SERVICE_AREAS["SF"]
+
+def get_service_area(code: str) -> ServiceArea:
+	try:
+		return SERVICE_AREAS[code.upper()]
+	except KeyError:
+		raise WaymoClientError(f"Unknown service area {code}, expected one of {', '.join(SERVICE_AREAS)}")
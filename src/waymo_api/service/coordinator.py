@@ -0,0 +1,252 @@
+import json
+import time
+import uuid
+import argparse
+import threading
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, List, Dict, Any, Deque, Callable
+
+from ..core.jobs import JobJournal, DONE
+from ..core.models import TripInfo
+from ..storage.sinks import BackgroundWriter
+from ..storage.price_store import PriceStore
+from ..utils.records import flatten_trip_info
+
+from ..utils.logger import get_logger, setup_logger
+logger = get_logger(__name__)
+
+@dataclass
+class Lease:
+	lease_id: str
+	worker: str
+	pair_ids: List[int]
+	expires_at: float
+
+@dataclass
+class CoordinatorStats:
+	leases: int = 0
+	expired_leases: int = 0
+	results: int = 0
+	duplicates: int = 0 # results for pairs that were already done
+	stale_failures: int = 0 # failures reported on a lease that no longer owns the pair
+	workers: Dict[str, float] = field(default_factory=dict) # worker id -> last contact (epoch seconds)
+
+class CrawlCoordinator:
+	"""Owns a job's pair queue and result store and leases batches to remote workers.
+
+	Pairs come from a JobJournal, so a restarted coordinator resumes the job.
+	A lease lasts `lease_ttl` seconds unless the worker heartbeats. Once it
+	expires, its unfinished pairs go back to the front of the queue for another
+	worker. Results are deduplicated on ingest: the first success for a pair
+	wins. A failure only counts while the reporting lease still owns the pair.
+	"""
+
+	def __init__(
+		self,
+		journal: JobJournal,
+		sink: Optional[BackgroundWriter] = None,
+		lease_ttl: float = 60.0,
+		max_attempts: int = 3,
+		clock: Callable[[], float] = time.monotonic
+	):
+		self.journal = journal
+		self.sink = sink
+		self.lease_ttl = lease_ttl
+		self.max_attempts = max_attempts
+		self.clock = clock
+		self.stats = CoordinatorStats()
+		self._queue: Deque[int] = deque(pair_id for pair_id, _, _ in journal.runnable(max_attempts))
+		self._leases: Dict[str, Lease] = {}
+		self._owners: Dict[int, str] = {} # pair id -> lease id
+		self._lock = threading.Lock()
+		self._server: Optional[ThreadingHTTPServer] = None
+
+	def lease(self, worker: str, max_pairs: int) -> Dict[str, Any]:
+		"""Lease up to `max_pairs` pairs. `done` is set once nothing is queued or leased"""
+		with self._lock:
+			self._touch(worker)
+			self._expire_leases()
+			pairs = []
+			while self._queue and len(pairs) < max_pairs:
+				pair_id = self._queue.popleft()
+				pickup, dropoff, status, _ = self.journal.get(pair_id)
+				# A late result from an expired lease may have finished it while it was queued
+				if status != DONE:
+					pairs.append({"id": pair_id, "pickup": pickup, "dropoff": dropoff})
+			if not pairs:
+				return {"lease_id": None, "pairs": [], "done": not self._leases}
+
+			lease = Lease(uuid.uuid4().hex, worker, [pair["id"] for pair in pairs], self.clock() + self.lease_ttl)
+			self._leases[lease.lease_id] = lease
+			for pair_id in lease.pair_ids:
+				self._owners[pair_id] = lease.lease_id
+			self.stats.leases += 1
+			return {"lease_id": lease.lease_id, "pairs": pairs, "ttl": self.lease_ttl, "done": False}
+
+	def heartbeat(self, worker: str, lease_ids: List[str]) -> Dict[str, Any]:
+		"""Extend leases; returns the ids that had already expired so the worker can drop them"""
+		with self._lock:
+			self._touch(worker)
+			self._expire_leases()
+			expired = []
+			for lease_id in lease_ids:
+				lease = self._leases.get(lease_id)
+				if lease is None:
+					expired.append(lease_id)
+				else:
+					lease.expires_at = self.clock() + self.lease_ttl
+			return {"expired": expired}
+
+	def ingest(self, worker: str, lease_id: Optional[str], results: List[Dict[str, Any]]) -> Dict[str, int]:
+		"""Record streamed results, ignoring duplicates and failures from superseded leases"""
+		accepted = 0
+		with self._lock:
+			self._touch(worker)
+			for result in results:
+				pair_id = int(result["id"])
+				row = self.journal.get(pair_id)
+				if row is None:
+					continue
+				_, _, status, attempts = row
+				owner = self._owners.get(pair_id)
+				if status == DONE:
+					self.stats.duplicates += 1
+					continue
+				if result.get("error") is not None:
+					if owner != lease_id:
+						self.stats.stale_failures += 1
+						continue
+					self.journal.mark_failed(pair_id, result["error"])
+					self._release(pair_id)
+					if attempts + 1 < self.max_attempts:
+						self._queue.append(pair_id)
+				else:
+					# Parse before marking done so a malformed result leaves the pair leased
+					record = flatten_trip_info(TripInfo.from_dict(result["trip_info"]))
+					self.journal.mark_done(pair_id)
+					if owner is not None:
+						self._release(pair_id)
+					if self.sink is not None:
+						self.sink.write(record)
+					self.stats.results += 1
+				accepted += 1
+			lease = self._leases.get(lease_id)
+			if lease is not None and not any(self._owners.get(pair_id) == lease_id for pair_id in lease.pair_ids):
+				del self._leases[lease_id]
+		return {"accepted": accepted}
+
+	def status(self) -> Dict[str, Any]:
+		with self._lock:
+			self._expire_leases()
+			return {
+				"pairs": self.journal.counts(),
+				"queued": len(self._queue),
+				"leased": len(self._owners),
+				"active_leases": len(self._leases),
+				"stats": asdict(self.stats),
+			}
+
+	def serve(self, host: str = "127.0.0.1", port: int = 8090) -> ThreadingHTTPServer:
+		"""Expose the coordinator over HTTP from a background thread"""
+		self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+		threading.Thread(target=self._server.serve_forever, name="waymo-coordinator-http", daemon=True).start()
+		logger.info(f"Coordinating on http://{host}:{self._server.server_port}")
+		return self._server
+
+	def close(self) -> None:
+		if self._server is not None:
+			self._server.shutdown()
+			self._server.server_close()
+
+	def _touch(self, worker: str) -> None:
+		self.stats.workers[worker] = time.time()
+
+	def _release(self, pair_id: int) -> None:
+		self._owners.pop(pair_id, None)
+
+	def _expire_leases(self) -> None:
+		now = self.clock()
+		for lease in [lease for lease in self._leases.values() if lease.expires_at <= now]:
+			del self._leases[lease.lease_id]
+			unfinished = [pair_id for pair_id in lease.pair_ids if self._owners.get(pair_id) == lease.lease_id]
+			for pair_id in reversed(unfinished):
+				del self._owners[pair_id]
+				self._queue.appendleft(pair_id)
+			self.stats.expired_leases += 1
+			logger.warning(f"Lease {lease.lease_id} of {lease.worker} expired, re-queued {len(unfinished)} pair(s)")
+
+def _make_handler(coordinator: CrawlCoordinator):
+	class Handler(BaseHTTPRequestHandler):
+		def do_GET(self):
+			if self.path == "/status":
+				self._send(200, coordinator.status())
+			else:
+				self._send(404, {"error": f"Unknown path {self.path}"})
+
+		def do_POST(self):
+			try:
+				length = int(self.headers.get("Content-Length", 0))
+				body = json.loads(self.rfile.read(length) or b"{}")
+				worker = body.get("worker") or self.client_address[0]
+				if self.path == "/lease":
+					self._send(200, coordinator.lease(worker, int(body.get("max_pairs", 10))))
+				elif self.path == "/heartbeat":
+					self._send(200, coordinator.heartbeat(worker, list(body["lease_ids"])))
+				elif self.path == "/results":
+					self._send(200, coordinator.ingest(worker, body.get("lease_id"), body["results"]))
+				else:
+					self._send(404, {"error": f"Unknown path {self.path}"})
+			except (ValueError, KeyError, TypeError) as e:
+				self._send(400, {"error": f"Bad request: {str(e)}"})
+
+		def _send(self, status: int, payload: Dict):
+			body = json.dumps(payload).encode()
+			self.send_response(status)
+			self.send_header("Content-Type", "application/json")
+			self.send_header("Content-Length", str(len(body)))
+			self.end_headers()
+			self.wfile.write(body)
+
+		def log_message(self, format, *args):
+			pass
+
+	return Handler
+
+def main(argv: Optional[List[str]] = None):
+	parser = argparse.ArgumentParser(description='Coordinate a crawl across worker hosts')
+	parser.add_argument('--journal', required=True, help='Job journal SQLite path; created from --trips on first run')
+	parser.add_argument('--trips', help='JSON array of {"pickup", "dropoff"} trips to plan into a new journal')
+	parser.add_argument('--store', required=True, help='Price store SQLite path results are written to')
+	parser.add_argument('--host', default='127.0.0.1')
+	parser.add_argument('--port', type=int, default=8090)
+	parser.add_argument('--lease-ttl', type=float, default=60.0)
+	parser.add_argument('--max-attempts', type=int, default=3)
+	args = parser.parse_args(argv)
+
+	setup_logger(log_level="INFO")
+	journal = JobJournal(args.journal)
+	if not journal.is_planned():
+		if not args.trips:
+			parser.error(f"{args.journal} has no planned pairs, pass --trips")
+		with open(args.trips, 'r') as f:
+			journal.plan(json.load(f))
+
+	writer = BackgroundWriter(PriceStore(args.store))
+	coordinator = CrawlCoordinator(journal, writer, args.lease_ttl, args.max_attempts)
+	coordinator.serve(args.host, args.port)
+	try:
+		while True:
+			time.sleep(30)
+			status = coordinator.status()
+			logger.info(f"Pairs {status['pairs']}, {status['leased']} leased to {len(status['stats']['workers'])} worker(s)")
+	except KeyboardInterrupt:
+		pass
+	finally:
+		coordinator.close()
+		writer.close()
+		journal.close()
+
+if __name__ == '__main__':
+	main()
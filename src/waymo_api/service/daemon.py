@@ -0,0 +1,123 @@
+import os
+import json
+import time
+import socket
+import threading
+import socketserver
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+from .server import QuoteService
+from ..cli import DEFAULT_SOCKET_PATH
+from ..core.pool import DeviceConfig
+from ..core.exceptions import WaymoClientError
+
+from ..utils.logger import get_logger
+logger = get_logger(__name__)
+
+class QuoteDaemon:
+	"""Keeps warm device sessions behind a Unix socket for short-lived CLI invocations.
+
+	Each connection sends one JSON request line and gets one JSON response line.
+	Requests go through a QuoteService, so concurrent scripts share the devices
+	fairly. The daemon exits after `idle_timeout` seconds without quote requests;
+	status checks do not keep it alive.
+	"""
+
+	def __init__(
+		self,
+		devices: List[DeviceConfig],
+		socket_path: Optional[str] = None,
+		timeout: int = 5,
+		idle_timeout: float = 1800.0
+	):
+		self.socket_path = Path(socket_path) if socket_path else DEFAULT_SOCKET_PATH
+		self.service = QuoteService(devices, timeout)
+		self.idle_timeout = idle_timeout
+		self.started_at = time.time()
+		self.last_request = time.monotonic()
+		self._server: Optional[socketserver.ThreadingUnixStreamServer] = None
+
+	def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+		op = request.get("op")
+		if op in ("quote", "quotes"):
+			self.last_request = time.monotonic()
+			try:
+				return self._handle(op, request)
+			finally:
+				self.last_request = time.monotonic()
+		return self._handle(op, request)
+
+	def _handle(self, op: Optional[str], request: Dict[str, Any]) -> Dict[str, Any]:
+		caller = f"pid-{request.get('pid', 'unknown')}"
+		timeout = request.get("timeout")
+		try:
+			if op == "quote":
+				trip_info = self.service.quote(caller, request["pickup"], request["dropoff"], timeout)
+				return {"ok": True, "trip_info": trip_info.to_dict()}
+			if op == "quotes":
+				results = self.service.quotes(caller, request["trips"], timeout)
+				return {"ok": True, "results": [result.to_dict() for result in results]}
+			if op == "status":
+				return {"ok": True, "pid": os.getpid(), "uptime": time.time() - self.started_at, **self.service.health()}
+			if op == "shutdown":
+				threading.Thread(target=self._server.shutdown, daemon=True).start()
+				return {"ok": True}
+			return {"ok": False, "error": f"Unknown op {op}"}
+		except KeyError as e:
+			return {"ok": False, "error": f"Missing field {str(e)}"}
+		except WaymoClientError as e:
+			return {"ok": False, "error": str(e)}
+
+	def serve_forever(self) -> None:
+		self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+		self._remove_stale_socket()
+		daemon = self
+
+		class Handler(socketserver.StreamRequestHandler):
+			def handle(self):
+				try:
+					request = json.loads(self.rfile.readline())
+				except ValueError as e:
+					response = {"ok": False, "error": f"Bad request: {str(e)}"}
+				else:
+					response = daemon.handle(request)
+				self.wfile.write(json.dumps(response).encode() + b"\n")
+
+		self._server = socketserver.ThreadingUnixStreamServer(str(self.socket_path), Handler)
+		self._server.daemon_threads = True
+		os.chmod(self.socket_path, 0o600)
+		threading.Thread(target=self._watch_idle, name="waymo-daemon-idle", daemon=True).start()
+		logger.info(f"Daemon listening on {self.socket_path}")
+		try:
+			with self.service:
+				self._server.serve_forever()
+		finally:
+			self._server.server_close()
+			if self.socket_path.exists():
+				self.socket_path.unlink()
+			logger.info("Daemon stopped")
+
+	def _remove_stale_socket(self) -> None:
+		"""Unlink a socket left by a daemon that died, refusing to take over a live one"""
+		if not self.socket_path.exists():
+			return
+		with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+			try:
+				probe.connect(str(self.socket_path))
+			except ConnectionRefusedError:
+				logger.info(f"Removing stale socket {self.socket_path}")
+				self.socket_path.unlink()
+				return
+			except FileNotFoundError:
+				return
+		raise WaymoClientError(f"A daemon is already listening on {self.socket_path}")
+
+	def _watch_idle(self) -> None:
+		while True:
+			idle = time.monotonic() - self.last_request
+			if idle >= self.idle_timeout:
+				logger.info(f"Idle for {idle:.0f}s, shutting down")
+				self._server.shutdown()
+				return
+			time.sleep(min(self.idle_timeout - idle, 60))
@@ -0,0 +1,142 @@
+import time
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from concurrent.futures import Future
+from typing import Optional, List, Dict, Tuple, Callable, Deque
+
+from ..core.cache import normalize_location
+from ..core.exceptions import WaymoClientError, QueueFullError, DeadlineExceededError
+
+from ..utils.logger import get_logger
+logger = get_logger(__name__)
+
+QuoteKey = Tuple[str, str]
+
+@dataclass
+class QuoteRequest:
+	key: QuoteKey
+	pickup: str
+	dropoff: str
+	deadline: float # monotonic; the latest deadline of every merged caller
+	future: Future = field(default_factory=Future)
+	callers: int = 1
+
+@dataclass
+class QueueStats:
+	accepted: int = 0
+	merged: int = 0 # requests that joined an identical queued or running quote
+	rejected: int = 0 # turned away because the queue was full
+	expired: int = 0 # dropped because every caller's deadline had passed
+
+class FairQuoteQueue:
+	"""Bounded quote queue that serves callers round-robin and merges identical quotes.
+
+	Each caller has its own FIFO; `get` takes the next request from the caller
+	at the front and moves that caller to the back, so one caller's batch cannot
+	starve the others. A request for a pair that is already queued or running
+	shares its future instead of taking a slot. Requests are dropped unserved once
+	their deadline has passed.
+	"""
+
+	def __init__(
+		self,
+		max_pending: int = 256,
+		max_pending_per_caller: Optional[int] = None,
+		clock: Callable[[], float] = time.monotonic
+	):
+		self.max_pending = max_pending
+		self.max_pending_per_caller = max_pending_per_caller or max_pending
+		self.clock = clock
+		self.stats = QueueStats()
+		self._callers: "OrderedDict[str, Deque[QuoteRequest]]" = OrderedDict()
+		self._queued: Dict[QuoteKey, QuoteRequest] = {}
+		self._running: Dict[QuoteKey, QuoteRequest] = {}
+		self._closed = False
+		self._not_empty = threading.Condition()
+
+	def __len__(self) -> int:
+		with self._not_empty:
+			return len(self._queued)
+
+	def submit(self, caller: str, pickup: str, dropoff: str, deadline: float) -> Future:
+		return self.submit_many(caller, [(pickup, dropoff)], deadline)[0]
+
+	def submit_many(self, caller: str, pairs: List[Tuple[str, str]], deadline: float) -> List[Future]:
+		"""Queue all pairs or none of them; raises QueueFullError if they do not fit"""
+		with self._not_empty:
+			if self._closed:
+				raise WaymoClientError("Quote queue is closed")
+			keys = [(normalize_location(pickup), normalize_location(dropoff)) for pickup, dropoff in pairs]
+			new_keys = {key for key in keys if key not in self._queued and key not in self._running}
+			caller_queue = self._callers.get(caller)
+			caller_pending = len(caller_queue) if caller_queue else 0
+			if len(self._queued) + len(new_keys) > self.max_pending or caller_pending + len(new_keys) > self.max_pending_per_caller:
+				self.stats.rejected += len(pairs)
+				raise QueueFullError(f"Quote queue is full ({len(self._queued)} of {self.max_pending} pending)")
+
+			futures = []
+			for key, (pickup, dropoff) in zip(keys, pairs):
+				request = self._queued.get(key) or self._running.get(key)
+				if request is not None:
+					request.deadline = max(request.deadline, deadline)
+					request.callers += 1
+					self.stats.merged += 1
+				else:
+					request = QuoteRequest(key, pickup, dropoff, deadline)
+					self._queued[key] = request
+					self._callers.setdefault(caller, deque()).append(request)
+					self.stats.accepted += 1
+				futures.append(request.future)
+			self._not_empty.notify(len(new_keys))
+			return futures
+
+	def get(self, timeout: Optional[float] = None) -> Optional[QuoteRequest]:
+		"""Next request to run, fairly across callers. None once closed or after `timeout`"""
+		end = None if timeout is None else self.clock() + timeout
+		with self._not_empty:
+			while True:
+				request = self._pop_next()
+				if request is not None:
+					self._running[request.key] = request
+					return request
+				if self._closed:
+					return None
+				remaining = None if end is None else end - self.clock()
+				if remaining is not None and remaining <= 0:
+					return None
+				self._not_empty.wait(remaining)
+
+	def done(self, request: QuoteRequest) -> None:
+		"""Mark a request returned by `get` as finished, so new identical quotes are run again"""
+		with self._not_empty:
+			if self._running.get(request.key) is request:
+				del self._running[request.key]
+
+	def close(self) -> None:
+		"""Stop accepting requests and fail everything still queued"""
+		with self._not_empty:
+			self._closed = True
+			pending = list(self._queued.values())
+			self._queued.clear()
+			self._callers.clear()
+			self._not_empty.notify_all()
+		for request in pending:
+			request.future.set_exception(WaymoClientError("Quote queue closed"))
+
+	def _pop_next(self) -> Optional[QuoteRequest]:
+		now = self.clock()
+		while self._callers:
+			caller, requests = next(iter(self._callers.items()))
+			request = requests.popleft()
+			if requests:
+				self._callers.move_to_end(caller)
+			else:
+				del self._callers[caller]
+			del self._queued[request.key]
+			if request.deadline <= now:
+				self.stats.expired += 1
+				request.future.set_exception(DeadlineExceededError("Deadline passed while queued"))
+				continue
+			return request
+		return None
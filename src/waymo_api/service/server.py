@@ -0,0 +1,236 @@
+import json
+import math
+import time
+import argparse
+import threading
+from dataclasses import asdict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, List, Dict, Any
+
+from .scheduler import FairQuoteQueue, QuoteRequest
+from ..core.pool import WaymoClientPool, DeviceConfig, default_devices
+from ..core.models import TripInfo, TripResult
+from ..core.exceptions import WaymoClientError, QueueFullError, DeadlineExceededError
+
+from ..utils.logger import get_logger, setup_logger
+logger = get_logger(__name__)
+
+class QuoteService:
+	"""Shares a pool of devices between many callers through a fair, bounded quote queue.
+
+	Requests carry a deadline (`timeout` seconds from arrival). A dispatcher hands
+	the next fair request to the pool whenever a device is free, and fails it
+	instead if less time is left than a typical quote takes. The pool checks the
+	deadline again right before the trip runs, and before any retry. At most one
+	trip per active device is in flight, so trips never queue inside the pool.
+	"""
+
+	def __init__(
+		self,
+		devices: List[DeviceConfig],
+		timeout: int = 5,
+		max_pending: int = 256,
+		max_pending_per_caller: Optional[int] = None,
+		default_timeout: float = 120.0
+	):
+		self.pool = WaymoClientPool(devices, timeout)
+		self.queue = FairQuoteQueue(max_pending, max_pending_per_caller)
+		self.default_timeout = default_timeout
+		self.service_time: Optional[float] = None # moving average of quote latency, seconds
+		self._in_flight = 0
+		self._slots = threading.Condition()
+		self._dispatcher: Optional[threading.Thread] = None
+		self._server: Optional[ThreadingHTTPServer] = None
+
+	def __enter__(self):
+		self.start()
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.close()
+
+	def start(self) -> None:
+		self.pool.start()
+		self._dispatcher = threading.Thread(target=self._dispatch, name="waymo-quote-dispatcher", daemon=True)
+		self._dispatcher.start()
+
+	def submit(self, caller: str, trips: List[Dict[str, str]], timeout: Optional[float] = None) -> List[Future]:
+		deadline = time.monotonic() + (self.default_timeout if timeout is None else timeout)
+		return self.queue.submit_many(caller, [(trip["pickup"], trip["dropoff"]) for trip in trips], deadline)
+
+	def quote(self, caller: str, pickup: str, dropoff: str, timeout: Optional[float] = None) -> TripInfo:
+		timeout = self.default_timeout if timeout is None else timeout
+		future = self.submit(caller, [{"pickup": pickup, "dropoff": dropoff}], timeout)[0]
+		try:
+			return future.result(timeout)
+		except FutureTimeoutError:
+			raise DeadlineExceededError(f"No quote within {timeout}s")
+
+	def quotes(self, caller: str, trips: List[Dict[str, str]], timeout: Optional[float] = None) -> List[TripResult]:
+		"""Queue a batch and wait for every quote until the shared deadline, in input order"""
+		timeout = self.default_timeout if timeout is None else timeout
+		deadline = time.monotonic() + timeout
+		futures = self.submit(caller, trips, timeout)
+		results = []
+		for trip, future in zip(trips, futures):
+			try:
+				trip_info = future.result(max(deadline - time.monotonic(), 0))
+				results.append(TripResult(trip["pickup"], trip["dropoff"], trip_info=trip_info))
+			except FutureTimeoutError:
+				results.append(TripResult(trip["pickup"], trip["dropoff"], error=f"No quote within {timeout}s"))
+			except WaymoClientError as e:
+				results.append(TripResult(trip["pickup"], trip["dropoff"], error=str(e)))
+		return results
+
+	def retry_after(self) -> int:
+		"""Seconds until the current queue would likely have drained"""
+		devices = max(self.pool.active_devices, 1)
+		return max(1, math.ceil(len(self.queue) * (self.service_time or 10.0) / devices))
+
+	@property
+	def in_flight(self) -> int:
+		with self._slots:
+			return self._in_flight
+
+	def health(self) -> Dict[str, Any]:
+		return {
+			"devices": self.pool.active_devices,
+			"pending": len(self.queue),
+			"in_flight": self.in_flight,
+			"service_time": self.service_time,
+			"queue": asdict(self.queue.stats),
+		}
+
+	def serve(self, host: str = "127.0.0.1", port: int = 8080) -> ThreadingHTTPServer:
+		"""Expose the service over HTTP from a background thread"""
+		self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+		threading.Thread(target=self._server.serve_forever, name="waymo-quote-http", daemon=True).start()
+		logger.info(f"Serving quotes on http://{host}:{self._server.server_port}")
+		return self._server
+
+	def close(self) -> None:
+		if self._server is not None:
+			self._server.shutdown()
+			self._server.server_close()
+		self.queue.close()
+		if self._dispatcher is not None:
+			self._dispatcher.join()
+		self.pool.close()
+
+	def _dispatch(self) -> None:
+		while True:
+			self._acquire_slot()
+			request = self.queue.get()
+			if request is None:
+				self._release_slot()
+				return
+			remaining = request.deadline - time.monotonic()
+			if self.service_time is not None and remaining < self.service_time:
+				request.future.set_exception(DeadlineExceededError(f"{remaining:.1f}s left, quotes take {self.service_time:.1f}s"))
+				self.queue.done(request)
+				self._release_slot()
+				continue
+			started = time.monotonic()
+			# Merged callers can still extend the deadline while the trip waits on a device
+			pool_future = self.pool.submit(request.pickup, request.dropoff, lambda request=request: request.deadline)
+			pool_future.add_done_callback(lambda f, request=request, started=started: self._finish(request, f, started))
+
+	def _acquire_slot(self) -> None:
+		"""Wait for a free device; the limit shrinks as the pool retires devices"""
+		with self._slots:
+			# With no device left, dispatching fails each request right away
+			while self._in_flight >= max(self.pool.active_devices, 1):
+				self._slots.wait()
+			self._in_flight += 1
+
+	def _release_slot(self) -> None:
+		with self._slots:
+			self._in_flight -= 1
+			self._slots.notify_all()
+
+	def _finish(self, request: QuoteRequest, pool_future: Future, started: float) -> None:
+		self.queue.done(request)
+		self._release_slot()
+		error = pool_future.exception()
+		if error is None:
+			elapsed = time.monotonic() - started
+			self.service_time = elapsed if self.service_time is None else 0.8 * self.service_time + 0.2 * elapsed
+			request.future.set_result(pool_future.result())
+		else:
+			request.future.set_exception(error)
+
+def _make_handler(service: QuoteService):
+	class Handler(BaseHTTPRequestHandler):
+		def do_GET(self):
+			if self.path == "/health":
+				self._send(200, service.health())
+			else:
+				self._send(404, {"error": f"Unknown path {self.path}"})
+
+		def do_POST(self):
+			try:
+				length = int(self.headers.get("Content-Length", 0))
+				body = json.loads(self.rfile.read(length) or b"{}")
+				if not isinstance(body, dict):
+					raise ValueError(f"expected a JSON object, got {type(body).__name__}")
+				timeout = float(body["timeout"]) if body.get("timeout") is not None else None
+				caller = self.headers.get("X-Caller-Id") or self.client_address[0]
+				if self.path == "/quote":
+					trip_info = service.quote(caller, body["pickup"], body["dropoff"], timeout)
+					self._send(200, {"pickup": body["pickup"], "dropoff": body["dropoff"], "trip_info": trip_info.to_dict()})
+				elif self.path == "/quotes":
+					results = service.quotes(caller, [{"pickup": t["pickup"], "dropoff": t["dropoff"]} for t in body["trips"]], timeout)
+					self._send(200, {"results": [result.to_dict() for result in results]})
+				else:
+					self._send(404, {"error": f"Unknown path {self.path}"})
+			except (ValueError, KeyError, TypeError) as e:
+				self._send(400, {"error": f"Bad request: {str(e)}"})
+			except QueueFullError as e:
+				self._send(429, {"error": str(e)}, {"Retry-After": str(service.retry_after())})
+			except DeadlineExceededError as e:
+				self._send(504, {"error": str(e)})
+			except WaymoClientError as e:
+				self._send(502, {"error": str(e)})
+
+		def _send(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None):
+			body = json.dumps(payload).encode()
+			self.send_response(status)
+			self.send_header("Content-Type", "application/json")
+			self.send_header("Content-Length", str(len(body)))
+			for name, value in (headers or {}).items():
+				self.send_header(name, value)
+			self.end_headers()
+			self.wfile.write(body)
+
+		def log_message(self, format, *args):
+			pass
+
+	return Handler
+
+def main(argv: Optional[List[str]] = None):
+	parser = argparse.ArgumentParser(description='Serve Waymo quotes over HTTP from local devices')
+	parser.add_argument('--host', default='127.0.0.1')
+	parser.add_argument('--port', type=int, default=8080)
+	parser.add_argument('--devices', type=int, default=1, help='Number of local emulators (see default_devices)')
+	parser.add_argument('--max-pending', type=int, default=256)
+	parser.add_argument('--max-pending-per-caller', type=int)
+	parser.add_argument('--default-timeout', type=float, default=120.0)
+	args = parser.parse_args(argv)
+
+	setup_logger(log_level="INFO")
+	service = QuoteService(
+		default_devices(args.devices),
+		max_pending=args.max_pending,
+		max_pending_per_caller=args.max_pending_per_caller,
+		default_timeout=args.default_timeout
+	)
+	with service:
+		service.serve(args.host, args.port)
+		try:
+			threading.Event().wait()
+		except KeyboardInterrupt:
+			pass
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,162 @@
+import json
+import time
+import socket
+import argparse
+import threading
+import urllib.request
+import urllib.error
+from collections import defaultdict, deque
+from typing import Optional, List, Dict, Any, Set
+
+from ..core.client import WaymoClient
+from ..core.pool import DeviceConfig, default_devices
+from ..core.exceptions import WaymoClientError
+
+from ..utils.logger import get_logger, setup_logger
+logger = get_logger(__name__)
+
+class CrawlWorker:
+	"""Leases batches from a CrawlCoordinator and runs them on this host's devices.
+
+	Each device thread leases `batch_size` pairs, runs them through its own
+	WaymoClient (grouped by dropoff) and posts every result as soon as it is
+	read. One heartbeat thread keeps the leases in progress alive. A lease the
+	coordinator reports as expired is dropped after the result in flight.
+	"""
+
+	def __init__(
+		self,
+		coordinator_url: str,
+		devices: List[DeviceConfig],
+		worker_id: Optional[str] = None,
+		batch_size: int = 10,
+		heartbeat_interval: float = 15.0,
+		poll_interval: float = 5.0,
+		timeout: int = 5
+	):
+		self.coordinator_url = coordinator_url.rstrip('/')
+		self.devices = devices
+		self.worker_id = worker_id or socket.gethostname()
+		self.batch_size = batch_size
+		self.heartbeat_interval = heartbeat_interval
+		self.poll_interval = poll_interval
+		self.timeout = timeout
+		self._active_leases: Set[str] = set()
+		self._expired_leases: Set[str] = set()
+		self._lock = threading.Lock()
+		self._stop = threading.Event()
+
+	def request(self, path: str, payload: Dict[str, Any], retries: int = 3) -> Dict[str, Any]:
+		"""POST JSON to the coordinator, retrying connection errors with backoff"""
+		data = json.dumps({"worker": self.worker_id, **payload}).encode()
+		for attempt in range(retries):
+			request = urllib.request.Request(
+				f"{self.coordinator_url}{path}",
+				data=data,
+				headers={"Content-Type": "application/json"}
+			)
+			try:
+				with urllib.request.urlopen(request, timeout=30) as response:
+					return json.loads(response.read())
+			except urllib.error.HTTPError as e:
+				raise WaymoClientError(f"Coordinator returned {e.code} for {path}: {e.read().decode(errors='replace')}")
+			except (urllib.error.URLError, OSError) as e:
+				if attempt == retries - 1:
+					raise WaymoClientError(f"Coordinator unreachable: {str(e)}")
+				time.sleep(2 ** attempt)
+
+	def run(self) -> None:
+		"""Work until the coordinator has nothing left or `stop()` is called"""
+		heartbeat = threading.Thread(target=self._heartbeat, name="waymo-worker-heartbeat", daemon=True)
+		heartbeat.start()
+		threads = [
+			threading.Thread(target=self._run_device, args=(device,), name=f"waymo-{device.device_name}")
+			for device in self.devices
+		]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		self._stop.set()
+
+	def stop(self) -> None:
+		self._stop.set()
+
+	def _run_device(self, device: DeviceConfig) -> None:
+		worker = f"{self.worker_id}/{device.device_name}"
+		try:
+			with WaymoClient(device.device_name, self.timeout, device.server_url, device.system_port) as client:
+				while not self._stop.is_set():
+					lease = self.request("/lease", {"max_pairs": self.batch_size, "worker": worker})
+					if lease["done"]:
+						logger.info(f"{worker}: coordinator has no more pairs")
+						return
+					if not lease["pairs"]:
+						self._stop.wait(self.poll_interval)
+						continue
+					self._run_lease(client, lease)
+		except WaymoClientError as e:
+			logger.error(f"{worker} stopped: {str(e)}")
+
+	def _run_lease(self, client: WaymoClient, lease: Dict[str, Any]) -> None:
+		lease_id = lease["lease_id"]
+		ids_by_pair = defaultdict(deque)
+		for pair in lease["pairs"]:
+			ids_by_pair[(pair["pickup"], pair["dropoff"])].append(pair["id"])
+		with self._lock:
+			self._active_leases.add(lease_id)
+		results = client.iter_trip_info(lease["pairs"])
+		try:
+			for result in results:
+				self.request("/results", {"lease_id": lease_id, "results": [{
+					"id": ids_by_pair[(result.pickup, result.dropoff)].popleft(),
+					"trip_info": result.trip_info.to_dict() if result.success else None,
+					"error": result.error,
+				}]})
+				with self._lock:
+					if lease_id in self._expired_leases or self._stop.is_set():
+						logger.warning(f"Abandoning lease {lease_id}")
+						break
+		finally:
+			results.close() # returns the app home if the lease was abandoned mid-batch
+			with self._lock:
+				self._active_leases.discard(lease_id)
+				self._expired_leases.discard(lease_id)
+
+	def _heartbeat(self) -> None:
+		while not self._stop.wait(self.heartbeat_interval):
+			with self._lock:
+				lease_ids = list(self._active_leases)
+			if not lease_ids:
+				continue
+			try:
+				response = self.request("/heartbeat", {"lease_ids": lease_ids}, retries=1)
+			except WaymoClientError as e:
+				logger.warning(f"Heartbeat failed: {str(e)}")
+				continue
+			with self._lock:
+				self._expired_leases.update(response["expired"])
+
+def main(argv: Optional[List[str]] = None):
+	parser = argparse.ArgumentParser(description='Run crawl work leased from a coordinator on local devices')
+	parser.add_argument('--coordinator', required=True, help='Coordinator URL, e.g. http://10.0.0.5:8090')
+	parser.add_argument('--devices', type=int, default=1, help='Number of local emulators (see default_devices)')
+	parser.add_argument('--server-url', action='append', help='Appium server URL, one device each (repeatable)')
+	parser.add_argument('--worker-id', help='Name reported to the coordinator (default: host name)')
+	parser.add_argument('--batch-size', type=int, default=10)
+	parser.add_argument('--heartbeat-interval', type=float, default=15.0)
+	args = parser.parse_args(argv)
+
+	setup_logger(log_level="INFO")
+	if args.server_url:
+		devices = [DeviceConfig(f"emulator-{5554 + 2 * i}", url, 8200 + i) for i, url in enumerate(args.server_url)]
+	else:
+		devices = default_devices(args.devices)
+	worker = CrawlWorker(args.coordinator, devices, args.worker_id, args.batch_size, args.heartbeat_interval)
+	try:
+		worker.run()
+	except KeyboardInterrupt:
+		worker.stop()
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,145 @@
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict
+
+import pytz
+
+from .sinks import TripSink, Record
+from ..core.exceptions import WaymoClientError
+from ..locations.service_areas import SERVICE_AREAS
+
+from ..utils.logger import get_logger
+logger = get_logger(__name__)
+
+def _require_pyarrow():
+	try:
+		import pyarrow
+		import pyarrow.parquet
+		return pyarrow
+	except ImportError:
+		raise WaymoClientError("Parquet export requires pyarrow: install with `uv sync --extra parquet`")
+
+def trip_schema():
+	"""Arrow schema covering every field of the trip info built by the extractor"""
+	pa = _require_pyarrow()
+	category = pa.dictionary(pa.int32(), pa.string())
+	timestamp = pa.timestamp('s', tz='UTC')
+	return pa.schema([
+		pa.field('city', category),
+		pa.field('time_zone', category),
+		pa.field('current_datetime', timestamp),
+		pa.field('price', pa.float64()),
+		pa.field('price_std', pa.float32()), # null for prices read from the app
+		pa.field('currency', category),
+		pa.field('pickup_address', category),
+		pa.field('pickup_selected_title', category),
+		pa.field('pickup_city', category),
+		pa.field('pickup_datetime', timestamp),
+		pa.field('pickup_wait_time_mins', pa.int16()),
+		pa.field('dropoff_address', category),
+		pa.field('dropoff_selected_title', category),
+		pa.field('dropoff_city', category),
+		pa.field('dropoff_datetime', timestamp),
+		pa.field('trip_duration_mins', pa.int16()),
+	])
+
+class ParquetTripWriter(TripSink):
+	"""Writes flattened trip records to a Parquet dataset directory of part files.
+
+	Buffered records are appended to the current part as row groups of at most
+	`row_group_size` rows. `flush()` writes whatever is buffered and closes the
+	part, so everything flushed is readable (`pandas.read_parquet(path)`) and
+	survives a crash; the next write starts a new part. Behind a BackgroundWriter,
+	its `batch_size` and `flush_interval` set how large parts get.
+
+	Records are the rows produced by `flatten_trip_info`, whose ISO 8601
+	datetimes are stored as UTC timestamps. Older records with only 'MM/DD/YYYY'
+	dates and 'HH:MM' times are read in the zone of their city's service area,
+	or in `time_zone` when the city is unknown.
+	"""
+
+	def __init__(self, path: str, time_zone: str = 'America/Los_Angeles', row_group_size: int = 10_000):
+		_require_pyarrow()
+		self.path = Path(path)
+		self.path.mkdir(parents=True, exist_ok=True)
+		self.tz = pytz.timezone(time_zone)
+		self.row_group_size = row_group_size
+		self.schema = trip_schema()
+		self._buffer: List[Record] = []
+		self._writer = None
+		# Continue numbering after the parts of an earlier run
+		self._next_part = max((int(part.stem.split('-')[1]) + 1 for part in self.path.glob('part-*.parquet')), default=0)
+
+	def write_many(self, records: List[Record]) -> None:
+		self._buffer.extend(records)
+		while len(self._buffer) >= self.row_group_size:
+			self._write_row_group(self._buffer[:self.row_group_size])
+			self._buffer = self._buffer[self.row_group_size:]
+
+	def write_batch(self, batch) -> None:
+		"""Write a TripBatch as its own row group, after any buffered records"""
+		if self._buffer:
+			self._write_row_group(self._buffer)
+			self._buffer = []
+		self._part_writer().write_table(batch.to_arrow().cast(self.schema))
+		logger.info(f"Wrote row group of {len(batch)} trips to {self.path}")
+
+	def flush(self) -> None:
+		"""Write the buffered records and close the current part"""
+		if self._buffer:
+			self._write_row_group(self._buffer)
+			self._buffer = []
+		if self._writer is not None:
+			self._writer.close()
+			self._writer = None
+
+	def close(self) -> None:
+		self.flush()
+
+	def _part_writer(self):
+		if self._writer is None:
+			pa = _require_pyarrow()
+			self._writer = pa.parquet.ParquetWriter(self.path / f"part-{self._next_part:05d}.parquet", self.schema)
+			self._next_part += 1
+		return self._writer
+
+	def _zone(self, record: Record) -> str:
+		if record.get('time_zone'):
+			return record['time_zone']
+		area = SERVICE_AREAS.get(str(record.get('city', '')).upper())
+		return area.time_zone if area is not None else self.tz.zone
+
+	def _to_datetime(self, record: Record, prefix: str) -> datetime:
+		if record.get(f'{prefix}_datetime'):
+			return datetime.fromisoformat(record[f'{prefix}_datetime'])
+		tz = pytz.timezone(self._zone(record))
+		return tz.localize(datetime.strptime(f"{record[f'{prefix}_date']} {record[f'{prefix}_time']}", '%m/%d/%Y %H:%M'))
+
+	def _write_row_group(self, records: List[Record]) -> None:
+		pa = _require_pyarrow()
+		columns: Dict[str, list] = {
+			'city': [r['city'] for r in records],
+			'time_zone': [self._zone(r) for r in records],
+			'current_datetime': [self._to_datetime(r, 'current') for r in records],
+			'price': [r['price_usd'] for r in records],
+			'price_std': [r.get('price_std') for r in records],
+			'currency': [r['price_currency'] for r in records],
+			'pickup_address': [r['pickup_name'] for r in records],
+			'pickup_selected_title': [r.get('pickup_selected_title') for r in records],
+			'pickup_city': [r['pickup_city'] for r in records],
+			'pickup_datetime': [self._to_datetime(r, 'pickup') for r in records],
+			'pickup_wait_time_mins': [r['pickup_wait_time_mins'] for r in records],
+			'dropoff_address': [r['dropoff_name'] for r in records],
+			'dropoff_selected_title': [r.get('dropoff_selected_title') for r in records],
+			'dropoff_city': [r['dropoff_city'] for r in records],
+			'dropoff_datetime': [self._to_datetime(r, 'dropoff') for r in records],
+			'trip_duration_mins': [r['trip_duration_mins'] for r in records],
+		}
+		arrays = []
+		for field in self.schema:
+			if pa.types.is_dictionary(field.type):
+				arrays.append(pa.array(columns[field.name], pa.string()).dictionary_encode())
+			else:
+				arrays.append(pa.array(columns[field.name], field.type))
+		self._part_writer().write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+		logger.info(f"Wrote row group of {len(records)} trips to {self.path}")
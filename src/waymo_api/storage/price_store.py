@@ -0,0 +1,221 @@
+import csv
+import sqlite3
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable
+
+import pytz
+
+from .sinks import TripSink, Record
+from ..locations.service_areas import SERVICE_AREAS, DEFAULT_SERVICE_AREA
+
+from ..utils.logger import get_logger
+logger = get_logger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS trips (
+	id INTEGER PRIMARY KEY,
+	observed_at TEXT NOT NULL, -- UTC 'YYYY-MM-DD HH:MM:SS' when the price was read
+	local_hour INTEGER, -- hour of day in time_zone
+	pickup TEXT NOT NULL,
+	dropoff TEXT NOT NULL,
+	pickup_neighborhood TEXT,
+	dropoff_neighborhood TEXT,
+	pickup_latitude REAL,
+	pickup_longitude REAL,
+	dropoff_latitude REAL,
+	dropoff_longitude REAL,
+	city TEXT,
+	time_zone TEXT, -- IANA zone of the service area
+	price REAL,
+	currency TEXT,
+	wait_time_mins INTEGER,
+	duration_mins INTEGER,
+	pickup_time TEXT,
+	dropoff_time TEXT
+);
+CREATE INDEX IF NOT EXISTS trips_pair_time ON trips (pickup, dropoff, observed_at);
+CREATE INDEX IF NOT EXISTS trips_neighborhoods ON trips (pickup_neighborhood, dropoff_neighborhood, observed_at);
+CREATE INDEX IF NOT EXISTS trips_time ON trips (observed_at);
+'''
+
+COLUMNS = [
+	'observed_at', 'local_hour', 'pickup', 'dropoff', 'pickup_neighborhood', 'dropoff_neighborhood',
+	'pickup_latitude', 'pickup_longitude', 'dropoff_latitude', 'dropoff_longitude',
+	'city', 'time_zone', 'price', 'currency', 'wait_time_mins', 'duration_mins',
+	'pickup_time', 'dropoff_time'
+]
+
+def _number(value, cast=float):
+	if value is None or value == '':
+		return None
+	return cast(float(value))
+
+def _zone(record: Record) -> str:
+	if record.get('time_zone'):
+		return record['time_zone']
+	area = SERVICE_AREAS.get(str(record.get('city') or '').upper(), DEFAULT_SERVICE_AREA)
+	return area.time_zone
+
+def _utc(value: datetime) -> str:
+	return value.astimezone(pytz.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+def _observed_at(record: Record, time_zone: str) -> datetime:
+	"""When the price was read, as an aware datetime in the service area's zone"""
+	tz = pytz.timezone(time_zone)
+	if record.get('current_datetime'):
+		return datetime.fromisoformat(record['current_datetime']).astimezone(tz)
+	if record.get('current_date') and record.get('current_time'):
+		current = datetime.strptime(f"{record['current_date']} {record['current_time']}", '%m/%d/%Y %H:%M')
+	else:
+		current = datetime.fromisoformat(str(record['request_timestamp']))
+	return current.astimezone(tz) if current.tzinfo else tz.localize(current)
+
+def to_row(record: Record) -> List[Any]:
+	"""Map a flat trip record (as written by the SF example or flatten_trip_info) to a store row"""
+	time_zone = _zone(record)
+	observed_at = _observed_at(record, time_zone)
+	return [
+		_utc(observed_at),
+		observed_at.hour,
+		record['pickup_name'],
+		record['dropoff_name'],
+		record.get('pickup_neighborhood'),
+		record.get('dropoff_neighborhood'),
+		_number(record.get('pickup_latitude')),
+		_number(record.get('pickup_longitude')),
+		_number(record.get('dropoff_latitude')),
+		_number(record.get('dropoff_longitude')),
+		record.get('city'),
+		time_zone,
+		_number(record.get('price_usd')),
+		record.get('price_currency'),
+		_number(record.get('pickup_wait_time_mins'), int),
+		_number(record.get('trip_duration_mins'), int),
+		record.get('pickup_time'),
+		record.get('dropoff_time'),
+	]
+
+class PriceStore(TripSink):
+	"""SQLite store of observed trip prices with indexed history queries.
+
+	Runs in WAL mode so readers are not blocked by an ongoing crawl, and writes
+	in batched transactions. Can be used directly as a BackgroundWriter sink.
+	Observation times are stored in UTC along with the service area's zone and
+	local hour of day; naive `start`/`end` bounds are taken as UTC.
+	"""
+
+	def __init__(self, path: str):
+		self.path = Path(path)
+		self._lock = threading.Lock()
+		self._conn = sqlite3.connect(self.path, check_same_thread=False)
+		self._conn.row_factory = sqlite3.Row
+		self._conn.execute('PRAGMA journal_mode=WAL')
+		self._conn.execute('PRAGMA synchronous=NORMAL')
+		self._conn.executescript(SCHEMA)
+		self._insert = f"INSERT INTO trips ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})"
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.close()
+
+	def write_many(self, records: List[Record]) -> None:
+		with self._lock, self._conn:
+			self._conn.executemany(self._insert, [to_row(record) for record in records])
+
+	def import_csv(self, csv_path: str, batch_size: int = 5000) -> int:
+		"""Bulk import an existing estimates CSV (e.g. sf_waymo_estimates.csv). Returns rows imported"""
+		imported = 0
+		with open(csv_path, 'r', newline='') as f:
+			batch = []
+			for record in csv.DictReader(f):
+				batch.append(record)
+				if len(batch) >= batch_size:
+					self.write_many(batch)
+					imported += len(batch)
+					batch = []
+			if batch:
+				self.write_many(batch)
+				imported += len(batch)
+		logger.info(f"Imported {imported} trips from {csv_path}")
+		return imported
+
+	def latest(self, pickup: str, dropoff: str) -> Optional[Dict[str, Any]]:
+		"""Most recent observation for a pair"""
+		row = self._query_one(
+			'SELECT * FROM trips WHERE pickup = ? AND dropoff = ? ORDER BY observed_at DESC LIMIT 1',
+			(pickup, dropoff)
+		)
+		return dict(row) if row else None
+
+	def history(self, pickup: str, dropoff: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+		"""Observations for a pair in [start, end), oldest first"""
+		return self._query(
+			'SELECT * FROM trips WHERE pickup = ? AND dropoff = ? AND observed_at >= ? AND observed_at < ? ORDER BY observed_at',
+			(pickup, dropoff, self._bound(start, '0000'), self._bound(end, '9999'))
+		)
+
+	def observations(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+		"""Priced observations with coordinates in [start, end), e.g. to fit a PriceModel"""
+		return self._query(
+			'''SELECT observed_at, time_zone, local_hour, pickup_neighborhood, dropoff_neighborhood,
+				pickup_latitude, pickup_longitude, dropoff_latitude, dropoff_longitude,
+				price, duration_mins, wait_time_mins
+			FROM trips
+			WHERE observed_at >= ? AND observed_at < ? AND price IS NOT NULL
+				AND pickup_latitude IS NOT NULL AND dropoff_latitude IS NOT NULL''',
+			(self._bound(start, '0000'), self._bound(end, '9999'))
+		)
+
+	def hourly_prices(
+		self,
+		pickup: Optional[str] = None,
+		dropoff: Optional[str] = None,
+		pickup_neighborhood: Optional[str] = None,
+		dropoff_neighborhood: Optional[str] = None,
+		start: Optional[datetime] = None,
+		end: Optional[datetime] = None
+	) -> List[Dict[str, Any]]:
+		"""Count and average/min/max price per local hour of day, optionally filtered by pair or neighborhoods"""
+		filters, params = ['observed_at >= ?', 'observed_at < ?'], [self._bound(start, '0000'), self._bound(end, '9999')]
+		for column, value in (
+			('pickup', pickup),
+			('dropoff', dropoff),
+			('pickup_neighborhood', pickup_neighborhood),
+			('dropoff_neighborhood', dropoff_neighborhood),
+		):
+			if value is not None:
+				filters.append(f'{column} = ?')
+				params.append(value)
+		return self._query(f'''
+			SELECT local_hour AS hour,
+				COUNT(*) AS trips,
+				AVG(price) AS avg_price,
+				MIN(price) AS min_price,
+				MAX(price) AS max_price,
+				AVG(duration_mins) AS avg_duration_mins
+			FROM trips
+			WHERE {' AND '.join(filters)}
+			GROUP BY hour
+			ORDER BY hour
+		''', params)
+
+	def close(self) -> None:
+		with self._lock:
+			self._conn.close()
+
+	def _bound(self, value: Optional[datetime], default: str) -> str:
+		if value is None:
+			return default
+		return _utc(value) if value.tzinfo else value.strftime('%Y-%m-%d %H:%M:%S')
+
+	def _query(self, sql: str, params: Iterable = ()) -> List[Dict[str, Any]]:
+		with self._lock:
+			return [dict(row) for row in self._conn.execute(sql, tuple(params))]
+
+	def _query_one(self, sql: str, params: Iterable = ()):
+		with self._lock:
+			return self._conn.execute(sql, tuple(params)).fetchone()
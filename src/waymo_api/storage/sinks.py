@@ -0,0 +1,151 @@
+import csv
+import json
+import time
+import queue
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from ..core.exceptions import WaymoClientError
+
+from ..utils.logger import get_logger
+logger = get_logger(__name__)
+
+Record = Dict[str, Any]
+
+class TripSink(ABC):
+	"""Destination for flat result records. Sinks keep their handle open until closed"""
+
+	@abstractmethod
+	def write_many(self, records: List[Record]) -> None:
+		pass
+
+	def flush(self) -> None:
+		pass
+
+	def close(self) -> None:
+		pass
+
+class CSVSink(TripSink):
+	def __init__(self, path: str, fieldnames: List[str]):
+		self.path = Path(path)
+		file_exists = self.path.exists() and self.path.stat().st_size > 0
+		if file_exists:
+			# Keep the column order of an existing file
+			with open(self.path, 'r', newline='') as f:
+				fieldnames = next(csv.reader(f))
+		self.fieldnames = fieldnames
+		self._file = open(self.path, 'a', newline='')
+		self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction='ignore')
+		if not file_exists:
+			self._writer.writeheader()
+
+	def write_many(self, records: List[Record]) -> None:
+		self._writer.writerows(records)
+
+	def flush(self) -> None:
+		self._file.flush()
+
+	def close(self) -> None:
+		self._file.close()
+
+class JSONLSink(TripSink):
+	def __init__(self, path: str):
+		self.path = Path(path)
+		self._file = open(self.path, 'a')
+
+	def write_many(self, records: List[Record]) -> None:
+		self._file.write(''.join(json.dumps(record, default=str) + '\n' for record in records))
+
+	def flush(self) -> None:
+		self._file.flush()
+
+	def close(self) -> None:
+		self._file.close()
+
+class SQLiteSink(TripSink):
+	def __init__(self, path: str, fieldnames: List[str], table: str = 'trips'):
+		self.path = Path(path)
+		self.fieldnames = fieldnames
+		self.table = table
+		# The connection is created and used by whichever thread writes to the sink
+		self._conn = sqlite3.connect(self.path, check_same_thread=False)
+		columns = ', '.join(f'"{name}"' for name in fieldnames)
+		self._conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({columns})')
+		self._insert = f'INSERT INTO "{table}" ({columns}) VALUES ({", ".join("?" for _ in fieldnames)})'
+
+	def write_many(self, records: List[Record]) -> None:
+		with self._conn:
+			self._conn.executemany(self._insert, [
+				[record.get(name) for name in self.fieldnames] for record in records
+			])
+
+	def close(self) -> None:
+		self._conn.close()
+
+class BackgroundWriter:
+	"""Buffers records and writes them to a sink from a background thread.
+
+	A batch is written once `batch_size` records are buffered or `flush_interval`
+	seconds have passed since the last write, whichever comes first, so callers
+	only pay for a queue put.
+	"""
+
+	def __init__(self, sink: TripSink, batch_size: int = 100, flush_interval: float = 5.0, max_queue: int = 10_000):
+		self.sink = sink
+		self.batch_size = batch_size
+		self.flush_interval = flush_interval
+		self._queue = queue.Queue(maxsize=max_queue)
+		self._error: Optional[Exception] = None
+		self._thread = threading.Thread(target=self._run, name="waymo-writer", daemon=True)
+		self._thread.start()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.close()
+
+	def write(self, record: Record) -> None:
+		if self._error:
+			raise WaymoClientError(f"Background writer failed: {str(self._error)}")
+		self._queue.put(record)
+
+	def close(self) -> None:
+		"""Write everything still buffered and close the sink"""
+		if self._thread.is_alive():
+			self._queue.put(None)
+			self._thread.join()
+
+	def _run(self) -> None:
+		batch: List[Record] = []
+		deadline = time.monotonic() + self.flush_interval
+		try:
+			while True:
+				try:
+					record = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+					if record is None:
+						break
+					batch.append(record)
+				except queue.Empty:
+					pass
+				if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+					self._write(batch)
+					batch = []
+					deadline = time.monotonic() + self.flush_interval
+			self._write(batch)
+		except Exception as e:
+			logger.error(f"Background writer failed: {str(e)}")
+			self._error = e
+		finally:
+			try:
+				self.sink.close()
+			except Exception as e:
+				logger.error(f"Error closing sink: {str(e)}")
+
+	def _write(self, batch: List[Record]) -> None:
+		if batch:
+			self.sink.write_many(batch)
+			self.sink.flush()
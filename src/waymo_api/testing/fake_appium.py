@@ -0,0 +1,552 @@
+import re
+import json
+import base64
+import time
+import uuid
+import random
+import hashlib
+import argparse
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Tuple
+from xml.sax.saxutils import quoteattr
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ..utils.logger import get_logger
+logger = get_logger(__name__)
+
+APP_PACKAGE = 'com.waymo.carapp'
+APP_ACTIVITY = 'com.google.android.apps.car.carapp.LaunchActivity'
+SEARCH_ACTIVITY = 'com.google.android.apps.car.carapp.search.LocationSearchActivity'
+ELEMENT_KEY = 'element-6066-11e4-a52e-4f735466cecf'
+KEYCODE_BACK = 4
+KEYCODE_PASTE = 279
+
+@dataclass
+class FakeLatency:
+	"""Simulated device latency in seconds"""
+	command: float = 0.01 # added to every WebDriver command
+	search_results: float = 0.2 # typing until autocomplete rows show up
+	fare: float = 0.3 # pickup selected until the fare is shown
+	page_source: float = 0.05
+	xpath: float = 0.05 # extra per XPath lookup, which dumps the whole hierarchy on a device
+	keystroke: float = 0.02 # per character typed with send_keys
+	drift: float = 0.0 # extra command latency per 100 commands since the app was launched, like a leaking app
+
+@dataclass
+class FakeFailures:
+	"""Probabilities of the app misbehaving"""
+	no_results: float = 0.0 # autocomplete never shows results
+	no_fare: float = 0.0 # fare never shows up
+	multiple_points: float = 0.0 # the multiple pickup/dropoff points confirm screen shows up
+
+class Node:
+	def __init__(self, cls: str, name: Optional[str] = None, children: Optional[List['Node']] = None, **attrs):
+		self.cls = cls
+		self.name = name # stable element id
+		self.attrs = {key.replace('_', '-'): str(value) for key, value in attrs.items()}
+		self.attrs['class'] = cls
+		self.children = children or []
+		self.parent: Optional[Node] = None
+		for child in self.children:
+			child.parent = self
+
+	def iter(self):
+		yield self
+		for child in self.children:
+			yield from child.iter()
+
+	def to_xml(self) -> str:
+		attrs = ''.join(f' {key}={quoteattr(value)}' for key, value in self.attrs.items())
+		if not self.children:
+			return f'<{self.cls}{attrs}/>'
+		return f'<{self.cls}{attrs}>' + ''.join(child.to_xml() for child in self.children) + f'</{self.cls}>'
+
+# Minimal XPath support: child (/), descendant (//) and following-sibling:: axes with
+# class-name or * steps and [@a='v'], [contains(@a, 'v')], [@a[contains(., 'v')]],
+# [.//step...] and [n] predicates. That covers every expression the client uses.
+_AXES = ('/following-sibling::', '//', '/')
+
+def _split_steps(xpath: str) -> List[Tuple[str, str]]:
+	steps, i, depth, axis, start = [], 0, 0, None, 0
+	while i < len(xpath):
+		if depth == 0:
+			matched = next((a for a in _AXES if xpath.startswith(a, i)), None)
+			if matched:
+				if axis is not None:
+					steps.append((axis, xpath[start:i]))
+				axis, i = matched, i + len(matched)
+				start = i
+				continue
+		if xpath[i] == '[':
+			depth += 1
+		elif xpath[i] == ']':
+			depth -= 1
+		i += 1
+	if axis is not None:
+		steps.append((axis, xpath[start:]))
+	return steps
+
+def _split_predicates(step: str) -> Tuple[str, List[str]]:
+	name_end = step.find('[')
+	if name_end == -1:
+		return step, []
+	predicates, depth, start = [], 0, name_end
+	for i in range(name_end, len(step)):
+		if step[i] == '[':
+			if depth == 0:
+				start = i + 1
+			depth += 1
+		elif step[i] == ']':
+			depth -= 1
+			if depth == 0:
+				predicates.append(step[start:i])
+	return step[:name_end], predicates
+
+def _matches(node: Node, predicate: str) -> bool:
+	predicate = predicate.strip()
+	if predicate.startswith('.//') or predicate.startswith('./'):
+		return bool(_evaluate(predicate[1:], [node]))
+	match = re.fullmatch(r"@([\w-]+)\s*=\s*'([^']*)'", predicate)
+	if match:
+		return node.attrs.get(match.group(1)) == match.group(2)
+	match = re.fullmatch(r"contains\(@([\w-]+),\s*'([^']*)'\)", predicate)
+	if match:
+		return match.group(2) in node.attrs.get(match.group(1), '')
+	match = re.fullmatch(r"@([\w-]+)\[contains\(\.,\s*'([^']*)'\)\]", predicate)
+	if match:
+		return match.group(2) in node.attrs.get(match.group(1), '')
+	raise ValueError(f"Unsupported XPath predicate: {predicate}")
+
+def _evaluate(xpath: str, context: List[Node]) -> List[Node]:
+	for axis, step in _split_steps(xpath):
+		name, predicates = _split_predicates(step)
+		candidates = []
+		for node in context:
+			if axis == '//':
+				pool = [n for child in node.children for n in child.iter()]
+			elif axis == '/':
+				pool = node.children
+			else:
+				siblings = node.parent.children if node.parent else []
+				pool = siblings[siblings.index(node) + 1:] if node in siblings else []
+			for candidate in pool:
+				if candidate not in candidates:
+					candidates.append(candidate)
+		context = [n for n in candidates if name in ('*', n.cls)]
+		for predicate in predicates:
+			if predicate.strip().isdigit():
+				index = int(predicate) - 1
+				context = context[index:index + 1]
+			else:
+				context = [n for n in context if _matches(n, predicate)]
+	return context
+
+# UiSelector methods as (attribute, test) for the '-android uiautomator' strategy
+_UI_SELECTORS = {
+	'text': ('text', lambda actual, expected: actual == expected),
+	'textContains': ('text', lambda actual, expected: expected in actual),
+	'textStartsWith': ('text', lambda actual, expected: actual.startswith(expected)),
+	'description': ('content-desc', lambda actual, expected: actual == expected),
+	'descriptionContains': ('content-desc', lambda actual, expected: expected in actual),
+	'resourceId': ('resource-id', lambda actual, expected: actual == expected),
+	'className': ('class', lambda actual, expected: actual == expected),
+	'clickable': ('clickable', lambda actual, expected: (actual == 'true') == (expected == 'true')),
+}
+
+def _ui_selector(root: Node, selector: str) -> List[Node]:
+	calls = re.findall(r'\.(\w+)\(\s*(?:"([^"]*)"|(true|false))\s*\)', selector)
+	if not selector.startswith('new UiSelector()') or not calls:
+		raise ValueError(f"Unsupported UiSelector: {selector}")
+	nodes = list(root.iter())
+	for method, text, flag in calls:
+		if method not in _UI_SELECTORS:
+			raise ValueError(f"Unsupported UiSelector method: {method}")
+		attribute, test = _UI_SELECTORS[method]
+		nodes = [n for n in nodes if test(n.attrs.get(attribute, ''), text or flag)]
+	return nodes
+
+def find_nodes(root: Node, using: str, value: str) -> List[Node]:
+	if using == 'id':
+		return [n for n in root.iter() if n.attrs.get('resource-id') == value]
+	if using == 'accessibility id':
+		return [n for n in root.iter() if n.attrs.get('content-desc') == value]
+	if using == '-android uiautomator':
+		return _ui_selector(root, value)
+	if using == 'xpath':
+		return _evaluate(value, [root])
+	raise ValueError(f"Unsupported locator strategy: {using}")
+
+def _quote(pickup: str, dropoff: str) -> Tuple[float, int, int]:
+	"""Deterministic (price, pickup wait minutes, trip minutes) for a pair"""
+	digest = int(hashlib.sha1(f"{pickup.lower()}|{dropoff.lower()}".encode()).hexdigest(), 16)
+	return 8 + (digest % 3000) / 100, 2 + digest % 8, 6 + (digest // 7) % 30
+
+class FakeWaymoApp:
+	"""Screen state of the Waymo app on one fake device"""
+
+	def __init__(self, latency: FakeLatency, failures: FakeFailures, rng: random.Random):
+		self.latency = latency
+		self.failures = failures
+		self.rng = rng
+		self.in_app = True
+		self.screen = 'home'
+		self.dropoff: Optional[str] = None
+		self.pickup: Optional[str] = None
+		self.query = ''
+		self.results_at: Optional[float] = None
+		self.fare_at: Optional[float] = None
+		self.location: Optional[Dict] = None
+		self.clipboard = ''
+		self.commands = 0 # since launch, drives latency drift
+
+	def activity(self) -> str:
+		if not self.in_app:
+			return 'com.android.launcher3.Launcher'
+		# Location search runs in its own activity, as in the real app
+		return SEARCH_ACTIVITY if self.screen in ('dropoff_search', 'pickup_search') else APP_ACTIVITY
+
+	def tree(self) -> Node:
+		now = time.monotonic()
+		back = Node('android.widget.ImageButton', 'back', content_desc='Back', clickable='true')
+		if not self.in_app:
+			content = [Node('android.widget.TextView', 'launcher', text='Home screen')]
+		elif self.screen == 'home':
+			content = [Node('android.widget.TextView', 'where_to', text='Where to?', clickable='true')]
+		elif self.screen in ('dropoff_search', 'pickup_search'):
+			kind = 'dropoff' if self.screen == 'dropoff_search' else 'pickup'
+			content = [back, Node('android.widget.EditText', f'input_{kind}', resource_id=f'com.waymo.carapp:id/input_text_{kind}', text=self.query)]
+			if self.query and self.results_at is not None and now >= self.results_at:
+				content.extend(
+					Node('android.widget.LinearLayout', f'result_{i}', clickable='true', children=[
+						Node('android.widget.TextView', f'result_title_{i}', resource_id='com.waymo.carapp:id/location_title', text=title)
+					])
+					for i, title in enumerate(self._result_titles())
+				)
+		elif self.screen == 'confirm':
+			content = [back, Node('android.widget.Button', 'confirm', resource_id='com.waymo.carapp:id/confirm_button', text='Confirm', clickable='true')]
+		else:
+			content = [back, Node('android.widget.FrameLayout', 'pickup_waypoint', content_desc='Edit pickup location', clickable='true')]
+			if self.pickup and self.fare_at is not None and now >= self.fare_at:
+				content.extend(self._trip_nodes())
+		return Node('hierarchy', children=[Node('android.widget.FrameLayout', children=content)], rotation='0')
+
+	def _trip_nodes(self) -> List[Node]:
+		price, wait, duration = _quote(self.pickup, self.dropoff)
+		dropoff_at = datetime.now() + timedelta(minutes=wait + duration)
+		return [
+			Node('android.widget.LinearLayout', children=[
+				Node('android.widget.TextView', 'pickup_label', text='PICKUP'),
+				Node('android.widget.ViewSwitcher', children=[
+					Node('android.widget.TextView', 'pickup_eta', resource_id='com.waymo.carapp:id/eta_text', text=f'{wait} min')
+				])
+			]),
+			Node('android.widget.LinearLayout', children=[
+				Node('android.widget.TextView', 'dropoff_label', text='DROPOFF'),
+				Node('android.widget.TextView', 'dropoff_eta', resource_id='com.waymo.carapp:id/eta_text', text=dropoff_at.strftime('%-I:%M')),
+				Node('android.widget.TextView', 'dropoff_suffix', resource_id='com.waymo.carapp:id/eta_suffix', text=dropoff_at.strftime('%p'))
+			]),
+			Node('android.widget.TextView', 'fare', resource_id='com.waymo.carapp:id/fare_estimate_text', text=f'${price:.2f}')
+		]
+
+	def click(self, node: Node) -> None:
+		name = node.name or ''
+		if name == 'back':
+			self.back()
+		elif name == 'where_to':
+			self._open_search('dropoff_search')
+		elif name == 'pickup_waypoint':
+			self._open_search('pickup_search')
+		elif re.fullmatch(r'result_\d+', name):
+			title = self._result_titles()[int(name.split('_')[1])]
+			if self.screen == 'dropoff_search':
+				self.dropoff, self.pickup, self.fare_at = title, None, None
+			else:
+				self.pickup = title
+				self.fare_at = None if self.rng.random() < self.failures.no_fare else time.monotonic() + self.latency.fare
+			self.screen = 'trip'
+			if self.rng.random() < self.failures.multiple_points:
+				self.screen = 'confirm'
+		elif name == 'confirm':
+			self.screen = 'trip'
+			if self.pickup and self.fare_at is None and self.rng.random() >= self.failures.no_fare:
+				self.fare_at = time.monotonic() + self.latency.fare
+
+	def type_text(self, node: Optional[Node], text: str, replace: bool = False) -> None:
+		self.query = text if replace else self.query + text
+		self.results_at = None if self.rng.random() < self.failures.no_results else time.monotonic() + self.latency.search_results
+
+	def clear(self, node: Node) -> None:
+		self.query = ''
+		self.results_at = None
+
+	def back(self) -> None:
+		if self.screen == 'pickup_search':
+			self.screen = 'trip'
+		elif self.screen == 'home':
+			self.in_app = False
+		else:
+			self.screen = 'home'
+			self.dropoff = self.pickup = None
+		self.query = ''
+
+	def activate(self) -> None:
+		if not self.in_app:
+			self.in_app = True
+			self.screen = 'home'
+
+	def terminate(self) -> None:
+		self.in_app = False
+		self.screen = 'home'
+		self.dropoff = self.pickup = None
+		self.query = ''
+		self.commands = 0
+
+	def _result_titles(self) -> List[str]:
+		return [self.query, f"{self.query} (Entrance)"]
+
+	def _open_search(self, screen: str) -> None:
+		self.screen = screen
+		self.query = ''
+		self.results_at = None
+
+class _Session:
+	def __init__(self, app: FakeWaymoApp):
+		self.app = app
+		self.lock = threading.Lock()
+		self.commands = 0
+
+class FakeAppiumServer:
+	"""Local stand-in for an Appium server driving the Waymo app.
+
+	Implements enough of the W3C WebDriver protocol (sessions, element lookup,
+	click, clear, send keys, text, page source and the `mobile:` extensions the
+	client uses) to run WaymoClient end to end, with configurable latency and
+	failure injection.
+	"""
+
+	def __init__(
+		self,
+		host: str = '127.0.0.1',
+		port: int = 0,
+		latency: Optional[FakeLatency] = None,
+		failures: Optional[FakeFailures] = None,
+		seed: Optional[int] = None
+	):
+		self.latency = latency or FakeLatency()
+		self.failures = failures or FakeFailures()
+		self.rng = random.Random(seed)
+		self.sessions: Dict[str, _Session] = {}
+		self._httpd = ThreadingHTTPServer((host, port), self._handler())
+		self._httpd.daemon_threads = True
+		self._thread: Optional[threading.Thread] = None
+
+	@property
+	def url(self) -> str:
+		host, port = self._httpd.server_address[:2]
+		return f"http://{host}:{port}"
+
+	def __enter__(self):
+		self.start()
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.stop()
+
+	def start(self) -> None:
+		self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-appium", daemon=True)
+		self._thread.start()
+		logger.info(f"Fake Appium server listening on {self.url}")
+
+	def stop(self) -> None:
+		self._httpd.shutdown()
+		self._httpd.server_close()
+
+	def serve_forever(self) -> None:
+		logger.info(f"Fake Appium server listening on {self.url}")
+		self._httpd.serve_forever()
+
+	def _handler(self):
+		server = self
+
+		class Handler(BaseHTTPRequestHandler):
+			protocol_version = 'HTTP/1.1'
+
+			def do_GET(self):
+				self._dispatch('GET')
+
+			def do_POST(self):
+				self._dispatch('POST')
+
+			def do_DELETE(self):
+				self._dispatch('DELETE')
+
+			def log_message(self, format, *args):
+				pass
+
+			def _dispatch(self, method: str):
+				length = int(self.headers.get('Content-Length') or 0)
+				body = json.loads(self.rfile.read(length) or b'{}') if length else {}
+				try:
+					status, value = server._route(method, self.path, body)
+				except ValueError as e:
+					status, value = 400, {'error': 'invalid argument', 'message': str(e), 'stacktrace': ''}
+				payload = json.dumps({'value': value}).encode()
+				self.send_response(status)
+				self.send_header('Content-Type', 'application/json; charset=utf-8')
+				self.send_header('Content-Length', str(len(payload)))
+				self.end_headers()
+				self.wfile.write(payload)
+
+		return Handler
+
+	def _error(self, status: int, error: str, message: str) -> Tuple[int, Dict]:
+		return status, {'error': error, 'message': message, 'stacktrace': ''}
+
+	def _route(self, method: str, path: str, body: Dict) -> Tuple[int, object]:
+		parts = [p for p in path.split('?')[0].split('/') if p]
+		if parts == ['status']:
+			return 200, {'ready': True, 'message': 'fake appium', 'build': {'version': 'fake'}}
+		if parts == ['session'] and method == 'POST':
+			session_id = uuid.uuid4().hex
+			app = FakeWaymoApp(self.latency, self.failures, random.Random(self.rng.random()))
+			self.sessions[session_id] = _Session(app)
+			capabilities = body.get('capabilities', {}).get('alwaysMatch', {})
+			return 200, {'sessionId': session_id, 'capabilities': {**capabilities, 'platformVersion': '14'}}
+		if len(parts) < 2 or parts[0] != 'session':
+			return self._error(404, 'unknown command', f"Unknown command {method} {path}")
+
+		session = self.sessions.get(parts[1])
+		if session is None:
+			return self._error(404, 'invalid session id', f"No session {parts[1]}")
+		if len(parts) == 2 and method == 'DELETE':
+			del self.sessions[parts[1]]
+			return 200, None
+
+		time.sleep(self.latency.command + self.latency.drift * session.app.commands / 100)
+		with session.lock:
+			session.commands += 1
+			session.app.commands += 1
+			return self._session_command(session.app, method, parts[2:], body)
+
+	def _session_command(self, app: FakeWaymoApp, method: str, parts: List[str], body: Dict) -> Tuple[int, object]:
+		if parts in (['timeouts'], ['location']) and method == 'POST':
+			if parts == ['location']:
+				app.location = body.get('location')
+			return 200, None
+		if parts == ['source']:
+			time.sleep(self.latency.page_source)
+			return 200, '<?xml version="1.0" encoding="UTF-8"?>' + app.tree().to_xml()
+		if parts in (['element'], ['elements']):
+			return self._find(app.tree(), parts[0], body)
+		if parts == ['execute', 'sync']:
+			return self._execute(app, body.get('script', ''), (body.get('args') or [{}])[0] or {})
+		if parts[0] == 'element' and len(parts) >= 3:
+			node = next((n for n in app.tree().iter() if n.name == parts[1]), None)
+			if node is None:
+				return self._error(404, 'stale element reference', f"Element {parts[1]} is not on the current screen")
+			if parts[2] in ('element', 'elements'):
+				return self._find(node, parts[2], body)
+			return self._element_command(app, node, method, parts[2:], body)
+		return self._error(404, 'unknown command', f"Unknown command {method} {'/'.join(parts)}")
+
+	def _find(self, root: Node, command: str, body: Dict) -> Tuple[int, object]:
+		if body.get('using') == 'xpath':
+			time.sleep(self.latency.xpath)
+		nodes = [n for n in find_nodes(root, body.get('using'), body.get('value')) if n.name]
+		refs = [{ELEMENT_KEY: n.name, 'ELEMENT': n.name} for n in nodes]
+		if command == 'elements':
+			return 200, refs
+		if not refs:
+			return self._error(404, 'no such element', f"No element matching {body.get('using')}={body.get('value')}")
+		return 200, refs[0]
+
+	def _element_command(self, app: FakeWaymoApp, node: Node, method: str, parts: List[str], body: Dict) -> Tuple[int, object]:
+		command = parts[0]
+		if command == 'click':
+			# A tap lands on the closest clickable ancestor, as on a device
+			target = node
+			while target.parent is not None and target.attrs.get('clickable') != 'true':
+				target = target.parent
+			app.click(target if target.attrs.get('clickable') == 'true' else node)
+			return 200, None
+		if command == 'clear':
+			app.clear(node)
+			return 200, None
+		if command == 'value':
+			text = body.get('text') or ''.join(body.get('value', []))
+			time.sleep(self.latency.keystroke * len(text))
+			app.type_text(node, text)
+			return 200, None
+		if command == 'text':
+			return 200, node.attrs.get('text', '')
+		if command in ('displayed', 'enabled'):
+			return 200, True
+		if command == 'attribute' and len(parts) > 1:
+			return 200, node.attrs.get(parts[1])
+		if command == 'name':
+			return 200, node.cls
+		return self._error(404, 'unknown command', f"Unknown element command {command}")
+
+	def _execute(self, app: FakeWaymoApp, script: str, args: Dict) -> Tuple[int, object]:
+		if script == 'mobile: getCurrentActivity':
+			return 200, app.activity()
+		if script == 'mobile: getCurrentPackage':
+			return 200, APP_PACKAGE if app.in_app else 'com.android.launcher3'
+		if script == 'mobile: activateApp':
+			app.activate()
+			return 200, None
+		if script == 'mobile: terminateApp':
+			was_running = app.in_app
+			app.terminate()
+			return 200, was_running
+		if script == 'mobile: pressKey':
+			keycode = int(args.get('keycode', 0))
+			if keycode == KEYCODE_BACK:
+				app.back()
+			elif keycode == KEYCODE_PASTE and app.screen in ('dropoff_search', 'pickup_search'):
+				app.type_text(None, app.clipboard)
+			return 200, None
+		if script == 'mobile: setClipboard':
+			app.clipboard = base64.b64decode(args.get('content', '')).decode('utf-8')
+			return 200, None
+		if script == 'mobile: replaceElementValue':
+			node = next((n for n in app.tree().iter() if n.name == args.get('elementId')), None)
+			if node is None:
+				return self._error(404, 'stale element reference', f"Element {args.get('elementId')} is not on the current screen")
+			app.type_text(node, args.get('text', ''), replace=True)
+			return 200, None
+		if script == 'mobile: setGeolocation':
+			app.location = args
+			return 200, None
+		return self._error(404, 'unknown method', f"Unsupported script {script}")
+
+def main():
+	parser = argparse.ArgumentParser(description='Run a fake Appium server emulating the Waymo app')
+	parser.add_argument('--host', default='127.0.0.1')
+	parser.add_argument('--port', type=int, default=4723)
+	parser.add_argument('--command-latency', type=float, default=FakeLatency.command)
+	parser.add_argument('--search-latency', type=float, default=FakeLatency.search_results)
+	parser.add_argument('--fare-latency', type=float, default=FakeLatency.fare)
+	parser.add_argument('--drift', type=float, default=0.0, help='Extra command latency per 100 commands since app launch')
+	parser.add_argument('--no-results-rate', type=float, default=0.0)
+	parser.add_argument('--no-fare-rate', type=float, default=0.0)
+	parser.add_argument('--multiple-points-rate', type=float, default=0.0)
+	parser.add_argument('--seed', type=int)
+	args = parser.parse_args()
+
+	server = FakeAppiumServer(
+		args.host,
+		args.port,
+		FakeLatency(command=args.command_latency, search_results=args.search_latency, fare=args.fare_latency, drift=args.drift),
+		FakeFailures(no_results=args.no_results_rate, no_fare=args.no_fare_rate, multiple_points=args.multiple_points_rate),
+		args.seed
+	)
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+
+if __name__ == '__main__':
+	main()
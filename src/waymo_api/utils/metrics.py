@@ -0,0 +1,173 @@
+import io
+import json
+import math
+import time
+import pstats
+import cProfile
+import threading
+from pathlib import Path
+from functools import wraps
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Tuple, Optional, List
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .logger import get_logger
+logger = get_logger(__name__)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+class Histogram:
+	"""Latency samples for one step. Keeps a bounded window for quantiles and running totals"""
+
+	def __init__(self, window: int = 2048):
+		self._samples = deque(maxlen=window)
+		self.count = 0
+		self.total = 0.0
+
+	def observe(self, seconds: float) -> None:
+		self._samples.append(seconds)
+		self.count += 1
+		self.total += seconds
+
+	def quantiles(self, qs: Tuple[float, ...] = QUANTILES) -> Dict[float, Optional[float]]:
+		samples = sorted(self._samples)
+		if not samples:
+			return {q: None for q in qs}
+		return {q: samples[max(0, math.ceil(q * len(samples)) - 1)] for q in qs}
+
+class MetricsRegistry:
+	"""In-process latency histograms keyed by (step, device)"""
+
+	def __init__(self, window: int = 2048):
+		self.window = window
+		self._histograms: Dict[Tuple[str, str], Histogram] = {}
+		self._lock = threading.Lock()
+
+	def observe(self, step: str, seconds: float, device: Optional[str] = None) -> None:
+		key = (step, device or "")
+		with self._lock:
+			histogram = self._histograms.get(key)
+			if histogram is None:
+				histogram = self._histograms[key] = Histogram(self.window)
+			histogram.observe(seconds)
+
+	@contextmanager
+	def span(self, step: str, device: Optional[str] = None):
+		"""Time the enclosed block, recording it under `step` even if it raises"""
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.observe(step, time.perf_counter() - start, device)
+
+	def reset(self) -> None:
+		with self._lock:
+			self._histograms.clear()
+
+	def snapshot(self) -> List[Dict]:
+		"""Count, mean and p50/p95/p99 (seconds) for every step and device"""
+		with self._lock:
+			items = sorted(self._histograms.items())
+			rows = []
+			for (step, device), histogram in items:
+				quantiles = histogram.quantiles()
+				rows.append({
+					"step": step,
+					"device": device,
+					"count": histogram.count,
+					"mean": histogram.total / histogram.count,
+					"p50": quantiles[0.5],
+					"p95": quantiles[0.95],
+					"p99": quantiles[0.99],
+				})
+		return rows
+
+	def to_prometheus(self) -> str:
+		"""Render all histograms as a Prometheus summary in text exposition format"""
+		name = "waymo_step_duration_seconds"
+		lines = [
+			f"# HELP {name} Duration of each trip pipeline step",
+			f"# TYPE {name} summary",
+		]
+		with self._lock:
+			items = sorted(self._histograms.items())
+			for (step, device), histogram in items:
+				labels = f'step="{step}",device="{device}"'
+				for q, value in histogram.quantiles().items():
+					if value is not None:
+						lines.append(f'{name}{{{labels},quantile="{q}"}} {value:.6f}')
+				lines.append(f"{name}_sum{{{labels}}} {histogram.total:.6f}")
+				lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+		return "\n".join(lines) + "\n"
+
+	def serve(self, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+		"""Expose /metrics (Prometheus text) and /metrics.json from a background thread"""
+		registry = self
+
+		class Handler(BaseHTTPRequestHandler):
+			def do_GET(self):
+				if self.path == "/metrics":
+					body, content_type = registry.to_prometheus().encode(), "text/plain; version=0.0.4"
+				elif self.path == "/metrics.json":
+					body, content_type = json.dumps(registry.snapshot()).encode(), "application/json"
+				else:
+					self.send_error(404)
+					return
+				self.send_response(200)
+				self.send_header("Content-Type", content_type)
+				self.send_header("Content-Length", str(len(body)))
+				self.end_headers()
+				self.wfile.write(body)
+
+			def log_message(self, format, *args):
+				pass
+
+		server = ThreadingHTTPServer((host, port), Handler)
+		threading.Thread(target=server.serve_forever, name="waymo-metrics", daemon=True).start()
+		logger.info(f"Serving metrics on http://{host}:{server.server_port}/metrics")
+		return server
+
+	def write_snapshots(self, path: str, interval: float = 60.0) -> threading.Event:
+		"""Periodically overwrite `path` with a JSON snapshot. Set the returned event to stop"""
+		stop = threading.Event()
+		path = Path(path)
+
+		def run():
+			while not stop.wait(interval):
+				try:
+					path.write_text(json.dumps({"timestamp": time.time(), "steps": self.snapshot()}, indent=2))
+				except OSError as e:
+					logger.error(f"Failed to write metrics snapshot: {str(e)}")
+
+		threading.Thread(target=run, name="waymo-metrics-snapshot", daemon=True).start()
+		return stop
+
+metrics = MetricsRegistry()
+
+def timed(step: str):
+	"""Record a method's duration in the default registry, labelled with `self.device_name`"""
+	def decorator(func):
+		@wraps(func)
+		def wrapper(self, *args, **kwargs):
+			with metrics.span(step, getattr(self, "device_name", None)):
+				return func(self, *args, **kwargs)
+		return wrapper
+	return decorator
+
+@contextmanager
+def profile(output_file: Optional[str] = None, sort_by: str = "cumulative", limit: int = 30):
+	"""Run the enclosed block under cProfile, dumping stats to a file or logging the top entries"""
+	profiler = cProfile.Profile()
+	profiler.enable()
+	try:
+		yield profiler
+	finally:
+		profiler.disable()
+		if output_file:
+			profiler.dump_stats(output_file)
+			logger.info(f"Profile written to {output_file}")
+		else:
+			buffer = io.StringIO()
+			pstats.Stats(profiler, stream=buffer).sort_stats(sort_by).print_stats(limit)
+			logger.info(f"Profile (top {limit} by {sort_by}):\n{buffer.getvalue()}")
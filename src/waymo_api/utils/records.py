@@ -0,0 +1,46 @@
+from typing import Dict, Any
+
+from ..core.models import TripInfo
+
+TRIP_RECORD_FIELDS = [
+	'pickup_name','pickup_selected_title','pickup_city','pickup_time','pickup_date','pickup_wait_time_mins',
+	'dropoff_name','dropoff_selected_title','dropoff_city','dropoff_time','dropoff_date',
+	'trip_duration_mins','price_usd','price_std','price_currency',
+	'current_time','current_date','timezone','city',
+	'time_zone','current_datetime','pickup_datetime','dropoff_datetime'
+]
+
+def flatten_trip_info(trip_info: TripInfo) -> Dict[str, Any]:
+	"""Flatten the trip info returned by the extractor into a single row.
+
+	Local 'HH:MM' times and 'MM/DD/YYYY' dates are kept for CSV output, and the
+	exact instants are included as ISO 8601 strings with their UTC offset.
+	"""
+	current = trip_info.current_datetime.value
+	pickup_time = trip_info.pickup.time.value
+	dropoff_time = trip_info.dropoff.time.value
+	return {
+		'pickup_name': trip_info.pickup.location.address,
+		'pickup_selected_title': trip_info.pickup.location.selected_title,
+		'pickup_city': trip_info.pickup.location.city,
+		'pickup_time': pickup_time.strftime('%H:%M'),
+		'pickup_date': pickup_time.strftime('%m/%d/%Y'),
+		'pickup_wait_time_mins': trip_info.pickup.wait_time,
+		'dropoff_name': trip_info.dropoff.location.address,
+		'dropoff_selected_title': trip_info.dropoff.location.selected_title,
+		'dropoff_city': trip_info.dropoff.location.city,
+		'dropoff_time': dropoff_time.strftime('%H:%M'),
+		'dropoff_date': dropoff_time.strftime('%m/%d/%Y'),
+		'trip_duration_mins': trip_info.duration,
+		'price_usd': trip_info.price.value,
+		'price_std': trip_info.price.std, # None unless the price was estimated
+		'price_currency': trip_info.price.currency,
+		'current_time': current.strftime('%H:%M'),
+		'current_date': current.strftime('%m/%d/%Y'),
+		'timezone': current.strftime('%Z'),
+		'city': trip_info.city,
+		'time_zone': trip_info.current_datetime.time_zone,
+		'current_datetime': current.isoformat(),
+		'pickup_datetime': pickup_time.isoformat(),
+		'dropoff_datetime': dropoff_time.isoformat()
+	}
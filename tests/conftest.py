@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pytest
+
+from src.waymo_api.core.models import TripInfo, TimeInfo, LocationInfo, PriceInfo, WayPoint
+from src.waymo_api.locations.service_areas import SERVICE_AREAS
+
+@pytest.fixture
+def make_trip_info():
+	"""Factory for TripInfo objects quoted at a fixed local time in a service area"""
+	def make(
+		pickup: str = "Ferry Building",
+		dropoff: str = "Coit Tower",
+		price: float = 12.35,
+		std: Optional[float] = None,
+		city: str = "SF",
+		at: datetime = datetime(2026, 7, 1, 12, 0, 30),
+		wait: int = 5,
+		duration: int = 15
+	) -> TripInfo:
+		area = SERVICE_AREAS[city]
+		now = area.tz.localize(at)
+		pickup_at = now + timedelta(minutes=wait)
+		return TripInfo(
+			current_datetime=TimeInfo(now, area.time_zone),
+			price=PriceInfo(price, "USD", estimated=std is not None, std=std),
+			pickup=WayPoint(LocationInfo(pickup, city), TimeInfo(pickup_at, area.time_zone), wait),
+			dropoff=WayPoint(LocationInfo(dropoff, city), TimeInfo(pickup_at + timedelta(minutes=duration), area.time_zone), 0),
+			city=city,
+			duration=duration
+		)
+	return make
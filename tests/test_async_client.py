@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from src.waymo_api.core.async_client import AsyncWaymoClient
+from src.waymo_api.core.exceptions import WaymoClientError, SessionError
+from src.waymo_api.core.pool import DeviceConfig
+from src.waymo_api.interactions.actions import SEARCH_BOX, DROPOFF_INPUT, FIRST_RESULT, CONFIRM_BUTTON, PICKUP_WAYPOINT
+from src.waymo_api.interactions.screens import Screen, KEYCODE_BACK
+from src.waymo_api.testing.fake_appium import FakeAppiumServer, FakeLatency, FakeFailures
+
+LATENCY = FakeLatency(command=0.0, search_results=0.0, fare=0.0)
+
+def client_for(server: FakeAppiumServer, **kwargs) -> AsyncWaymoClient:
+	return AsyncWaymoClient([DeviceConfig("emulator-5554", server.url)], timeout=1, warm_start=False, **kwargs)
+
+async def open_confirm_dialog(session):
+	await session.click(await session.wait_for(SEARCH_BOX))
+	await session.set_value(await session.wait_for(DROPOFF_INPUT), "Ferry Building")
+	await session.click(await session.wait_for(FIRST_RESULT))
+
+async def open_pickup_search(session):
+	await open_confirm_dialog(session)
+	await session.click(await session.wait_for(CONFIRM_BUTTON))
+	await session.click(await session.wait_for(PICKUP_WAYPOINT))
+
+async def background_app(session):
+	await session.execute('mobile: pressKey', {'keycode': KEYCODE_BACK})
+
+@pytest.mark.parametrize("navigate, found", [
+	(open_confirm_dialog, Screen.CONFIRM),
+	(open_pickup_search, Screen.PICKUP_SEARCH),
+	(background_app, Screen.OUTSIDE_APP),
+])
+def test_recovery_walks_back_home(navigate, found):
+	async def run():
+		async with client_for(server) as client:
+			session = client._sessions[0]
+			first_id = session.session_id
+			await navigate(session)
+			assert await session.detect_screen() == found
+			await client._recover(session)
+			assert await session.detect_screen() == Screen.HOME
+			assert session.session_id == first_id # recovered without a restart
+
+	with FakeAppiumServer(latency=LATENCY, failures=FakeFailures(multiple_points=1.0)) as server:
+		asyncio.run(run())
+
+def test_failed_trip_leaves_device_home_and_usable():
+	async def run():
+		async with client_for(server) as client:
+			with pytest.raises(WaymoClientError):
+				await client.get_trip_info("Pier 39", "Ferry Building")
+			return await client._sessions[0].detect_screen()
+
+	with FakeAppiumServer(latency=LATENCY, failures=FakeFailures(no_results=1.0)) as server:
+		assert asyncio.run(run()) == Screen.HOME
+
+def test_restart_budget_retires_device():
+	async def run():
+		async with client_for(server, max_recovery_steps=0, max_session_restarts=1) as client:
+			session = client._sessions[0]
+			first_id = session.session_id
+			with pytest.raises(WaymoClientError) as restarted:
+				await client.get_trip_info("Pier 39", "Ferry Building")
+			assert not isinstance(restarted.value, SessionError)
+			assert session.session_id != first_id
+
+			with pytest.raises(SessionError, match="budget exhausted"):
+				await client.get_trip_info("Pier 39", "Ferry Building")
+			assert client._sessions == []
+			with pytest.raises(SessionError, match="No devices left"):
+				await client.get_trip_info("Pier 39", "Ferry Building")
+
+	with FakeAppiumServer(latency=LATENCY, failures=FakeFailures(no_results=1.0)) as server:
+		asyncio.run(run())
@@ -0,0 +1,56 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from src.waymo_api.core.batch import TripBatch
+from src.waymo_api.core.models import TripResult
+
+@pytest.fixture
+def trip_infos(make_trip_info):
+	estimated = make_trip_info("Pier 39", "Ferry Building", price=12.3456, std=0.5, at=datetime(2026, 7, 1, 8, 15))
+	selected = make_trip_info("Coit Tower", "Ferry Building", city="PHX", wait=7, duration=22)
+	selected.pickup.location.selected_title = "Coit Tower (Entrance)"
+	return [estimated, selected, make_trip_info()]
+
+def test_round_trip_keeps_every_field(trip_infos):
+	batch = TripBatch.from_trip_infos(trip_infos)
+	assert len(batch) == 3
+	assert list(batch) == trip_infos
+	assert batch[-1] == trip_infos[-1]
+	assert batch[0].price.value == 12.3456
+	assert batch[1].pickup.time.value.tzinfo.zone == "America/Phoenix"
+	with pytest.raises(IndexError):
+		batch[3]
+
+def test_selection_concat_and_decoding(trip_infos):
+	batch = TripBatch.from_results([TripResult("A", "B", error="no fare")] + [TripResult("x", "y", trip_info=t) for t in trip_infos])
+	assert len(batch) == 3
+	assert list(batch[1:]) == trip_infos[1:]
+	assert list(batch[batch.column('city') == "SF"]) == [trip_infos[0], trip_infos[2]]
+	assert list(batch.column('pickup_selected_title')) == [None, "Coit Tower (Entrance)", None]
+
+	joined = TripBatch.concat([batch[1:2], batch[0:1], batch[2:]])
+	assert list(joined) == [trip_infos[1], trip_infos[0], trip_infos[2]]
+	assert list(joined.column('city')) == ["PHX", "SF", "SF"]
+
+def test_to_pandas_shares_the_arrays(trip_infos):
+	batch = TripBatch.from_trip_infos(trip_infos)
+	df = batch.to_pandas()
+	assert np.shares_memory(df['price'].to_numpy(), batch.columns['price'])
+	assert np.shares_memory(df['current_datetime'].to_numpy(), batch.columns['current_datetime'])
+	# `.cat.codes` would return a copy; the Categorical itself holds the batch's codes
+	assert np.shares_memory(df['city'].array.codes, batch.columns['city'])
+	assert list(df['city']) == ["SF", "PHX", "SF"]
+	assert df['pickup_selected_title'].isna().tolist() == [True, False, True]
+	assert str(df['current_datetime'][0]) == "2026-07-01 15:15:00"
+
+def test_to_arrow_shares_the_arrays_and_marks_nulls(trip_infos):
+	pytest.importorskip("pyarrow")
+	batch = TripBatch.from_trip_infos(trip_infos)
+	table = batch.to_arrow()
+	price = table.column('price').chunk(0)
+	assert price.buffers()[1].address == batch.columns['price'].ctypes.data
+	assert table.column('price_std').to_pylist() == [0.5, None, None]
+	assert table.column('pickup_selected_title').to_pylist() == [None, "Coit Tower (Entrance)", None]
+	assert str(table.schema.field('current_datetime').type) == "timestamp[s, tz=UTC]"
@@ -0,0 +1,142 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.waymo_api.core.cache import CachedWaymoClient
+from src.waymo_api.core.exceptions import WaymoClientError
+from src.waymo_api.locations.gazetteer import Gazetteer, Place
+
+class FakeClock:
+	def __init__(self, now: float = 0.0):
+		self.now = now
+
+	def __call__(self) -> float:
+		return self.now
+
+class CountingClient:
+	"""Returns a distinct quote per pair and counts emulator queries"""
+
+	def __init__(self):
+		self.calls = []
+		self.lock = threading.Lock()
+
+	def get_trip_info(self, pickup: str, dropoff: str):
+		with self.lock:
+			self.calls.append((pickup, dropoff))
+			return f"{pickup} -> {dropoff} #{len(self.calls)}"
+
+def piers() -> Gazetteer:
+	return Gazetteer([
+		Place("sf:pier-39", "Pier 39", "Fisherman's Wharf", 37.8087, -122.4098, "SF"),
+		Place("sf:ferry-building", "Ferry Building", "Embarcadero", 37.7955, -122.3937, "SF"),
+	])
+
+def test_near_names_never_share_a_key():
+	# Fuzzy resolution maps both "Pier 35" and "Pier 3" to Pier 39
+	cache = CachedWaymoClient(CountingClient(), clock=FakeClock(), gazetteer=piers())
+	keys = {cache.make_key(pickup, "Ferry Building") for pickup in ("Pier 39", "Pier 35", "Pier 3")}
+	assert len(keys) == 3
+
+def test_spelling_variants_of_a_place_share_a_key():
+	cache = CachedWaymoClient(CountingClient(), clock=FakeClock(), gazetteer=piers())
+	assert cache.make_key("Pier 39", "Ferry Building") == cache.make_key("pier 39, San Francisco, CA", "ferry  building")
+	assert cache.make_key("Pier 39", "Ferry Building")[:2] == ("sf:pier-39", "sf:ferry-building")
+
+def test_near_names_get_their_own_prices():
+	client = CountingClient()
+	cache = CachedWaymoClient(client, clock=FakeClock(), gazetteer=piers())
+	assert cache.get_trip_info("Pier 39", "Ferry Building") != cache.get_trip_info("Pier 3", "Ferry Building")
+	assert cache.get_trip_info("pier 39", "Ferry Building") == cache.get_trip_info("Pier 39", "Ferry Building")
+	assert len(client.calls) == 2
+
+def test_entries_expire_after_ttl_and_bucket():
+	clock = FakeClock(0)
+	client = CountingClient()
+	cache = CachedWaymoClient(client, ttl=300, bucket_seconds=900, clock=clock)
+	cache.get_trip_info("A", "B")
+	clock.now = 299
+	cache.get_trip_info("A", "B")
+	assert len(client.calls) == 1
+	clock.now = 301
+	cache.get_trip_info("A", "B")
+	assert len(client.calls) == 2
+	clock.now = 900 # new bucket, although the entry is within its ttl
+	cache.get_trip_info("A", "B")
+	assert len(client.calls) == 3
+
+def test_concurrent_identical_requests_share_one_query():
+	release = threading.Event()
+	client = CountingClient()
+	query = client.get_trip_info
+
+	def slow_query(pickup, dropoff):
+		release.wait(5)
+		return query(pickup, dropoff)
+
+	client.get_trip_info = slow_query
+	cache = CachedWaymoClient(client, clock=FakeClock())
+	with ThreadPoolExecutor(5) as executor:
+		futures = [executor.submit(cache.get_trip_info, "A", "B") for _ in range(5)]
+		while cache.stats.misses + cache.stats.coalesced < 5:
+			threading.Event().wait(0.01)
+		release.set()
+		results = {future.result(5) for future in futures}
+
+	assert len(client.calls) == 1
+	assert results == {"A -> B #1"}
+	assert (cache.stats.misses, cache.stats.coalesced) == (1, 4)
+
+def test_failed_query_reaches_waiters_and_is_not_cached():
+	release = threading.Event()
+	attempts = []
+
+	class FailingClient:
+		def get_trip_info(self, pickup, dropoff):
+			attempts.append((pickup, dropoff))
+			if len(attempts) == 1:
+				release.wait(5)
+				raise WaymoClientError("no fare")
+			return "quote"
+
+	cache = CachedWaymoClient(FailingClient(), clock=FakeClock())
+	with ThreadPoolExecutor(3) as executor:
+		futures = [executor.submit(cache.get_trip_info, "A", "B") for _ in range(3)]
+		while cache.stats.misses + cache.stats.coalesced < 3:
+			threading.Event().wait(0.01)
+		release.set()
+		for future in futures:
+			with pytest.raises(WaymoClientError):
+				future.result(5)
+
+	assert cache.get_trip_info("A", "B") == "quote"
+	assert len(attempts) == 2
+
+def test_callers_get_independent_copies(make_trip_info):
+	class TripClient:
+		def get_trip_info(self, pickup, dropoff):
+			return make_trip_info(pickup, dropoff)
+
+	cache = CachedWaymoClient(TripClient(), clock=FakeClock())
+	first = cache.get_trip_info("A", "B")
+	first.pickup.location.selected_title = "changed by the first caller"
+	second = cache.get_trip_info("A", "B")
+	second.price.value = 0
+	third = cache.get_trip_info("A", "B")
+
+	assert third.pickup.location.selected_title is None
+	assert third.price.value == 12.35
+	assert cache.stats.hits == 2
+
+def test_invalidate_by_one_side():
+	client = CountingClient()
+	cache = CachedWaymoClient(client, clock=FakeClock())
+	for pickup, dropoff in (("A", "B"), ("A", "C"), ("X", "B")):
+		cache.get_trip_info(pickup, dropoff)
+
+	cache.invalidate(pickup="a")
+	assert len(cache) == 1
+	cache.invalidate(dropoff="B")
+	assert len(cache) == 0
+	cache.get_trip_info("A", "C")
+	assert len(client.calls) == 4
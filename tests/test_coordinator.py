@@ -0,0 +1,123 @@
+from datetime import datetime
+
+import pytest
+import pytz
+
+from src.waymo_api.core.jobs import JobJournal, DONE, FAILED
+from src.waymo_api.core.models import TripInfo, TimeInfo, LocationInfo, PriceInfo, WayPoint
+from src.waymo_api.service.coordinator import CrawlCoordinator
+
+TRIPS = [{"pickup": f"P{i}", "dropoff": "D"} for i in range(4)]
+
+class FakeClock:
+	def __init__(self):
+		self.now = 0.0
+
+	def __call__(self) -> float:
+		return self.now
+
+class RecordingSink:
+	def __init__(self):
+		self.records = []
+
+	def write(self, record):
+		self.records.append(record)
+
+def trip_info(pickup: str) -> dict:
+	tz = pytz.timezone("America/Los_Angeles")
+	now = tz.localize(datetime(2026, 7, 1, 12, 0))
+	return TripInfo(
+		TimeInfo(now, tz.zone),
+		PriceInfo(12.35, "USD"),
+		WayPoint(LocationInfo(pickup, "SF"), TimeInfo(now, tz.zone), 5),
+		WayPoint(LocationInfo("D", "SF"), TimeInfo(now, tz.zone), 0),
+		"SF",
+		15
+	).to_dict()
+
+def success(pair: dict) -> dict:
+	return {"id": pair["id"], "trip_info": trip_info(pair["pickup"])}
+
+def failure(pair: dict) -> dict:
+	return {"id": pair["id"], "error": "no fare"}
+
+@pytest.fixture
+def setup(tmp_path):
+	journal = JobJournal(str(tmp_path / "job.sqlite"))
+	journal.plan(TRIPS)
+	clock, sink = FakeClock(), RecordingSink()
+	coordinator = CrawlCoordinator(journal, sink, lease_ttl=10, max_attempts=2, clock=clock)
+	yield coordinator, clock, sink
+	journal.close()
+
+def test_expired_lease_goes_back_to_the_front_of_the_queue(setup):
+	coordinator, clock, _ = setup
+	first = coordinator.lease("a", 2)
+	clock.now = 10
+	second = coordinator.lease("b", 2)
+	assert [pair["id"] for pair in second["pairs"]] == [pair["id"] for pair in first["pairs"]]
+	assert coordinator.stats.expired_leases == 1
+	assert coordinator.heartbeat("a", [first["lease_id"]]) == {"expired": [first["lease_id"]]}
+
+def test_heartbeat_keeps_a_lease(setup):
+	coordinator, clock, _ = setup
+	first = coordinator.lease("a", 2)
+	clock.now = 8
+	assert coordinator.heartbeat("a", [first["lease_id"]]) == {"expired": []}
+	clock.now = 16
+	second = coordinator.lease("b", 2)
+	assert {pair["id"] for pair in first["pairs"]}.isdisjoint(pair["id"] for pair in second["pairs"])
+	assert coordinator.stats.expired_leases == 0
+
+def test_duplicate_results_are_stored_once(setup):
+	coordinator, clock, sink = setup
+	first = coordinator.lease("a", 1)
+	clock.now = 10
+	second = coordinator.lease("b", 1)
+	pair = second["pairs"][0]
+
+	assert coordinator.ingest("b", second["lease_id"], [success(pair)]) == {"accepted": 1}
+	# The late result from the expired lease is dropped
+	assert coordinator.ingest("a", first["lease_id"], [success(pair)]) == {"accepted": 0}
+	assert coordinator.stats.duplicates == 1
+	assert [record["pickup_name"] for record in sink.records] == [pair["pickup"]]
+	assert coordinator.journal.get(pair["id"])[2] == DONE
+
+def test_late_result_finishes_a_requeued_pair(setup):
+	coordinator, clock, sink = setup
+	first = coordinator.lease("a", 1)
+	pair = first["pairs"][0]
+	clock.now = 10
+	coordinator.ingest("a", first["lease_id"], [success(pair)])
+	# The pair was requeued when the lease expired, but is skipped now that it is done
+	leased = coordinator.lease("b", 4)
+	assert pair["id"] not in [p["id"] for p in leased["pairs"]]
+	assert len(sink.records) == 1
+
+def test_failure_from_a_superseded_lease_is_ignored(setup):
+	coordinator, clock, _ = setup
+	first = coordinator.lease("a", 1)
+	clock.now = 10
+	second = coordinator.lease("b", 1)
+	pair = second["pairs"][0]
+
+	assert coordinator.ingest("a", first["lease_id"], [failure(pair)]) == {"accepted": 0}
+	assert coordinator.stats.stale_failures == 1
+	assert coordinator.journal.get(pair["id"])[3] == 0 # no attempt recorded
+	assert coordinator.ingest("b", second["lease_id"], [success(pair)]) == {"accepted": 1}
+	assert coordinator.journal.get(pair["id"])[2] == DONE
+
+def test_failures_are_requeued_until_max_attempts(setup):
+	coordinator, _, _ = setup
+	attempts = 0
+	while True:
+		lease = coordinator.lease("a", 4)
+		if not lease["pairs"]:
+			break
+		coordinator.ingest("a", lease["lease_id"], [failure(pair) if pair["pickup"] == "P0" else success(pair) for pair in lease["pairs"]])
+		attempts += 1
+
+	assert lease["done"]
+	assert attempts == 2
+	assert coordinator.journal.counts() == {"pending": 0, DONE: 3, FAILED: 1}
+	assert coordinator.status()["leased"] == 0
@@ -0,0 +1,56 @@
+from collections import Counter
+
+from src.waymo_api.locations.coverage import CoveragePlanner, haversine_km
+from src.waymo_api.locations.gazetteer import Place
+
+def grid(size: int = 8, step_deg: float = 0.0055):
+	"""Places on a square grid about 0.5 km apart, with one neighborhood per quadrant"""
+	places = []
+	for row in range(size):
+		for col in range(size):
+			neighborhood = f"{'N' if row < size // 2 else 'S'}{'W' if col < size // 2 else 'E'}"
+			places.append(Place(f"sf:{row}-{col}", f"Stop {row}-{col}", neighborhood, 37.76 + row * step_deg, -122.44 + col * step_deg * 1.26, "SF"))
+	return places
+
+def test_plan_returns_distinct_spread_pairs():
+	planner = CoveragePlanner(grid(), seed=7)
+	pairs = planner.plan(40)
+	assert len(pairs) == 40
+	ids = [(p.pickup.place_id, p.dropoff.place_id) for p in pairs]
+	assert len(set(ids)) == 40
+	assert all(p.distance_km >= planner.min_distance_km for p in pairs)
+	for p in pairs:
+		assert abs(haversine_km(p.pickup.latitude, p.pickup.longitude, p.dropoff.latitude, p.dropoff.longitude) - p.distance_km) < 1e-9
+
+	# Every band with pairs to offer gets an even share
+	per_band = Counter(p.band for p in pairs)
+	assert sorted(per_band) == [0, 1, 2, 3]
+	assert max(per_band.values()) - min(per_band.values()) <= 1
+
+def test_plan_groups_pairs_by_dropoff():
+	pairs = CoveragePlanner(grid(), seed=7).plan(40)
+	dropoffs = [p.dropoff.place_id for p in pairs]
+	# Each dropoff appears as one contiguous run
+	runs = [d for i, d in enumerate(dropoffs) if i == 0 or d != dropoffs[i - 1]]
+	assert len(runs) == len(set(dropoffs))
+	sizes = [dropoffs.count(d) for d in runs]
+	assert sizes == sorted(sizes, reverse=True)
+
+def test_near_duplicates_are_skipped():
+	places = grid(4) + [Place("sf:next-to-0-0", "Next to 0-0", "NW", 37.7601, -122.4401, "SF")]
+	pairs = CoveragePlanner(places, near_duplicate_km=0.15, seed=1).plan(1000)
+	for a in pairs:
+		for b in pairs:
+			if a is not b:
+				close_pickups = haversine_km(a.pickup.latitude, a.pickup.longitude, b.pickup.latitude, b.pickup.longitude) <= 0.15
+				close_dropoffs = haversine_km(a.dropoff.latitude, a.dropoff.longitude, b.dropoff.latitude, b.dropoff.longitude) <= 0.15
+				assert not (close_pickups and close_dropoffs)
+
+def test_same_seed_same_plan_and_report_adds_up():
+	planner = CoveragePlanner(grid(), seed=3)
+	first = planner.plan(25)
+	assert [p.as_trip() for p in first] == [p.as_trip() for p in CoveragePlanner(grid(), seed=3).plan(25)]
+	report = planner.report(first)
+	assert report.pairs == 25 and sum(report.pairs_per_band.values()) == 25
+	assert report.neighborhood_pairs_total == 16
+	assert 0 < report.strata_coverage <= 1
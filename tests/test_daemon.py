@@ -0,0 +1,19 @@
+from src.waymo_api.core.pool import DeviceConfig
+from src.waymo_api.service.daemon import QuoteDaemon
+
+def make_daemon(tmp_path) -> QuoteDaemon:
+	return QuoteDaemon([DeviceConfig("emulator-5554", "http://127.0.0.1:4723", 8200)], socket_path=str(tmp_path / "daemon.sock"))
+
+def test_status_does_not_reset_idle_clock(tmp_path):
+	daemon = make_daemon(tmp_path)
+	daemon.last_request = 0.0
+	assert daemon.handle({"op": "status"})["ok"]
+	assert daemon.handle({"op": "bogus"})["ok"] is False
+	assert daemon.last_request == 0.0
+
+def test_quote_requests_reset_idle_clock(tmp_path):
+	daemon = make_daemon(tmp_path)
+	daemon.last_request = 0.0
+	response = daemon.handle({"op": "quote", "pickup": "A"})
+	assert response == {"ok": False, "error": "Missing field 'dropoff'"}
+	assert daemon.last_request > 0.0
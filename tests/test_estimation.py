@@ -0,0 +1,66 @@
+from datetime import datetime
+from typing import List, Dict
+
+import numpy as np
+
+from src.waymo_api.core.models import TripResult
+from src.waymo_api.estimation.client import EstimatingClient
+from src.waymo_api.estimation.model import PriceEstimates
+from src.waymo_api.locations.gazetteer import Gazetteer, Place
+
+def gazetteer() -> Gazetteer:
+	return Gazetteer([
+		Place("sf:pier-39", "Pier 39", "Fisherman's Wharf", 37.8087, -122.4098, "SF"),
+		Place("sf:ferry-building", "Ferry Building", "Embarcadero", 37.7955, -122.3937, "SF"),
+		Place("sf:coit-tower", "Coit Tower", "Telegraph Hill", 37.8024, -122.4058, "SF"),
+	])
+
+class StubModel:
+	"""Prices trips from Pier 39 confidently and everything else with a wide spread"""
+	is_fitted = True
+
+	def predict_places(self, pickups, dropoffs, hour) -> PriceEstimates:
+		sure = np.array([p.name == "Pier 39" for p in pickups])
+		n = len(pickups)
+		return PriceEstimates(
+			price=np.full(n, 12.3456),
+			price_std=np.where(sure, 0.4321, 9.0),
+			duration_mins=np.full(n, 14.6),
+			wait_time_mins=np.full(n, 4.4),
+			distance_km=np.full(n, 2.0),
+		)
+
+class BatchingClient:
+	def __init__(self, make_trip_info):
+		self.make_trip_info = make_trip_info
+		self.batches: List[List[Dict[str, str]]] = []
+
+	def get_trip_infos(self, trips: List[Dict[str, str]]) -> List[TripResult]:
+		self.batches.append(trips)
+		return [TripResult(t["pickup"], t["dropoff"], trip_info=self.make_trip_info(t["pickup"], t["dropoff"])) for t in trips]
+
+def test_estimates_keep_model_precision(make_trip_info):
+	client = EstimatingClient(BatchingClient(make_trip_info), StubModel(), gazetteer(), clock=lambda: datetime(2026, 7, 1, 12, 0, 30))
+	trip_info = client.get_trip_info("Pier 39", "Ferry Building")
+	assert trip_info.price.estimated
+	assert trip_info.price.value == 12.3456
+	assert trip_info.price.std == 0.4321
+	assert trip_info.pickup.wait_time == 4
+	assert trip_info.duration == 15
+	assert trip_info.current_datetime.value.isoformat() == "2026-07-01T12:00:30-07:00"
+	assert (trip_info.dropoff.time.value - trip_info.current_datetime.value).total_seconds() == 19 * 60
+
+def test_uncertain_trips_go_live_in_one_batch(make_trip_info):
+	live = BatchingClient(make_trip_info)
+	client = EstimatingClient(live, StubModel(), gazetteer())
+	trips = [
+		{"pickup": "Coit Tower", "dropoff": "Pier 39"},
+		{"pickup": "Pier 39", "dropoff": "Ferry Building"},
+		{"pickup": "Ferry Building", "dropoff": "Pier 39"},
+		{"pickup": "Nowhere", "dropoff": "Pier 39"},
+	]
+	results = client.get_trip_infos(trips)
+	assert live.batches == [[trips[0], trips[2], trips[3]]]
+	assert [r.pickup for r in results] == [t["pickup"] for t in trips]
+	assert [r.trip_info.price.estimated for r in results] == [False, True, False, False]
+	assert (client.stats.estimated, client.stats.live, client.stats.unresolved) == (1, 3, 1)
@@ -0,0 +1,48 @@
+from pathlib import Path
+from datetime import datetime
+
+from src.waymo_api.interactions.extractor import parse_trip_screen, TripInfoExtractor
+from src.waymo_api.locations.service_areas import SERVICE_AREAS
+
+DATA = Path(__file__).parent / "data"
+
+def trip_screen() -> str:
+	# Captured from the fake Appium server on the trip screen, Coit Tower <- Ferry Building
+	return (DATA / "trip_screen.xml").read_text()
+
+def test_parse_trip_screen_reads_every_field():
+	assert parse_trip_screen(trip_screen()) == {
+		"pickup_wait": "8 min",
+		"dropoff_time": "8:11",
+		"period": "PM",
+		"price": "$17.42",
+	}
+
+def test_parse_trip_screen_without_fare_is_none():
+	page_source = trip_screen().replace("com.waymo.carapp:id/fare_estimate_text", "com.waymo.carapp:id/other_text")
+	assert parse_trip_screen(page_source) is None
+
+def test_parse_trip_screen_ignores_eta_outside_view_switcher():
+	# The pickup ETA only counts inside the ViewSwitcher following the PICKUP label
+	page_source = trip_screen().replace("android.widget.ViewSwitcher", "android.widget.FrameLayout")
+	assert parse_trip_screen(page_source) is None
+
+def test_parse_trip_screen_on_home_screen_is_none():
+	page_source = (
+		'<?xml version="1.0" encoding="UTF-8"?><hierarchy rotation="0">'
+		'<android.widget.FrameLayout><android.widget.TextView text="Where to?" clickable="true"/>'
+		'</android.widget.FrameLayout></hierarchy>'
+	)
+	assert parse_trip_screen(page_source) is None
+
+def test_parsed_fields_build_trip_info_in_service_area_time():
+	extractor = TripInfoExtractor(None, None, service_area=SERVICE_AREAS["PHX"])
+	fields = parse_trip_screen(trip_screen())
+	trip_info = extractor._build_trip_info("Ferry Building", "Coit Tower", fields, datetime(2026, 7, 1, 19, 55))
+
+	assert trip_info.price.value == 17.42
+	assert trip_info.city == "PHX"
+	assert trip_info.pickup.wait_time == 8
+	assert trip_info.pickup.time.value.isoformat() == "2026-07-01T20:03:00-07:00"
+	assert trip_info.dropoff.time.value.isoformat() == "2026-07-01T20:11:00-07:00"
+	assert trip_info.duration == 8
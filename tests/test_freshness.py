@@ -0,0 +1,121 @@
+import pytest
+
+from src.waymo_api.core.exceptions import WaymoClientError
+from src.waymo_api.core.freshness import FreshnessScheduler
+from src.waymo_api.core.models import TripResult
+
+class FakeClock:
+	def __init__(self, now: float = 1000.0):
+		self.now = now
+
+	def __call__(self) -> float:
+		return self.now
+
+class FakeStop:
+	"""Stands in for the scheduler's stop event, so waiting for due pairs advances the fake clock"""
+
+	def __init__(self, clock: FakeClock):
+		self.clock = clock
+
+	def is_set(self) -> bool:
+		return False
+
+	def wait(self, seconds: float) -> None:
+		self.clock.now += seconds
+
+class SlowClient:
+	"""Answers every trip after `seconds` of fake time, failing the given pickups"""
+
+	def __init__(self, clock: FakeClock, seconds: float, fail=(), make_trip_info=None):
+		self.clock = clock
+		self.seconds = seconds
+		self.fail = set(fail)
+		self.make_trip_info = make_trip_info
+
+	def iter_trip_info(self, trips):
+		for trip in trips:
+			self.clock.now += self.seconds
+			if trip["pickup"] in self.fail:
+				yield TripResult(trip["pickup"], trip["dropoff"], error="no fare")
+			else:
+				yield TripResult(trip["pickup"], trip["dropoff"], trip_info=self.make_trip_info(trip["pickup"], trip["dropoff"]))
+
+def scheduler(clock, **kwargs):
+	trips = [
+		{"pickup": "A", "dropoff": "X", "interval": 60},
+		{"pickup": "B", "dropoff": "X", "interval": 120, "weight": 3},
+		{"pickup": "C", "dropoff": "X", "interval": 60},
+	]
+	fresh = FreshnessScheduler(trips, clock=clock, **kwargs)
+	fresh._stop = FakeStop(clock)
+	return fresh
+
+def ok(pickup):
+	return TripResult(pickup, "X", trip_info=object())
+
+def test_unobserved_pairs_go_first_by_weight_and_are_not_handed_out_twice():
+	clock = FakeClock()
+	fresh = scheduler(clock, batch_size=2)
+	assert [p.pickup for p in fresh.next_batch()] == ["B", "A"]
+	assert [p.pickup for p in fresh.next_batch()] == ["C"]
+	assert fresh.next_batch() == []
+
+def test_most_overdue_pair_comes_first():
+	clock = FakeClock()
+	fresh = scheduler(clock)
+	fresh.next_batch()
+	fresh.record(ok("B"))
+	clock.now += 10
+	fresh.record(ok("A"))
+	clock.now += 10
+	fresh.record(ok("C"))
+	clock.now += 55
+	assert [p.pickup for p in fresh.next_batch()] == ["A"]
+	assert fresh.seconds_until_due() == 5
+	clock.now += 60
+	# C is due 55s ago and B, with twice the interval, 5s ago
+	assert [p.pickup for p in fresh.next_batch()] == ["C", "B"]
+
+def test_failed_pairs_are_retried_after_the_delay():
+	clock = FakeClock()
+	fresh = scheduler(clock, retry_delay=30)
+	fresh.next_batch()
+	fresh.record(TripResult("A", "X", error="no fare"))
+	fresh.record(ok("B"))
+	fresh.record(ok("C"))
+	clock.now += 29
+	assert fresh.next_batch() == []
+	clock.now += 1
+	assert [p.pickup for p in fresh.next_batch()] == ["A"]
+	assert fresh.report().failures == 1
+
+def test_slow_devices_stretch_low_weight_intervals_most(make_trip_info):
+	clock = FakeClock()
+	fresh = scheduler(clock, report_interval=1e9)
+	# Needs 2.5 trips/min but the client does 1 per minute
+	results = list(fresh.run(SlowClient(clock, 60, make_trip_info=make_trip_info), duration=1800))
+	assert all(r.success for r in results)
+	assert fresh.interval_factor > 2
+	a, b, _ = fresh.pairs
+	# Stretch per pair is interval_factor / weight, never below the target
+	assert (fresh.due_at(a) - a.last_observed) / a.interval == pytest.approx(fresh.interval_factor)
+	assert (fresh.due_at(b) - b.last_observed) / b.interval == pytest.approx(max(1.0, fresh.interval_factor / 3))
+	report = fresh.report()
+	assert report.required_per_min == pytest.approx(2.5)
+	assert report.throughput_per_min == pytest.approx(1.0)
+
+def test_unanswered_pairs_are_requeued_when_the_client_raises():
+	class BrokenClient:
+		def iter_trip_info(self, trips):
+			yield ok(trips[0]["pickup"])
+			raise WaymoClientError("session lost")
+
+	clock = FakeClock()
+	fresh = scheduler(clock)
+	with pytest.raises(WaymoClientError):
+		list(fresh.run(BrokenClient(), duration=10))
+	assert [p.pickup for p in fresh.next_batch()] == ["A", "C"]
+
+def test_pairs_are_tracked_once():
+	with pytest.raises(WaymoClientError, match="tracked twice"):
+		FreshnessScheduler([{"pickup": "A", "dropoff": "X"}, {"pickup": "A", "dropoff": "X"}])
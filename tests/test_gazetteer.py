@@ -0,0 +1,41 @@
+from src.waymo_api.locations.gazetteer import Gazetteer, Place, normalize_name
+
+PIER_39 = Place("sf:pier-39", "Pier 39", "Fisherman's Wharf", 37.8087, -122.4098, "SF")
+PIER_35 = Place("sf:pier-35", "Pier 35", "North Beach", 37.8051, -122.4040, "SF")
+FERRY = Place("sf:ferry-building", "Ferry Building", "Embarcadero", 37.7955, -122.3937, "SF")
+
+def gazetteer() -> Gazetteer:
+	return Gazetteer([PIER_39, PIER_35, FERRY])
+
+def test_normalize_name_drops_punctuation_and_city_suffixes():
+	assert normalize_name("  Ferry Building, San Francisco, CA ") == "ferry building"
+	assert normalize_name("Fisherman's Wharf & Pier 39, SF, USA") == "fisherman s wharf and pier 39"
+
+def test_lookup_needs_an_exact_normalized_name():
+	places = gazetteer()
+	assert places.lookup("pier 39, San Francisco") is PIER_39
+	assert places.lookup("Pier 3") is None
+	assert places.canonical_id("Pier 3") == "pier 3"
+	assert places.canonical_id("PIER 39") == "sf:pier-39"
+
+def test_resolve_falls_back_to_prefix_and_trigrams():
+	places = gazetteer()
+	assert places.resolve("Ferry Building").score == 1.0
+	assert (places.resolve("ferry b").place, places.resolve("ferry b").score) == (FERRY, 0.95)
+	typo = places.resolve("Fery Buildng")
+	assert typo.place is FERRY and 0.6 <= typo.score < 1.0
+	# "pier 3" starts both piers, so only trigrams can place it, and never as an exact match
+	near = places.resolve("Pier 3")
+	assert near.place in (PIER_39, PIER_35) and near.score < 0.95
+	assert places.resolve("Golden Gate Park") is None
+	assert places.resolve(", CA") is None
+
+def test_duplicate_names_keep_the_first_place():
+	places = Gazetteer([FERRY, Place("sf:ferry-2", "ferry building", "SoMa", 37.0, -122.0, "SF")])
+	assert list(places.places) == ["sf:ferry-building"]
+
+def test_from_csv_slugs_place_ids(tmp_path):
+	path = tmp_path / "places.csv"
+	path.write_text("name,neighborhood,latitude,longitude\nCoit Tower,Telegraph Hill,37.8024,-122.4058\n")
+	[place] = Gazetteer.from_csv(str(path), city="SF").places.values()
+	assert place == Place("sf:coit-tower", "Coit Tower", "Telegraph Hill", 37.8024, -122.4058, "SF")
@@ -0,0 +1,70 @@
+from src.waymo_api.core.health import SessionWatchdog, HealthAction
+
+def watchdog(**kwargs) -> SessionWatchdog:
+	return SessionWatchdog(window=10, baseline_trips=4, **kwargs)
+
+def run(dog: SessionWatchdog, seconds: float, trips: int, success: bool = True) -> None:
+	for _ in range(trips):
+		dog.record(seconds, success)
+
+def test_no_action_at_the_thresholds():
+	dog = watchdog()
+	run(dog, 2.0, 4)
+	assert dog.stats.baseline == 2.0
+	run(dog, 3.0, 10) # exactly 1.5x the baseline
+	assert dog.stats.recent == 3.0
+	assert dog.check() is None
+	run(dog, None, 3, success=False) # 3 of 10 failed: the maximum error rate, not above it
+	assert dog.stats.error_rate == 0.3
+	assert dog.check() is None
+
+def test_too_few_trips_since_an_action_are_not_judged():
+	dog = watchdog()
+	run(dog, 2.0, 4)
+	dog.acted(HealthAction.RESTART_APP)
+	run(dog, 9.0, 4) # half the window is needed
+	assert dog.check() is None
+	run(dog, 9.0, 1)
+	assert dog.check() == HealthAction.RECYCLE_SESSION
+
+def test_escalates_from_app_restart_to_new_session_then_rebaselines():
+	dog = watchdog()
+	run(dog, 2.0, 10)
+	run(dog, 4.0, 10)
+	assert dog.check() == HealthAction.RESTART_APP
+	dog.acted(HealthAction.RESTART_APP)
+	assert dog.check() is None # the window starts over after an action
+
+	run(dog, 4.0, 5)
+	assert dog.check() == HealthAction.RECYCLE_SESSION
+	dog.acted(HealthAction.RECYCLE_SESSION)
+
+	# Still slow on a fresh session: the slowdown is outside the device
+	run(dog, 4.0, 5)
+	assert dog.check() is None
+	assert dog.stats.baseline == 4.0
+	assert (dog.stats.app_restarts, dog.stats.session_recycles) == (1, 1)
+
+def test_drift_long_after_an_action_starts_over_with_an_app_restart():
+	dog = watchdog()
+	run(dog, 2.0, 10)
+	run(dog, 4.0, 10)
+	dog.acted(dog.check())
+	run(dog, 2.0, 11)
+	run(dog, 4.0, 10)
+	assert dog.check() == HealthAction.RESTART_APP
+
+def test_high_error_rate_restarts_the_app():
+	dog = watchdog()
+	run(dog, 2.0, 6)
+	run(dog, None, 4, success=False)
+	assert dog.stats.error_rate == 0.4
+	assert dog.check() == HealthAction.RESTART_APP
+
+def test_sessions_are_recycled_after_max_trips():
+	dog = watchdog(max_session_trips=5)
+	run(dog, 2.0, 5)
+	assert dog.check() == HealthAction.RECYCLE_SESSION
+	dog.acted(HealthAction.RECYCLE_SESSION)
+	run(dog, 2.0, 4)
+	assert dog.check() is None
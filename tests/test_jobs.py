@@ -0,0 +1,63 @@
+import pytest
+
+from src.waymo_api.core.jobs import BatchJob, JobJournal, DONE, FAILED
+from src.waymo_api.core.models import TripResult
+from src.waymo_api.core.exceptions import WaymoClientError
+
+TRIPS = [{"pickup": f"P{i}", "dropoff": "D"} for i in range(5)]
+
+class ScriptedClient:
+	"""Answers trips in order; `failing` pickups fail and `crash_after` interrupts the run"""
+
+	def __init__(self, failing=(), crash_after=None):
+		self.failing = set(failing)
+		self.crash_after = crash_after
+		self.runs = []
+
+	def iter_trip_info(self, trips):
+		self.runs.append([trip["pickup"] for trip in trips])
+		for i, trip in enumerate(trips):
+			if self.crash_after is not None and i == self.crash_after:
+				raise KeyboardInterrupt
+			error = "no fare" if trip["pickup"] in self.failing else None
+			yield TripResult(trip["pickup"], trip["dropoff"], error=error)
+
+def test_plan_only_once(tmp_path):
+	journal = JobJournal(str(tmp_path / "job.sqlite"))
+	journal.plan(TRIPS)
+	with pytest.raises(WaymoClientError):
+		journal.plan(TRIPS)
+	journal.close()
+
+def test_interrupted_job_resumes_where_it_stopped(tmp_path):
+	path = str(tmp_path / "job.sqlite")
+	with BatchJob(path) as job:
+		job.plan(TRIPS)
+		with pytest.raises(KeyboardInterrupt):
+			for _ in job.run(ScriptedClient(crash_after=2)):
+				pass
+		assert job.journal.counts()[DONE] == 2
+
+	client = ScriptedClient()
+	with BatchJob(path) as job:
+		assert job.is_planned()
+		results = list(job.run(client))
+		assert job.journal.counts() == {"pending": 0, DONE: 5, FAILED: 0}
+	assert client.runs == [["P2", "P3", "P4"]]
+	assert [result.pickup for result in results] == ["P2", "P3", "P4"]
+
+def test_failed_pairs_retry_until_max_attempts(tmp_path):
+	client = ScriptedClient(failing={"P1"})
+	with BatchJob(str(tmp_path / "job.sqlite"), max_attempts=3) as job:
+		job.plan(TRIPS)
+		results = list(job.run(client))
+		assert job.journal.counts() == {"pending": 0, DONE: 4, FAILED: 1}
+		assert job.journal.runnable(3) == []
+	assert client.runs[1:] == [["P1"], ["P1"]]
+	assert sum(not result.success for result in results) == 3
+
+def test_repeated_pairs_are_journaled_separately(tmp_path):
+	with BatchJob(str(tmp_path / "job.sqlite")) as job:
+		job.plan([{"pickup": "A", "dropoff": "B"}] * 3)
+		assert len(list(job.run(ScriptedClient()))) == 3
+		assert job.journal.counts()[DONE] == 3
@@ -0,0 +1,51 @@
+import pytest
+from appium.webdriver.common.appiumby import AppiumBy
+
+from src.waymo_api.core.driver import AppiumDriverManager
+from src.waymo_api.interactions.actions import WaymoActions
+from src.waymo_api.interactions.locators import LocatorRegistry
+from src.waymo_api.interactions.waits import AdaptiveWait
+from src.waymo_api.testing.fake_appium import FakeAppiumServer, FakeLatency
+
+SEARCH_XPATH = (AppiumBy.XPATH, "//android.widget.TextView[contains(@text, 'Where to')]")
+SEARCH_SELECTOR = (AppiumBy.ANDROID_UIAUTOMATOR, 'new UiSelector().textContains("Where to")')
+MISSING = (AppiumBy.ID, "com.waymo.carapp:id/no_such_view")
+
+@pytest.fixture
+def driver():
+	# XPath lookups cost a hierarchy dump, as on a device
+	with FakeAppiumServer(latency=FakeLatency(command=0.0, search_results=0.0, fare=0.0, xpath=0.05)) as server:
+		manager = AppiumDriverManager('emulator-5554', 5, server.url)
+		manager.connect()
+		yield manager.driver
+		manager.quit()
+
+def actions(driver, locators: LocatorRegistry) -> WaymoActions:
+	return WaymoActions(driver, None, AdaptiveWait(driver, 0.5, 0.05), locators=locators)
+
+def test_first_sighting_promotes_the_fastest_strategy(driver):
+	locators = LocatorRegistry({"search_box": [SEARCH_XPATH, MISSING, SEARCH_SELECTOR]})
+	assert not locators.is_calibrated("search_box")
+	actions(driver, locators)._find("search_box", "search_box")
+	assert locators.is_calibrated("search_box")
+	assert locators.ranked("search_box") == [SEARCH_SELECTOR, SEARCH_XPATH, MISSING]
+	timings = locators.report()["search_box"]
+	assert timings[f"{MISSING[0]}={MISSING[1]}"] is None
+	assert timings[f"{SEARCH_SELECTOR[0]}={SEARCH_SELECTOR[1]}"] < timings[f"{SEARCH_XPATH[0]}={SEARCH_XPATH[1]}"]
+
+def test_strategy_that_stops_matching_is_demoted(driver):
+	locators = LocatorRegistry({"search_box": [MISSING, SEARCH_SELECTOR, SEARCH_XPATH]})
+	element = actions(driver, locators)._find("search_box", "search_box")
+	assert element.text == "Where to?"
+	assert locators.ranked("search_box") == [SEARCH_SELECTOR, SEARCH_XPATH, MISSING]
+
+def test_calibration_without_a_match_keeps_the_ranking(driver):
+	locators = LocatorRegistry({"confirm_button": [MISSING, (AppiumBy.ID, "com.waymo.carapp:id/confirm_button")]})
+	assert locators.calibrate(driver, "confirm_button") == MISSING
+	assert not locators.is_calibrated("confirm_button")
+
+def test_single_strategy_targets_need_no_calibration():
+	locators = LocatorRegistry({"back_button": [(AppiumBy.ACCESSIBILITY_ID, "Back")]})
+	assert locators.is_calibrated("back_button")
+	locators.demote("back_button", (AppiumBy.ACCESSIBILITY_ID, "Back"))
+	assert locators.ranked("back_button") == [(AppiumBy.ACCESSIBILITY_ID, "Back")]
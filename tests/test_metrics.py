@@ -0,0 +1,18 @@
+import logging
+
+from src.waymo_api.utils.metrics import profile
+
+def test_profile_logs_top_entries(caplog):
+	caplog.set_level(logging.INFO, logger="waymo_client")
+	with profile(limit=5):
+		sorted(range(1000), key=lambda x: -x)
+	[record] = [r for r in caplog.records if r.getMessage().startswith("Profile")]
+	message = record.getMessage()
+	assert message.startswith("Profile (top 5 by cumulative)")
+	assert "function calls" in message
+
+def test_profile_writes_stats_file(tmp_path):
+	path = tmp_path / "trip.prof"
+	with profile(str(path)):
+		sum(range(1000))
+	assert path.stat().st_size > 0
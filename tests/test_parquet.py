@@ -0,0 +1,41 @@
+from datetime import datetime, timezone
+
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from src.waymo_api.storage.parquet import ParquetTripWriter
+from src.waymo_api.utils.records import flatten_trip_info
+
+def test_flushed_rows_are_readable_before_close(tmp_path, make_trip_info):
+	writer = ParquetTripWriter(str(tmp_path / "trips"))
+	writer.write_many([flatten_trip_info(make_trip_info(pickup=f"P{i}")) for i in range(3)])
+	writer.flush()
+	assert pq.read_table(tmp_path / "trips").num_rows == 3
+
+	writer.write_many([flatten_trip_info(make_trip_info(pickup="P3"))])
+	writer.close()
+	table = pq.read_table(tmp_path / "trips")
+	assert sorted(table.column("pickup_address").to_pylist()) == ["P0", "P1", "P2", "P3"]
+
+def test_reopened_dataset_keeps_earlier_parts(tmp_path, make_trip_info):
+	for pickup in ("A", "B"):
+		writer = ParquetTripWriter(str(tmp_path / "trips"))
+		writer.write_many([flatten_trip_info(make_trip_info(pickup=pickup))])
+		writer.close()
+	assert sorted(pq.read_table(tmp_path / "trips").column("pickup_address").to_pylist()) == ["A", "B"]
+
+def test_rows_keep_exact_instants_zones_and_prices(tmp_path, make_trip_info):
+	writer = ParquetTripWriter(str(tmp_path / "trips"))
+	writer.write_many([
+		flatten_trip_info(make_trip_info(city="PHX", at=datetime(2026, 7, 1, 8, 0, 30))),
+		flatten_trip_info(make_trip_info(price=20.1, std=1.25)),
+	])
+	writer.close()
+	rows = pq.read_table(tmp_path / "trips").to_pylist()
+
+	assert rows[0]["time_zone"] == "America/Phoenix"
+	assert rows[0]["current_datetime"] == datetime(2026, 7, 1, 15, 0, 30, tzinfo=timezone.utc)
+	assert rows[0]["price"] == 12.35
+	assert rows[0]["price_std"] is None
+	assert rows[1]["price_std"] == 1.25
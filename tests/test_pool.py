@@ -0,0 +1,92 @@
+import time
+import threading
+from typing import Optional, Dict
+
+import pytest
+
+from src.waymo_api.core.exceptions import WaymoClientError, SessionError
+from src.waymo_api.core.pool import WaymoClientPool, DeviceConfig
+from src.waymo_api.testing.fake_appium import FakeAppiumServer, FakeLatency
+
+LATENCY = FakeLatency(command=0.0, search_results=0.0, fare=0.0)
+
+class StubClient:
+	"""Stands in for a WaymoClient, failing every trip with `error` if given"""
+
+	def __init__(self, make_trip_info, error: Optional[Exception] = None, ready: Optional[threading.Event] = None):
+		self.make_trip_info = make_trip_info
+		self.error = error
+		self.ready = ready # held back from taking trips until set
+		self.calls = 0
+		self.failed = threading.Event()
+
+	def __enter__(self):
+		if self.ready is not None:
+			self.ready.wait(5)
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		pass
+
+	def get_trip_info(self, pickup: str, dropoff: str):
+		self.calls += 1
+		if self.error is not None:
+			self.failed.set()
+			raise self.error
+		return self.make_trip_info(pickup, dropoff)
+
+class StubPool(WaymoClientPool):
+	def __init__(self, clients: Dict[str, StubClient], **kwargs):
+		super().__init__([DeviceConfig(name) for name in clients], **kwargs)
+		self.clients = clients
+
+	def _create_client(self, device: DeviceConfig) -> StubClient:
+		return self.clients[device.device_name]
+
+def wait_for(predicate, timeout: float = 5.0) -> None:
+	deadline = time.monotonic() + timeout
+	while not predicate():
+		assert time.monotonic() < deadline, "condition not reached"
+		time.sleep(0.01)
+
+def failing_then_healthy(make_trip_info, error: Exception):
+	"""A failing device that sees the trip first, and a healthy one that starts after it failed"""
+	bad = StubClient(make_trip_info, error)
+	good = StubClient(make_trip_info, ready=bad.failed)
+	return {"bad": bad, "good": good}
+
+def test_failed_trip_is_retried_on_another_device(make_trip_info):
+	clients = failing_then_healthy(make_trip_info, WaymoClientError("no results"))
+	with StubPool(clients) as pool:
+		trip_info = pool.get_trip_info("Pier 39", "Ferry Building")
+		assert trip_info.pickup.location.address == "Pier 39"
+		assert (clients["bad"].calls, clients["good"].calls) == (1, 1)
+		# A trip failure is not the device's fault
+		assert pool.active_devices == 2
+
+def test_session_error_retires_the_device(make_trip_info):
+	clients = failing_then_healthy(make_trip_info, SessionError("stuck"))
+	with StubPool(clients, max_consecutive_failures=1) as pool:
+		assert pool.get_trip_info("Pier 39", "Ferry Building").price.value == 12.35
+		wait_for(lambda: pool.active_devices == 1)
+		pool.get_trip_info("Coit Tower", "Ferry Building")
+		assert clients["bad"].calls == 1
+
+def test_orphans_fail_once_all_devices_are_gone(make_trip_info):
+	clients = {name: StubClient(make_trip_info, SessionError(f"{name} is stuck")) for name in ("a", "b")}
+	with StubPool(clients, max_consecutive_failures=1) as pool:
+		futures = [pool.submit(f"Pier {n}", "Ferry Building") for n in range(5)]
+		for future in futures:
+			with pytest.raises(WaymoClientError):
+				future.result(5)
+		assert pool.active_devices == 0
+		with pytest.raises(WaymoClientError, match="No devices available"):
+			pool.submit("Pier 39", "Ferry Building").result(1)
+
+def test_pool_runs_trips_on_fake_devices():
+	with FakeAppiumServer(latency=LATENCY) as first, FakeAppiumServer(latency=LATENCY) as second:
+		devices = [DeviceConfig("emulator-5554", first.url, 8200), DeviceConfig("emulator-5556", second.url, 8201)]
+		with WaymoClientPool(devices, timeout=2) as pool:
+			results = pool.map([{"pickup": f"Pier {n}", "dropoff": "Ferry Building"} for n in range(4)])
+	assert [r.pickup for r in results] == [f"Pier {n}" for n in range(4)]
+	assert all(r.success for r in results)
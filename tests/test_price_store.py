@@ -0,0 +1,82 @@
+import csv
+from datetime import datetime
+
+import pytz
+import pytest
+
+from src.waymo_api.storage.price_store import PriceStore
+from src.waymo_api.utils.records import flatten_trip_info
+
+@pytest.fixture
+def store(tmp_path):
+	with PriceStore(str(tmp_path / "prices.sqlite")) as store:
+		yield store
+
+def record(make_trip_info, **kwargs):
+	return {
+		**flatten_trip_info(make_trip_info(**kwargs)),
+		'pickup_latitude': 37.79, 'pickup_longitude': -122.39,
+		'dropoff_latitude': 37.80, 'dropoff_longitude': -122.40,
+	}
+
+def test_latest_and_history(store, make_trip_info):
+	store.write_many([
+		record(make_trip_info, price=price, at=datetime(2026, 7, 1, hour, 0))
+		for price, hour in ((10.0, 8), (12.0, 9), (11.0, 10))
+	])
+	assert store.latest("Ferry Building", "Coit Tower")["price"] == 11.0
+	assert store.latest("Ferry Building", "Pier 39") is None
+
+	# 09:00 in San Francisco is 16:00 UTC
+	la = pytz.timezone("America/Los_Angeles")
+	aware = store.history("Ferry Building", "Coit Tower", la.localize(datetime(2026, 7, 1, 9)), la.localize(datetime(2026, 7, 1, 10)))
+	naive_utc = store.history("Ferry Building", "Coit Tower", datetime(2026, 7, 1, 16), datetime(2026, 7, 1, 17))
+	assert [row["price"] for row in aware] == [row["price"] for row in naive_utc] == [12.0]
+	assert aware[0]["observed_at"] == "2026-07-01 16:00:00"
+
+def test_hourly_prices_group_by_local_hour_across_zones(store, make_trip_info):
+	# 08:00 in San Francisco and 08:00 in Phoenix are different UTC hours
+	store.write_many([
+		record(make_trip_info, price=10.0, at=datetime(2026, 7, 1, 8, 15)),
+		record(make_trip_info, price=20.0, at=datetime(2026, 7, 1, 8, 45), city="PHX"),
+		record(make_trip_info, price=30.0, at=datetime(2026, 7, 1, 17, 0)),
+	])
+	hours = {row["hour"]: row for row in store.hourly_prices()}
+	assert set(hours) == {8, 17}
+	assert (hours[8]["trips"], hours[8]["avg_price"], hours[8]["min_price"], hours[8]["max_price"]) == (2, 15.0, 10.0, 20.0)
+	assert [row["hour"] for row in store.hourly_prices(pickup="Ferry Building", dropoff="Coit Tower")] == [8, 17]
+
+def test_observations_carry_the_local_hour(store, make_trip_info):
+	store.write_many([record(make_trip_info, city="ATX", at=datetime(2026, 7, 1, 23, 30))])
+	observation, = store.observations()
+	assert (observation["local_hour"], observation["time_zone"]) == (23, "America/Chicago")
+	assert observation["observed_at"] == "2026-07-02 04:30:00"
+
+def test_import_csv_reads_local_times_in_the_city_zone(store, tmp_path):
+	path = tmp_path / "sf_waymo_estimates.csv"
+	fields = ['request_timestamp', 'pickup_name', 'dropoff_name', 'price_usd', 'current_date', 'current_time', 'city']
+	with open(path, 'w', newline='') as f:
+		writer = csv.DictWriter(f, fieldnames=fields)
+		writer.writeheader()
+		writer.writerow({
+			'request_timestamp': '2026-07-01 20:00:00', # machine-local, ignored when local date and time exist
+			'pickup_name': 'A', 'dropoff_name': 'B', 'price_usd': '9.5',
+			'current_date': '07/01/2026', 'current_time': '08:05', 'city': 'SF',
+		})
+		writer.writerow({'pickup_name': 'A', 'dropoff_name': 'C', 'price_usd': '', 'current_date': '07/01/2026', 'current_time': '08:10', 'city': 'PHX'})
+
+	assert store.import_csv(str(path), batch_size=1) == 2
+	sf = store.latest("A", "B")
+	assert (sf["observed_at"], sf["local_hour"], sf["time_zone"], sf["price"]) == ("2026-07-01 15:05:00", 8, "America/Los_Angeles", 9.5)
+	phx = store.latest("A", "C")
+	assert (phx["observed_at"], phx["price"]) == ("2026-07-01 15:10:00", None)
+
+def test_hourly_prices_filter_by_neighborhood(store, make_trip_info):
+	store.write_many([
+		{**record(make_trip_info, price=10.0), 'pickup_neighborhood': 'Embarcadero', 'dropoff_neighborhood': 'North Beach'},
+		{**record(make_trip_info, price=30.0), 'pickup_neighborhood': 'Mission', 'dropoff_neighborhood': 'North Beach'},
+	])
+	[row] = store.hourly_prices(pickup_neighborhood='Embarcadero')
+	assert (row["hour"], row["trips"], row["avg_price"]) == (12, 1, 10.0)
+	assert store.hourly_prices(dropoff_neighborhood='North Beach')[0]["trips"] == 2
+	assert store.hourly_prices(pickup_neighborhood='Embarcadero', end=datetime(2026, 7, 1)) == []
@@ -0,0 +1,25 @@
+from src.waymo_api.core.pool import DeviceConfig
+from src.waymo_api.core.regions import RegionScheduler
+from src.waymo_api.testing.fake_appium import FakeAppiumServer, FakeLatency
+
+LATENCY = FakeLatency(command=0.0, search_results=0.0, fare=0.0)
+
+def test_batches_share_a_dropoff_within_an_area():
+	scheduler = RegionScheduler([DeviceConfig("emulator-5554")], max_batch=2)
+	scheduler._active = {"emulator-5554"} # as if started, without a worker taking the trips
+	for pickup, dropoff, region in [("A", "X", "SF"), ("B", "Y", "SF"), ("C", "X", "SF"), ("D", "X", "SF"), ("E", "X", "PHX")]:
+		scheduler.submit(pickup, dropoff, region)
+	with scheduler._condition:
+		batches = [[task.pickup for task in scheduler._select("emulator-5554")] for _ in range(4)]
+	assert batches == [["A", "C"], ["B"], ["D"], ["E"]]
+
+def test_region_scheduler_survives_a_dead_device():
+	with FakeAppiumServer(latency=LATENCY) as server:
+		devices = [DeviceConfig("emulator-5554", server.url, 8200), DeviceConfig("emulator-5556", "http://127.0.0.1:9", 8201)]
+		with RegionScheduler(devices, timeout=2, location_settle_time=0.0) as scheduler:
+			trips = [{"pickup": f"Stop {n}", "dropoff": "Downtown", "region": region} for n in range(3) for region in ("SF", "PHX")]
+			results = scheduler.map(trips)
+			assert scheduler.active_devices == 1
+	assert all(r.success for r in results)
+	assert {r.trip_info.city for r in results} == {"SF", "PHX"}
+	assert dict(scheduler.stats.trips) == {"SF": 3, "PHX": 3}
@@ -0,0 +1,29 @@
+import pytest
+
+from src.waymo_api.core.driver import AppiumDriverManager
+from src.waymo_api.interactions.screens import ScreenNavigator, Screen, KEYCODE_BACK
+from src.waymo_api.testing.fake_appium import FakeAppiumServer, FakeLatency, APP_ACTIVITY
+
+@pytest.fixture
+def driver():
+	with FakeAppiumServer(latency=FakeLatency(command=0.0, search_results=0.0, fare=0.0)) as server:
+		manager = AppiumDriverManager('emulator-5554', 5, server.url)
+		manager.connect()
+		yield manager.driver
+		manager.quit()
+
+def test_screen_in_another_app_activity_is_in_the_app(driver):
+	navigator = ScreenNavigator(driver, 'com.waymo.carapp')
+	driver.find_element('-android uiautomator', 'new UiSelector().textContains("Where to")').click()
+	# Location search runs in its own activity
+	assert driver.current_activity != APP_ACTIVITY
+	assert navigator.detect() == Screen.DROPOFF_SEARCH
+	assert navigator.go_home() == Screen.DROPOFF_SEARCH
+	assert navigator.detect() == Screen.HOME
+
+def test_launcher_is_outside_the_app(driver):
+	navigator = ScreenNavigator(driver, 'com.waymo.carapp')
+	driver.execute_script('mobile: pressKey', {'keycode': KEYCODE_BACK})
+	assert navigator.detect() == Screen.OUTSIDE_APP
+	assert navigator.go_home() == Screen.OUTSIDE_APP
+	assert navigator.detect() == Screen.HOME
@@ -0,0 +1,57 @@
+import json
+import time
+import socket
+import threading
+import urllib.request
+import urllib.error
+
+import pytest
+
+from src.waymo_api.core.pool import DeviceConfig
+from src.waymo_api.service.server import QuoteService
+from src.waymo_api.testing.fake_appium import FakeAppiumServer, FakeLatency
+
+LATENCY = FakeLatency(command=0.0, search_results=0.0, fare=0.05)
+
+def closed_port_url() -> str:
+	with socket.socket() as sock:
+		sock.bind(("127.0.0.1", 0))
+		return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+def post(port: int, path: str, body: bytes):
+	request = urllib.request.Request(f"http://127.0.0.1:{port}{path}", data=body, method="POST")
+	try:
+		with urllib.request.urlopen(request) as response:
+			return response.status, json.loads(response.read())
+	except urllib.error.HTTPError as e:
+		return e.code, json.loads(e.read())
+
+def test_dispatch_limit_follows_active_devices():
+	with FakeAppiumServer(latency=LATENCY) as server:
+		devices = [DeviceConfig("emulator-5554", server.url, 8200), DeviceConfig("emulator-5556", closed_port_url(), 8201)]
+		with QuoteService(devices, timeout=2) as service:
+			deadline = time.monotonic() + 30
+			while service.pool.active_devices > 1 and time.monotonic() < deadline:
+				time.sleep(0.05)
+			assert service.pool.active_devices == 1
+
+			in_flight = []
+			submit = service.pool.submit
+			def tracking_submit(*args, **kwargs):
+				in_flight.append(service.in_flight)
+				return submit(*args, **kwargs)
+			service.pool.submit = tracking_submit
+
+			results = service.quotes("caller", [{"pickup": f"P{i}", "dropoff": "D"} for i in range(4)], timeout=60)
+
+	assert all(result.success for result in results)
+	assert max(in_flight) == 1
+
+@pytest.mark.parametrize("body", [b"[]", b'"x"', b"1"])
+def test_non_object_bodies_are_bad_requests(body):
+	with FakeAppiumServer(latency=LATENCY) as server:
+		with QuoteService([DeviceConfig("emulator-5554", server.url, 8200)], timeout=2) as service:
+			port = service.serve(port=0).server_port
+			status, payload = post(port, "/quotes", body)
+	assert status == 400
+	assert "expected a JSON object" in payload["error"]
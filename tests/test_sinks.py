@@ -0,0 +1,90 @@
+import csv
+import json
+import sqlite3
+import time
+from datetime import datetime
+from typing import List
+
+import pytest
+
+from src.waymo_api.core.exceptions import WaymoClientError
+from src.waymo_api.storage.sinks import TripSink, CSVSink, JSONLSink, SQLiteSink, BackgroundWriter, Record
+
+RECORDS = [
+	{"pickup_name": "Pier 39", "dropoff_name": "Ferry Building", "price_usd": 12.35},
+	{"pickup_name": "Coit Tower", "dropoff_name": "Ferry Building", "price_usd": None, "extra": "ignored"},
+]
+
+class RecordingSink(TripSink):
+	def __init__(self, fail: bool = False):
+		self.fail = fail
+		self.calls: List[str] = []
+		self.records: List[Record] = []
+
+	def write_many(self, records: List[Record]) -> None:
+		self.calls.append("write")
+		if self.fail:
+			raise OSError("disk full")
+		self.records.extend(records)
+
+	def flush(self) -> None:
+		self.calls.append("flush")
+
+	def close(self) -> None:
+		self.calls.append("close")
+
+def test_csv_sink_appends_in_existing_column_order(tmp_path):
+	path = tmp_path / "trips.csv"
+	sink = CSVSink(str(path), ["pickup_name", "dropoff_name", "price_usd"])
+	sink.write_many(RECORDS[:1])
+	sink.close()
+	sink = CSVSink(str(path), ["price_usd", "pickup_name"])
+	assert sink.fieldnames == ["pickup_name", "dropoff_name", "price_usd"]
+	sink.write_many(RECORDS[1:])
+	sink.close()
+	with open(path, newline="") as f:
+		rows = list(csv.DictReader(f))
+	assert [row["pickup_name"] for row in rows] == ["Pier 39", "Coit Tower"]
+	assert rows[1]["price_usd"] == ""
+	assert "extra" not in rows[1]
+
+def test_jsonl_sink_serializes_datetimes(tmp_path):
+	path = tmp_path / "trips.jsonl"
+	sink = JSONLSink(str(path))
+	sink.write_many([{**RECORDS[0], "at": datetime(2026, 7, 1, 12, 0)}])
+	sink.flush()
+	assert json.loads(path.read_text().splitlines()[0])["at"] == "2026-07-01 12:00:00"
+	sink.close()
+
+def test_sqlite_sink_writes_missing_fields_as_null(tmp_path):
+	path = tmp_path / "trips.sqlite"
+	sink = SQLiteSink(str(path), ["pickup_name", "price_usd", "wait_mins"])
+	sink.write_many(RECORDS)
+	sink.close()
+	with sqlite3.connect(path) as conn:
+		rows = conn.execute("SELECT pickup_name, price_usd, wait_mins FROM trips").fetchall()
+	assert rows == [("Pier 39", 12.35, None), ("Coit Tower", None, None)]
+
+def test_background_writer_flushes_each_batch_then_closes():
+	sink = RecordingSink()
+	with BackgroundWriter(sink, batch_size=2, flush_interval=60) as writer:
+		for record in RECORDS + RECORDS[:1]:
+			writer.write(record)
+		deadline = time.monotonic() + 5
+		while sink.calls != ["write", "flush"] and time.monotonic() < deadline:
+			time.sleep(0.01)
+		# The full batch is written without waiting for the interval or close
+		assert sink.calls == ["write", "flush"]
+	assert sink.calls == ["write", "flush", "write", "flush", "close"]
+	assert [r["pickup_name"] for r in sink.records] == ["Pier 39", "Coit Tower", "Pier 39"]
+
+def test_background_writer_reports_sink_failures():
+	sink = RecordingSink(fail=True)
+	writer = BackgroundWriter(sink, batch_size=1)
+	writer.write(RECORDS[0])
+	writer._thread.join(5)
+	with pytest.raises(WaymoClientError, match="disk full"):
+		writer.write(RECORDS[1])
+	writer.close()
+	# The sink is closed even though the write failed
+	assert sink.calls == ["write", "close"]
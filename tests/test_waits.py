@@ -0,0 +1,41 @@
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.support import expected_conditions as EC
+
+from src.waymo_api.interactions.waits import AdaptiveWait
+
+CONFIRM = ("id", "confirm_button")
+NEXT = ("id", "pickup_waypoint")
+
+class StubElement:
+	def __init__(self, enabled_after: int = 0):
+		self.enabled_after = enabled_after
+		self.checks = 0
+
+	def is_displayed(self) -> bool:
+		return True
+
+	def is_enabled(self) -> bool:
+		self.checks += 1
+		return self.checks > self.enabled_after
+
+class StubDriver:
+	def __init__(self, elements):
+		self.elements = elements
+
+	def find_element(self, by, value):
+		if (by, value) not in self.elements:
+			raise NoSuchElementException(value)
+		return self.elements[(by, value)]
+
+def test_clickable_condition_waits_for_enabled_confirm():
+	confirm = StubElement(enabled_after=2)
+	waiter = AdaptiveWait(StubDriver({CONFIRM: confirm}), timeout=2, poll_interval=0.01)
+	name, element = waiter.until_any("next_screen", {"confirm": CONFIRM, "next": NEXT}, conditions={"confirm": EC.element_to_be_clickable})
+	assert (name, element) == ("confirm", confirm)
+	assert confirm.checks == 3
+
+def test_disabled_confirm_loses_to_next_screen():
+	next_screen = StubElement()
+	waiter = AdaptiveWait(StubDriver({CONFIRM: StubElement(enabled_after=1000), NEXT: next_screen}), timeout=2, poll_interval=0.01)
+	name, element = waiter.until_any("next_screen", {"confirm": CONFIRM, "next": NEXT}, conditions={"confirm": EC.element_to_be_clickable})
+	assert (name, element) == ("next", next_screen)